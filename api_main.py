@@ -5,19 +5,36 @@ REST API endpoints to expose bus route recommendation functionality
 
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi.responses import JSONResponse, Response
+from datetime import date, datetime
+from contextlib import ExitStack
+import cProfile
+import hmac
+import json
+import os
+import time
 import uvicorn
 from typing import Optional, List
 import traceback
 import logging
 
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used without it
+    orjson = None
+
 # Import models and service
 from api_models import (
     RouteRecommendationRequest, RouteRecommendationResponse, RouteRecommendation,
-    StationListResponse, HealthCheckResponse, ErrorResponse, TransferDetails
+    StationListResponse, HealthCheckResponse,
+    RouteProfileResponse, ProfileEntry, AlternativesResponse, AlternativeJourney,
+    RoundTripRequest, RoundTripResponse, RoundTripItinerary
 )
 from bus_service import BusRecommendationService
+from metrics import (
+    REGISTRY, CONTENT_TYPE, REQUEST_LATENCY, REQUESTS_IN_PROGRESS,
+    profile_summary, request_trace, timed_stage
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +61,75 @@ app.add_middleware(
 # Initialize the bus recommendation service
 bus_service = None
 
+# Admin key required for ?profile=1 (profiling is disabled when unset)
+ADMIN_KEY_ENV = "BUS_API_ADMIN_KEY"
+
+# Fields of a RouteRecommendation, in response order
+RECOMMENDATION_FIELDS = tuple(RouteRecommendation.model_fields)
+
+def _json_default(value):
+    """Encode NumPy scalars and datetimes that reach a trusted payload"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class TrustedJSONResponse(Response):
+    """JSON response for payloads built from trusted service data
+
+    Returned directly from an endpoint it bypasses the ``response_model``
+    validation and serialization (the model still documents the schema), and the
+    body is encoded with orjson when it is installed.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, default=_json_default, ensure_ascii=False, allow_nan=False,
+                          indent=None, separators=(",", ":")).encode("utf-8")
+
+def diagnostics_flag(http_request: Optional[Request], name: str) -> bool:
+    """True if a diagnostics mode is requested with an X-<Name> header
+
+    The ``?<name>=`` query parameter is declared on the endpoints and parsed by FastAPI.
+    """
+    if http_request is None:
+        return False
+    value = http_request.headers.get(f"X-{name.capitalize()}")
+    return value is not None and value.strip().lower() in ("1", "true", "yes", "on")
+
+def check_admin_key(http_request: Request):
+    """Reject profiling requests without the configured admin key"""
+    admin_key = os.environ.get(ADMIN_KEY_ENV)
+    supplied = http_request.headers.get("X-Admin-Key")
+    if not admin_key or not supplied or not hmac.compare_digest(supplied, admin_key):
+        raise HTTPException(
+            status_code=403,
+            detail="Profiling requires a valid X-Admin-Key header"
+        )
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency per route and the number of requests in progress"""
+    REQUESTS_IN_PROGRESS.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_PROGRESS.dec()
+        route = request.scope.get("route")
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=str(status)
+        )
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the bus recommendation service on startup"""
@@ -167,8 +253,19 @@ async def get_current_info():
         )
 
 @app.post("/recommendations", response_model=RouteRecommendationResponse)
-async def get_route_recommendations(request: RouteRecommendationRequest):
-    """Get bus route recommendations based on search criteria"""
+async def get_route_recommendations(
+    request: RouteRecommendationRequest,
+    explain: bool = Query(False, description="Include a per-stage breakdown in the metadata"),
+    profile: bool = Query(False, description="Include a cProfile summary (requires X-Admin-Key)"),
+    http_request: Request = None
+):
+    """Get bus route recommendations based on search criteria
+
+    With ``?explain=1`` (or ``X-Explain: 1``) the response metadata includes the
+    station matching path, rows kept by each filter, the transfer search outcome
+    and wall time per stage. ``?profile=1`` with a valid ``X-Admin-Key`` adds a
+    cProfile summary.
+    """
     global bus_service
     
     if not bus_service or not bus_service.is_data_loaded():
@@ -177,6 +274,11 @@ async def get_route_recommendations(request: RouteRecommendationRequest):
             detail="Bus data service unavailable"
         )
     
+    profile = profile or diagnostics_flag(http_request, "profile")
+    if profile:
+        check_admin_key(http_request)
+    explain = profile or explain or diagnostics_flag(http_request, "explain")
+    
     try:
         # Normalize input station names (trim whitespace)
         origin = request.origin.strip() if request.origin else request.origin
@@ -184,77 +286,32 @@ async def get_route_recommendations(request: RouteRecommendationRequest):
         
         logger.info(f"Processing recommendation request: {origin} → {destination}")
         
-        # Get recommendations from service with improved matching
-        recommendations_data = bus_service.get_recommendations(
-            origin_french=origin,
-            destination_french=destination,
-            preferred_time=request.preferred_time,
-            preferred_day=request.preferred_day,
-            preferred_season=request.preferred_season,
-            max_results=request.max_results
-        )
-        
-        # Convert to API model format
-        recommendations = []
-        for rec_data in recommendations_data:
-            # Handle transfer details if present
-            transfer_details = None
-            if rec_data.get('transfer_details'):
-                td = rec_data['transfer_details']
-                transfer_details = TransferDetails(
-                    transfer_station=td['transfer_station'],
-                    first_leg_departure=td['first_leg_departure'],
-                    first_leg_duration=td['first_leg_duration'],
-                    first_leg_service=td['first_leg_service'],
-                    waiting_time=td['waiting_time'],
-                    second_leg_departure=td['second_leg_departure'],
-                    second_leg_duration=td['second_leg_duration'],
-                    second_leg_service=td['second_leg_service']
-                )
+        with ExitStack() as diagnostics:
+            trace = diagnostics.enter_context(request_trace()) if explain else None
+            profiler = cProfile.Profile() if profile else None
+            if profiler:
+                profiler.enable()
+                diagnostics.callback(profiler.disable)
             
-            recommendation = RouteRecommendation(
-                type=rec_data['type'],
-                departure_time=rec_data['departure_time'],
-                duration=rec_data['duration'],
-                service_type=rec_data['service_type'],
-                quality_score=rec_data['quality_score'],
-                route_details=rec_data['route_details'],
-                transfers=rec_data['transfers'],
-                time_difference_info=rec_data.get('time_difference_info'),
-                transfer_details=transfer_details
+            # Get recommendations from service with improved matching
+            recommendations_data = bus_service.get_recommendations(
+                origin_french=origin,
+                destination_french=destination,
+                preferred_time=request.preferred_time,
+                preferred_day=request.preferred_day,
+                preferred_season=request.preferred_season,
+                max_results=request.max_results,
+                travel_date=request.travel_date
             )
-            recommendations.append(recommendation)
-        
-        # Build search criteria
-        search_criteria = {
-            "origin": request.origin,
-            "destination": request.destination,
-            "preferred_time": request.preferred_time,
-            "preferred_day": request.preferred_day,
-            "preferred_season": request.preferred_season,
-            "max_results": request.max_results
-        }
-        
-        # Build metadata
-        metadata = {
-            "search_timestamp": datetime.now().isoformat(),
-            "direct_routes_found": sum(1 for r in recommendations if r.type == "direct"),
-            "transfer_routes_found": sum(1 for r in recommendations if r.type == "transfer"),
-            "average_quality_score": sum(r.quality_score for r in recommendations) / len(recommendations) if recommendations else 0
-        }
-        
-        message = f"Found {len(recommendations)} route recommendations"
-        if not recommendations:
-            message = "No routes found for the specified criteria"
+            
+            with timed_stage('serialization'):
+                payload = build_recommendation_payload(request, recommendations_data)
         
-        return RouteRecommendationResponse(
-            success=True,
-            message=message,
-            recommendations=recommendations,
-            total_found=len(recommendations),
-            search_criteria=search_criteria,
-            metadata=metadata
-        )
+        if trace:
+            payload["metadata"]["explain"] = trace.as_dict()
+        if profiler:
+            payload["metadata"]["profile"] = profile_summary(profiler)
+        return TrustedJSONResponse(payload)
         
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -270,6 +327,54 @@ async def get_route_recommendations(request: RouteRecommendationRequest):
             detail=f"Error getting recommendations: {str(e)}"
         )
 
+def build_recommendation_payload(request: RouteRecommendationRequest,
+                                 recommendations_data: List[dict]) -> dict:
+    """Assemble the RouteRecommendationResponse body from the service's response-ready dicts
+
+    The service returns plain JSON types with every RouteRecommendation field, so
+    each recommendation is only projected onto the model's fields, not validated.
+    """
+    recommendations = []
+    direct_count = 0
+    total_score = 0.0
+    for rec_data in recommendations_data:
+        recommendations.append({field: rec_data.get(field) for field in RECOMMENDATION_FIELDS})
+        if rec_data['type'] == "direct":
+            direct_count += 1
+        total_score += rec_data['quality_score']
+    
+    # Build search criteria
+    search_criteria = {
+        "origin": request.origin,
+        "destination": request.destination,
+        "preferred_time": request.preferred_time,
+        "preferred_day": request.preferred_day,
+        "preferred_season": request.preferred_season,
+        "max_results": request.max_results,
+        "travel_date": request.travel_date.isoformat() if request.travel_date else None
+    }
+    
+    # Build metadata
+    metadata = {
+        "search_timestamp": datetime.now().isoformat(),
+        "direct_routes_found": direct_count,
+        "transfer_routes_found": len(recommendations) - direct_count,
+        "average_quality_score": total_score / len(recommendations) if recommendations else 0
+    }
+    
+    message = f"Found {len(recommendations)} route recommendations"
+    if not recommendations:
+        message = "No routes found for the specified criteria"
+    
+    return {
+        "success": True,
+        "message": message,
+        "recommendations": recommendations,
+        "total_found": len(recommendations),
+        "search_criteria": search_criteria,
+        "metadata": metadata
+    }
+
 @app.get("/recommendations", response_model=RouteRecommendationResponse)
 async def get_route_recommendations_get(
     origin: str = Query(..., description="Origin station name in French"),
@@ -277,7 +382,11 @@ async def get_route_recommendations_get(
     preferred_time: Optional[str] = Query(None, description="Preferred departure time (HH:MM)"),
     preferred_day: Optional[str] = Query(None, description="Preferred day of week in French"),
     preferred_season: Optional[str] = Query(None, description="Preferred season"),
-    max_results: int = Query(5, description="Maximum number of results", ge=1, le=20)
+    max_results: int = Query(5, description="Maximum number of results", ge=1, le=20),
+    travel_date: Optional[date] = Query(None, description="Travel date (YYYY-MM-DD) setting the day and season"),
+    explain: bool = Query(False, description="Include a per-stage breakdown in the metadata"),
+    profile: bool = Query(False, description="Include a cProfile summary (requires X-Admin-Key)"),
+    http_request: Request = None
 ):
     """Get bus route recommendations using GET method (for easier testing)"""
     
@@ -292,10 +401,224 @@ async def get_route_recommendations_get(
         preferred_time=preferred_time,
         preferred_day=preferred_day,
         preferred_season=preferred_season,
-        max_results=max_results
+        max_results=max_results,
+        travel_date=travel_date
     )
     
-    return await get_route_recommendations(request_obj)
+    return await get_route_recommendations(request_obj, explain, profile, http_request)
+
+@app.get("/recommendations/profile", response_model=RouteProfileResponse)
+async def get_route_profile(
+    origin: str = Query(..., description="Origin station name in French"),
+    destination: str = Query(..., description="Destination station name in French"),
+    preferred_day: Optional[str] = Query(None, description="Preferred day of week in French"),
+    preferred_season: Optional[str] = Query(None, description="Preferred season"),
+    travel_date: Optional[date] = Query(None, description="Travel date (YYYY-MM-DD) setting the day and season")
+):
+    """Get every Pareto-optimal journey (departure vs arrival) for a station pair over the whole day"""
+    global bus_service
+    
+    if not bus_service or not bus_service.is_data_loaded():
+        raise HTTPException(
+            status_code=503,
+            detail="Bus data service unavailable"
+        )
+    
+    try:
+        origin = origin.strip()
+        destination = destination.strip()
+        
+        logger.info(f"Processing profile request: {origin} → {destination}")
+        
+        profile_data = bus_service.get_route_profile(
+            origin_french=origin,
+            destination_french=destination,
+            preferred_day=preferred_day,
+            preferred_season=preferred_season,
+            travel_date=travel_date
+        )
+        
+        profile = [ProfileEntry(**entry) for entry in profile_data]
+        
+        message = f"Found {len(profile)} journeys in the daily profile"
+        if not profile:
+            message = "No routes found for the specified criteria"
+        
+        return RouteProfileResponse(
+            success=True,
+            message=message,
+            profile=profile,
+            total_found=len(profile),
+            search_criteria={
+                "origin": origin,
+                "destination": destination,
+                "preferred_day": preferred_day,
+                "preferred_season": preferred_season,
+                "travel_date": travel_date.isoformat() if travel_date else None
+            }
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error getting route profile: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting route profile: {str(e)}"
+        )
+
+@app.post("/recommendations/roundtrip", response_model=RoundTripResponse)
+async def get_round_trip(request: RoundTripRequest):
+    """Plan a same-day round trip: outbound recommendations paired with the best return
+    
+    Both stations are resolved once and reused for the return direction.
+    """
+    global bus_service
+    
+    if not bus_service or not bus_service.is_data_loaded():
+        raise HTTPException(
+            status_code=503,
+            detail="Bus data service unavailable"
+        )
+    
+    try:
+        origin = request.origin.strip()
+        destination = request.destination.strip()
+        
+        logger.info(f"Processing round trip request: {origin} ⇄ {destination}")
+        
+        itineraries_data = bus_service.get_round_trip(
+            origin_french=origin,
+            destination_french=destination,
+            preferred_time=request.preferred_time,
+            preferred_day=request.preferred_day,
+            preferred_season=request.preferred_season,
+            min_stay_minutes=request.min_stay_minutes,
+            return_time=request.return_time,
+            return_by=request.return_by,
+            max_results=request.max_results,
+            travel_date=request.travel_date
+        )
+        
+        itineraries = [RoundTripItinerary(**itinerary) for itinerary in itineraries_data]
+        
+        message = f"Found {len(itineraries)} round trip itineraries"
+        if not itineraries:
+            message = "No round trips found for the specified criteria"
+        
+        return RoundTripResponse(
+            success=True,
+            message=message,
+            itineraries=itineraries,
+            total_found=len(itineraries),
+            search_criteria={
+                "origin": origin,
+                "destination": destination,
+                "preferred_time": request.preferred_time,
+                "preferred_day": request.preferred_day,
+                "preferred_season": request.preferred_season,
+                "min_stay_minutes": request.min_stay_minutes,
+                "return_time": request.return_time,
+                "return_by": request.return_by,
+                "max_results": request.max_results,
+                "travel_date": request.travel_date.isoformat() if request.travel_date else None
+            }
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error planning round trip: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error planning round trip: {str(e)}"
+        )
+
+@app.get("/recommendations/alternatives", response_model=AlternativesResponse)
+async def get_alternatives(
+    origin: str = Query(..., description="Origin station name in French"),
+    destination: str = Query(..., description="Destination station name in French"),
+    preferred_time: Optional[str] = Query(None, description="Preferred departure time (HH:MM)"),
+    preferred_day: Optional[str] = Query(None, description="Preferred day of week in French"),
+    preferred_season: Optional[str] = Query(None, description="Preferred season"),
+    k: int = Query(5, description="Maximum number of alternatives", ge=1, le=20),
+    travel_date: Optional[date] = Query(None, description="Travel date (YYYY-MM-DD) setting the day and season")
+):
+    """Get up to k meaningfully different journeys (transfer station, departure band or service type)"""
+    global bus_service
+    
+    if not bus_service or not bus_service.is_data_loaded():
+        raise HTTPException(
+            status_code=503,
+            detail="Bus data service unavailable"
+        )
+    
+    try:
+        origin = origin.strip()
+        destination = destination.strip()
+        
+        logger.info(f"Processing alternatives request: {origin} → {destination}")
+        
+        alternatives_data = bus_service.get_alternatives(
+            origin_french=origin,
+            destination_french=destination,
+            preferred_time=preferred_time,
+            preferred_day=preferred_day,
+            preferred_season=preferred_season,
+            k=k,
+            travel_date=travel_date
+        )
+        
+        alternatives = [AlternativeJourney(**entry) for entry in alternatives_data]
+        
+        message = f"Found {len(alternatives)} alternative journeys"
+        if not alternatives:
+            message = "No routes found for the specified criteria"
+        
+        return AlternativesResponse(
+            success=True,
+            message=message,
+            alternatives=alternatives,
+            total_found=len(alternatives),
+            search_criteria={
+                "origin": origin,
+                "destination": destination,
+                "preferred_time": preferred_time,
+                "preferred_day": preferred_day,
+                "preferred_season": preferred_season,
+                "k": k,
+                "travel_date": travel_date.isoformat() if travel_date else None
+            }
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error getting alternatives: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting alternatives: {str(e)}"
+        )
+
+@app.get("/metrics")
+async def metrics():
+    """Request and per-stage latency metrics in the Prometheus text format"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # Helper endpoint for testing
 @app.get("/test")
@@ -312,6 +635,10 @@ async def test_endpoint():
             "current_info": "/current-info",
             "recommendations_post": "/recommendations (POST)",
             "recommendations_get": "/recommendations (GET)",
+            "recommendations_profile": "/recommendations/profile (GET)",
+            "recommendations_alternatives": "/recommendations/alternatives (GET)",
+            "recommendations_roundtrip": "/recommendations/roundtrip (POST)",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
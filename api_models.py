@@ -5,7 +5,25 @@ Pydantic models for request/response validation and documentation
 
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Literal
-from datetime import datetime
+from datetime import date, datetime
+
+def normalize_time(v: Optional[str]) -> Optional[str]:
+    """Validate an HH:MM time and zero-pad it"""
+    if v is not None:
+        try:
+            # Validate HH:MM format
+            parts = v.split(':')
+            if len(parts) != 2:
+                raise ValueError("Time must be in HH:MM format")
+            hour, minute = int(parts[0]), int(parts[1])
+            if not (0 <= hour <= 23):
+                raise ValueError("Hour must be between 00 and 23")
+            if not (0 <= minute <= 59):
+                raise ValueError("Minute must be between 00 and 59")
+            return f"{hour:02d}:{minute:02d}"
+        except (ValueError, IndexError):
+            raise ValueError("Invalid time format. Use HH:MM (e.g., 08:30)")
+    return v
 
 class RouteRecommendationRequest(BaseModel):
     """Request model for route recommendations"""
@@ -19,24 +37,14 @@ class RouteRecommendationRequest(BaseModel):
         None, description="Preferred season", example="Summer"
     )
     max_results: Optional[int] = Field(5, description="Maximum number of recommendations to return", ge=1, le=20)
+    travel_date: Optional[date] = Field(
+        None, description="Travel date (YYYY-MM-DD); sets the day and season not given explicitly",
+        example="2025-03-14"
+    )
 
     @validator('preferred_time')
     def validate_time_format(cls, v):
-        if v is not None:
-            try:
-                # Validate HH:MM format
-                parts = v.split(':')
-                if len(parts) != 2:
-                    raise ValueError("Time must be in HH:MM format")
-                hour, minute = int(parts[0]), int(parts[1])
-                if not (0 <= hour <= 23):
-                    raise ValueError("Hour must be between 00 and 23")
-                if not (0 <= minute <= 59):
-                    raise ValueError("Minute must be between 00 and 59")
-                return f"{hour:02d}:{minute:02d}"
-            except (ValueError, IndexError):
-                raise ValueError("Invalid time format. Use HH:MM (e.g., 08:30)")
-        return v
+        return normalize_time(v)
         
     @validator('preferred_day')
     def normalize_day(cls, v):
@@ -98,6 +106,63 @@ class RouteRecommendationResponse(BaseModel):
     search_criteria: dict = Field(..., description="Search criteria used")
     metadata: dict = Field(..., description="Additional metadata")
 
+class ProfileEntry(BaseModel):
+    """Single Pareto-optimal journey in a departure/arrival profile"""
+    departure_time: str = Field(..., description="Departure time from the origin (HH:MM)")
+    arrival_time: str = Field(..., description="Arrival time at the destination (HH:MM)")
+    duration: int = Field(..., description="Total journey duration in minutes")
+    transfers: int = Field(..., description="Number of transfers", ge=0)
+    service_type: str = Field(..., description="Service type (Standard, Luxe, Mixed)")
+    route_details: str = Field(..., description="Route description")
+    transfer_details: Optional[TransferDetails] = Field(None, description="Transfer details if applicable")
+
+class RouteProfileResponse(BaseModel):
+    """Response model for a full-day route profile"""
+    success: bool = Field(..., description="Whether the request was successful")
+    message: str = Field(..., description="Response message")
+    profile: List[ProfileEntry] = Field(..., description="Pareto profile ordered by departure time")
+    total_found: int = Field(..., description="Number of journeys in the profile")
+    search_criteria: dict = Field(..., description="Search criteria used")
+
+class AlternativeJourney(ProfileEntry):
+    """One of several meaningfully different journeys for a station pair"""
+    departure_band: str = Field(..., description="Departure band (late night, early morning, morning, midday, evening, night)")
+
+class AlternativesResponse(BaseModel):
+    """Response model for diverse alternative journeys"""
+    success: bool = Field(..., description="Whether the request was successful")
+    message: str = Field(..., description="Response message")
+    alternatives: List[AlternativeJourney] = Field(..., description="Alternatives, best first")
+    total_found: int = Field(..., description="Number of alternatives returned")
+    search_criteria: dict = Field(..., description="Search criteria used")
+
+class RoundTripRequest(RouteRecommendationRequest):
+    """Request model for a round trip: the outbound criteria plus return constraints"""
+    min_stay_minutes: int = Field(0, description="Minimum time at the destination before returning", ge=0, le=1440,
+                                  example=240)
+    return_time: Optional[str] = Field(None, description="Earliest return departure in HH:MM format", example="16:00")
+    return_by: Optional[str] = Field(None, description="Latest arrival back at the origin in HH:MM format",
+                                     example="20:00")
+
+    @validator('return_time', 'return_by')
+    def validate_return_times(cls, v):
+        return normalize_time(v)
+
+class RoundTripItinerary(BaseModel):
+    """Outbound recommendation paired with a return journey the same day"""
+    outbound: RouteRecommendation = Field(..., description="Outbound route")
+    return_journey: ProfileEntry = Field(..., description="Return journey arriving earliest after the stay")
+    stay_minutes: int = Field(..., description="Time between the outbound arrival and the return departure", ge=0)
+    total_duration: int = Field(..., description="Travel time of both directions in minutes")
+
+class RoundTripResponse(BaseModel):
+    """Response model for round trip planning"""
+    success: bool = Field(..., description="Whether the request was successful")
+    message: str = Field(..., description="Response message")
+    itineraries: List[RoundTripItinerary] = Field(..., description="Paired itineraries, best outbound first")
+    total_found: int = Field(..., description="Number of itineraries")
+    search_criteria: dict = Field(..., description="Search criteria used")
+
 class StationListResponse(BaseModel):
     """Response model for available stations"""
     success: bool = Field(..., description="Whether the request was successful")
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark suite for the hot paths of the Bus Recommendation System
+Runs in-process against the real SRTGN dataset and stores results as JSON
+
+Usage:
+    python benchmark_suite.py                          # run everything
+    python benchmark_suite.py --filter recommendations # run one group or benchmark
+    python benchmark_suite.py --compare benchmark_results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+from bus_recommendations import find_matching_station, translate_station_to_french
+from bus_service import BusRecommendationService
+from fast_query import FastTimetable, write_snapshot
+from timetable_engine import load_timetable
+
+DEFAULT_DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+DEFAULT_RESULTS_DIR = "benchmark_results"
+
+# Fixed fixture queries drawn from real station pairs in the dataset
+DIRECT_QUERIES = [
+    {'origin_french': 'Nabeul', 'destination_french': 'Tunis', 'preferred_time': '08:00',
+     'preferred_day': 'Lundi', 'preferred_season': 'Summer'},
+    {'origin_french': 'Hammamet', 'destination_french': 'Tunis', 'preferred_time': None,
+     'preferred_day': None, 'preferred_season': None},
+    {'origin_french': 'Baraka Sahel', 'destination_french': 'Hammamet', 'preferred_time': '17:30',
+     'preferred_day': 'Vendredi', 'preferred_season': 'Winter'},
+]
+
+TRANSFER_QUERIES = [
+    {'origin_french': 'Baraka Sahel', 'destination_french': 'Bir Bouregba', 'preferred_time': None,
+     'preferred_day': None, 'preferred_season': None},
+    {'origin_french': 'Aeroport Tunis Carthage', 'destination_french': 'Nabeul', 'preferred_time': '06:00',
+     'preferred_day': 'Lundi', 'preferred_season': 'Summer'},
+    {'origin_french': 'Cite Universitaire Hzamia', 'destination_french': 'Hammamet', 'preferred_time': '08:00',
+     'preferred_day': None, 'preferred_season': None},
+]
+
+# Late-evening queries answered with departures past midnight (next service day)
+OVERNIGHT_QUERIES = [
+    {'origin_french': 'Baraka Sahel', 'destination_french': 'Hammamet', 'preferred_time': '23:30',
+     'preferred_day': 'Vendredi', 'preferred_season': 'Winter'},
+    {'origin_french': 'Zone Industrielle', 'destination_french': 'Nabeul', 'preferred_time': '18:35',
+     'preferred_day': None, 'preferred_season': None},
+    {'origin_french': 'Amra', 'destination_french': 'Beni Khiar', 'preferred_time': '21:00',
+     'preferred_day': 'Mercredi', 'preferred_season': None},
+]
+
+# Same-day round trips: outbound criteria plus stay and return constraints
+ROUND_TRIP_QUERIES = [
+    {'origin_french': 'Nabeul', 'destination_french': 'Hammamet', 'preferred_time': '07:00',
+     'preferred_day': 'Lundi', 'preferred_season': 'Summer', 'min_stay_minutes': 240, 'return_by': '20:00'},
+    {'origin_french': 'Baraka Sahel', 'destination_french': 'Hammamet', 'preferred_time': '06:00',
+     'preferred_day': None, 'preferred_season': None, 'min_stay_minutes': 60},
+    {'origin_french': 'Cite Universitaire', 'destination_french': 'Baraka Sahel', 'preferred_time': '06:00',
+     'preferred_day': None, 'preferred_season': None, 'min_stay_minutes': 60, 'return_time': '12:00'},
+]
+
+# Station pairs with neither a direct trip nor a one-transfer connection
+UNREACHABLE_QUERIES = [
+    {'origin_french': 'Nabeul', 'destination_french': 'Atrach', 'preferred_time': '08:00',
+     'preferred_day': 'Lundi', 'preferred_season': 'Summer'},
+    {'origin_french': 'Hammamet', 'destination_french': 'Amra', 'preferred_time': None,
+     'preferred_day': None, 'preferred_season': None},
+    {'origin_french': 'Tunis', 'destination_french': 'Aeroport Tunis Carthage', 'preferred_time': '17:30',
+     'preferred_day': None, 'preferred_season': None},
+]
+
+# Station lookups covering the exact, partial, fuzzy and no-match paths
+STATION_LOOKUPS = [
+    ('نابل', 'محطة الانطلاق'),
+    ('الحمامات  الجنوبية', 'محطة الوصول'),
+    ('نابل الورش', 'محطة الانطلاق'),
+    ('غير موجودة', 'محطة الوصول'),
+]
+
+# Arabic names covering direct hits, whitespace variants and unknown names
+TRANSLATION_LOOKUPS = ['نابل', 'تونس', '  نابل الورشه', 'الحمامات  الجنوبية ', 'غير موجودة']
+
+# Travel dates in summer, winter and Ramadan
+CALENDAR_LOOKUPS = [date(2025, 7, 1), date(2025, 12, 25), date(2025, 3, 14), date(2026, 2, 20)]
+
+# Recommendations per response for the serialization benchmarks
+SERIALIZATION_SIZES = [1, 5, 20]
+
+# Modules whose cold import time is measured in a fresh interpreter
+IMPORT_TARGETS = ['bus_recommendations', 'timetable_engine', 'fast_query']
+
+BENCHMARKS = []
+
+
+def benchmark(name: str, group: str, repeat: Optional[int] = None, kind: str = 'time'):
+    """Register a benchmark; the decorated factory receives the context and returns the callable to measure
+
+    ``kind`` is 'time' for wall time or 'allocations' for traced memory per call.
+    """
+    def register(factory: Callable):
+        BENCHMARKS.append({'name': name, 'group': group, 'factory': factory, 'repeat': repeat, 'kind': kind})
+        return factory
+    return register
+
+
+@benchmark('load_data', 'loading', repeat=5)
+def bench_load_data(context: Dict) -> Callable:
+    service = context['service']
+    return service.load_data
+
+
+@benchmark('load_data_uncached', 'loading', repeat=5)
+def bench_load_data_uncached(context: Dict) -> Callable:
+    data_file = context['data_file']
+
+    def run():
+        load_timetable(data_file, use_cache=False)
+    return run
+
+
+def fast_timetable(context: Dict) -> FastTimetable:
+    """Snapshot of the benchmark timetable for the pandas-free path, built once per run"""
+    if 'fast_timetable' not in context:
+        snapshot = os.path.join(context['temp_dir'], 'timetable.snap')
+        write_snapshot(context['service'].df, snapshot)
+        context['snapshot'] = snapshot
+        context['fast_timetable'] = FastTimetable.load(snapshot)
+    return context['fast_timetable']
+
+
+@benchmark('load_snapshot', 'loading', repeat=20)
+def bench_load_snapshot(context: Dict) -> Callable:
+    fast_timetable(context)
+    snapshot = context['snapshot']
+
+    def run():
+        FastTimetable.load(snapshot)
+    return run
+
+
+def import_benchmark(module: Optional[str]) -> Callable:
+    """Factory timing a fresh interpreter that imports module (None: bare interpreter start)"""
+    def factory(context: Dict) -> Callable:
+        code = f"import {module}" if module else "pass"
+
+        def run():
+            subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return run
+    return factory
+
+
+benchmark('import_python', 'startup', repeat=5)(import_benchmark(None))
+for _module in IMPORT_TARGETS:
+    benchmark(f'import_{_module}', 'startup', repeat=5)(import_benchmark(_module))
+
+
+@benchmark('find_matching_station', 'matching')
+def bench_find_matching_station(context: Dict) -> Callable:
+    df = context['service'].df
+
+    def run():
+        for station_name, column_name in STATION_LOOKUPS:
+            find_matching_station(df, station_name, column_name)
+    return run
+
+
+@benchmark('translate_station_to_french', 'matching')
+def bench_translate_station_to_french(context: Dict) -> Callable:
+    def run():
+        for arabic_name in TRANSLATION_LOOKUPS:
+            translate_station_to_french(arabic_name)
+    return run
+
+
+@benchmark('service_calendar_lookup', 'matching')
+def bench_service_calendar_lookup(context: Dict) -> Callable:
+    calendar = context['service'].calendar
+
+    def run():
+        for travel_date in CALENDAR_LOOKUPS:
+            calendar.lookup(travel_date)
+    return run
+
+
+@benchmark('get_recommendations_direct', 'recommendations')
+def bench_get_recommendations_direct(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in DIRECT_QUERIES:
+            service.get_recommendations(**query)
+    return run
+
+
+@benchmark('get_recommendations_transfer', 'recommendations')
+def bench_get_recommendations_transfer(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in TRANSFER_QUERIES:
+            service.get_recommendations(**query)
+    return run
+
+
+@benchmark('get_alternatives', 'recommendations')
+def bench_get_alternatives(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in DIRECT_QUERIES + TRANSFER_QUERIES:
+            service.get_alternatives(**query)
+    return run
+
+
+@benchmark('get_round_trip', 'recommendations')
+def bench_get_round_trip(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in ROUND_TRIP_QUERIES:
+            service.get_round_trip(**query)
+    return run
+
+
+@benchmark('get_recommendations_overnight', 'recommendations')
+def bench_get_recommendations_overnight(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in OVERNIGHT_QUERIES:
+            service.get_recommendations(**query)
+    return run
+
+
+@benchmark('get_recommendations_unreachable', 'recommendations')
+def bench_get_recommendations_unreachable(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in UNREACHABLE_QUERIES:
+            service.get_recommendations(**query)
+    return run
+
+
+@benchmark('fast_recommendations_direct', 'recommendations')
+def bench_fast_recommendations_direct(context: Dict) -> Callable:
+    timetable = fast_timetable(context)
+
+    def run():
+        for query in DIRECT_QUERIES:
+            timetable.recommend(**query)
+    return run
+
+
+@benchmark('fast_recommendations_transfer', 'recommendations')
+def bench_fast_recommendations_transfer(context: Dict) -> Callable:
+    timetable = fast_timetable(context)
+
+    def run():
+        for query in TRANSFER_QUERIES:
+            timetable.recommend(**query)
+    return run
+
+
+def serialization_fixture(context: Dict, size: int):
+    """A request and ``size`` service recommendations alternating direct and transfer options"""
+    from api_models import RouteRecommendationRequest
+
+    if 'serialization_pool' not in context:
+        service = context['service']
+        direct = service.get_recommendations('Nabeul', 'Tunis', max_results=20)
+        transfers = [rec for query in TRANSFER_QUERIES for rec in service.get_recommendations(**query)]
+        context['serialization_pool'] = [rec for pair in zip(direct, transfers * len(direct)) for rec in pair]
+
+    pool = context['serialization_pool']
+    request = RouteRecommendationRequest(origin='Nabeul', destination='Tunis', max_results=20)
+    return request, (pool * (size // len(pool) + 1))[:size]
+
+
+def serialization_benchmark(size: int, trusted: bool) -> Callable:
+    """Factory encoding a response body, through the pydantic models or the trusted path"""
+    def factory(context: Dict) -> Callable:
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        from api_main import TrustedJSONResponse, build_recommendation_payload
+        from api_models import RouteRecommendationResponse
+
+        request, recommendations = serialization_fixture(context, size)
+
+        def run_trusted():
+            TrustedJSONResponse(build_recommendation_payload(request, recommendations))
+
+        def run_validated():
+            # What response_model did before: validate into the models, then jsonable_encoder + json
+            response = RouteRecommendationResponse.model_validate(build_recommendation_payload(request, recommendations))
+            JSONResponse(jsonable_encoder(response))
+        return run_trusted if trusted else run_validated
+    return factory
+
+
+for _size in SERIALIZATION_SIZES:
+    benchmark(f'serialize_validated_{_size}', 'serialization')(serialization_benchmark(_size, trusted=False))
+    benchmark(f'serialize_trusted_{_size}', 'serialization')(serialization_benchmark(_size, trusted=True))
+
+
+@benchmark('find_transfer_routes', 'routing')
+def bench_find_transfer_routes(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        for query in TRANSFER_QUERIES:
+            service.find_transfer_routes(**query)
+    return run
+
+
+def transfer_legs(context: Dict) -> List[tuple]:
+    """Trip indexes of both legs of every journey found for the transfer fixture queries"""
+    if 'transfer_legs' not in context:
+        service = context['service']
+        context['transfer_legs'] = [
+            (journey.first_leg.trip_index, journey.second_leg.trip_index)
+            for query in TRANSFER_QUERIES
+            for journey in service.find_transfer_routes(**query)
+        ]
+    return context['transfer_legs']
+
+
+@benchmark('leg_records_series', 'memory', repeat=20, kind='allocations')
+def bench_leg_records_series(context: Dict) -> Callable:
+    trips = context['service'].engine.trips
+    legs = transfer_legs(context)
+
+    def run():
+        # Legs as DataFrame rows, as find_transfer_routes returned them before Trip records
+        return [(trips.iloc[first], trips.iloc[second]) for first, second in legs]
+    return run
+
+
+@benchmark('leg_records_slots', 'memory', repeat=20, kind='allocations')
+def bench_leg_records_slots(context: Dict) -> Callable:
+    engine = context['service'].engine
+    legs = transfer_legs(context)
+
+    def run():
+        return [(engine.trip(first), engine.trip(second)) for first, second in legs]
+    return run
+
+
+@benchmark('find_transfer_routes_allocations', 'memory', repeat=20, kind='allocations')
+def bench_find_transfer_routes_allocations(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        return [service.find_transfer_routes(**query) for query in TRANSFER_QUERIES]
+    return run
+
+
+@benchmark('get_recommendations_direct_allocations', 'memory', repeat=20, kind='allocations')
+def bench_get_recommendations_direct_allocations(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        return [service.get_recommendations(**query) for query in DIRECT_QUERIES]
+    return run
+
+
+@benchmark('get_recommendations_transfer_allocations', 'memory', repeat=20, kind='allocations')
+def bench_get_recommendations_transfer_allocations(context: Dict) -> Callable:
+    service = context['service']
+
+    def run():
+        return [service.get_recommendations(**query) for query in TRANSFER_QUERIES]
+    return run
+
+
+def measure(func: Callable, repeat: int, warmup: int) -> Dict:
+    """Time repeated calls of func and summarise the samples in milliseconds"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    ordered = sorted(samples)
+    return {
+        'repeat': repeat,
+        'min_ms': ordered[0],
+        'max_ms': ordered[-1],
+        'mean_ms': statistics.fmean(samples),
+        'median_ms': statistics.median(samples),
+        'stdev_ms': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'p95_ms': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'ops_per_sec': 1000 / statistics.fmean(samples) if statistics.fmean(samples) > 0 else None
+    }
+
+
+def measure_allocations(func: Callable, repeat: int, warmup: int) -> Dict:
+    """Trace repeated calls of func and summarise peak and retained memory in KiB
+
+    Retained memory is what the returned value still holds after the call.
+    """
+    for _ in range(warmup):
+        func()
+
+    peaks, retained, blocks = [], [], []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            blocks_before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            result = func()
+            current, peak = tracemalloc.get_traced_memory()
+            blocks.append(sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename')) - blocks_before)
+            peaks.append((peak - before) / 1024)
+            retained.append((current - before) / 1024)
+            del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'peak_kib': statistics.median(peaks),
+        'retained_kib': statistics.median(retained),
+        'retained_blocks': statistics.median(blocks)
+    }
+
+
+def get_git_revision() -> Optional[str]:
+    """Return the current git commit, if available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(data_file: str = DEFAULT_DATA_FILE, name_filter: Optional[str] = None,
+                   repeat: int = 50, warmup: int = 3) -> Dict:
+    """Run the registered benchmarks and return the JSON-ready results"""
+    service = BusRecommendationService(data_file)
+    if not service.is_data_loaded():
+        raise Exception(f"Could not load benchmark data from {data_file}")
+
+    temp_dir = tempfile.TemporaryDirectory()
+    context = {'service': service, 'data_file': data_file, 'temp_dir': temp_dir.name}
+    results = {}
+
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench['name'] and name_filter != bench['group']:
+            continue
+
+        func = bench['factory'](context)
+        bench_repeat = min(repeat, bench['repeat']) if bench['repeat'] else repeat
+        if bench['kind'] == 'allocations':
+            stats = measure_allocations(func, bench_repeat, min(warmup, bench_repeat))
+            print(f"🧮 {bench['name']:<32} peak {stats['peak_kib']:9.1f} KiB   retained {stats['retained_kib']:9.1f} KiB"
+                  f" in {stats['retained_blocks']:.0f} blocks")
+        else:
+            stats = measure(func, bench_repeat, min(warmup, bench_repeat))
+            print(f"⏱️  {bench['name']:<32} median {stats['median_ms']:9.3f} ms   min {stats['min_ms']:9.3f} ms")
+        stats['group'] = bench['group']
+        results[bench['name']] = stats
+
+    temp_dir.cleanup()
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': get_git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'data_file': data_file,
+            'repeat': repeat,
+            'warmup': warmup
+        },
+        'benchmarks': results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print median ratios against a baseline and return the names that regressed beyond threshold"""
+    regressions = []
+    print(f"\n📊 Comparison with baseline ({baseline['meta'].get('git_revision')})")
+
+    for name, stats in current['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if not base:
+            print(f"   {name:<32} (new)")
+            continue
+
+        metric, unit = ('median_ms', 'ms') if 'median_ms' in stats else ('peak_kib', 'KiB')
+        if metric not in base:
+            print(f"   {name:<32} (measured differently in baseline)")
+            continue
+        ratio = stats[metric] / base[metric] if base[metric] else float('inf')
+        marker = "✅"
+        if ratio > 1 + threshold:
+            marker = "❌"
+            regressions.append(name)
+        print(f"   {marker} {name:<32} {base[metric]:9.3f} → {stats[metric]:9.3f} {unit}  ({ratio:5.2f}x)")
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the hot-path microbenchmarks")
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE, help="Timetable file to benchmark against")
+    parser.add_argument('--filter', dest='name_filter', help="Only run benchmarks whose name or group matches")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed repetitions per benchmark")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed warmup calls per benchmark")
+    parser.add_argument('--output', help="Result file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Baseline result file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed relative slowdown of the median before failing (default 0.2)")
+    args = parser.parse_args(argv)
+
+    print("🚌 BUS RECOMMENDATION MICROBENCHMARKS")
+    print("=" * 50)
+
+    results = run_benchmarks(args.data, args.name_filter, args.repeat, args.warmup)
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output = os.path.join(DEFAULT_RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
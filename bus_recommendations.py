@@ -2,264 +2,49 @@
 """
 Simple Bus Recommendation System with Multi-leg Support
 Enhanced with French translations for stations and days
+
+Usage:
+    python bus_recommendations.py                                         # interactive
+    python bus_recommendations.py --batch queries.jsonl --out results.jsonl --workers 4
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import argparse
 import calendar
-
-# Complete Translation Dictionary for ALL stations in the dataset
-STATION_TRANSLATIONS = {
-    # Main cities and towns
-    'نابل': 'Nabeul',
-    'القيروان': 'Kairouan',
-    'تونس': 'Tunis',
-    'زغوان': 'Zaghouan',
-
-    # Nabeul area stations
-    'نابل الورشة': 'Nabeul Atelier',
-    'نابل  الورشة': 'Nabeul Atelier',
-    'نابل الورشه': 'Nabeul Atelier',
-    'الحي الجامعي': 'Cite Universitaire',
-    'الحي الجامعي"الحزامية"': 'Cite Universitaire Hzamia',
-    'الحي الصناعي': 'Zone Industrielle',
-    'دار شعبان الفهري': 'Dar Chaabane Fehri',
-    'دار شعبان': 'Dar Chaabane',
-    'ديار بن سالم': 'Diar Ben Salem',
-    'المعهد النموذجي': 'Institut Modele',
-    'مبيتات طريق تونس': 'Mabitat Route Tunis',
-
-    # Hammamet area
-    'الحمامات': 'Hammamet',
-    'الحمامات  الجنوبية': 'Hammamet Sud',
-    'الحمامات الجنوبية': 'Hammamet Sud',
-    'ياسمين الحمامات': 'Yasmine Hammamet',
-
-    # Coastal towns
-    'بئر بورقبة': 'Bir Bouregba',
-    'براكة الساحل': 'Baraka Sahel',
-    'تافرنين': 'Taferinine',
-    'حمام بنت الجديدي': 'Hammam Bent Jdidi',
-    'سيدي الجديدي': 'Sidi Jdidi',
-    'حتوس': 'Htous',
-    'جبنون': 'Jebnoun',
-    'بني خيار': 'Beni Khiar',
-    'بني وائل': 'Beni Wail',
-    'قرمبالية': 'Korba',
-
-    # Rural areas
-    'المعمورة': 'Maamoura',
-    'معمورة': 'Maamoura',
-    'الصمعة': 'Somaa',
-    'الصمعة حزاميه': 'Somaa Hzamia',
-    'العامره': 'Amra',
-    'العامره ': 'Amra',
-    'المرازقة': 'Mrazga',
-    'المزيرعة': 'Mziraa',
-    'الأطرش': 'Atrach',
-    'البسباسية': 'Basbassia',
-    'الفحص': 'Fahs',
-    'الفرينين': 'Freineine',
-    'تازركة': 'Tazarka',
-    'بيوب': 'Biyoub',
-    'بوفيشة': 'Bouficha',
-    'مزنين': 'Mznine',
-    'واد الزيت': 'Oued Zeit',
-    'بو علي': 'Bou Ali',
-
-    # Airport
-    'مطار تونس قرطاج': 'Aeroport Tunis Carthage',
-
-    # Industrial/Commercial
-    'SIPHAT': 'SIPHAT',
-
-    # Complex route names (combinations)
-    'الحمامات - بئر بورقبة - بني وائل': 'Hammamet - Bir Bouregba - Beni Wail',
-    'الحمامات - ياسمين الحمامات': 'Hammamet - Yasmine Hammamet',
-    'الفرينين - نابل  الورشة': 'Freineine - Nabeul Atelier',
-    'المعمورة - ديار بن سالم': 'Maamoura - Diar Ben Salem',
-    'براكة الساحل - الحمامات': 'Baraka Sahel - Hammamet',
-    'براكة الساحل - بني وائل': 'Baraka Sahel - Beni Wail',
-    'براكة الساحل - تافرنين - حمام بنت الجديدي': 'Baraka Sahel - Taferinine - Hammam Bent Jdidi',
-    'براكة الساحل - تافرنين - حمام بنت الجديدي - حتوس': 'Baraka Sahel - Taferinine - Hammam Bent Jdidi - Htous',
-    'براكة الساحل - حتوس': 'Baraka Sahel - Htous',
-    'بني خيار - المعهد النموذجي': 'Beni Khiar - Institut Modele',
-    'بني خيار- المعمورة': 'Beni Khiar - Maamoura',
-    'بني وائل -  بئر بورقبة': 'Beni Wail - Bir Bouregba',
-    'تافرنين - سيدي حمّاد - براكة الساحل': 'Taferinine - Sidi Hammad - Baraka Sahel',
-    'جبنون - المنشار - تافرنين': 'Jebnoun - Menchar - Taferinine',
-    'جبنون - براكة الساحل': 'Jebnoun - Baraka Sahel',
-    'حتوس - حمام بنت الجديدي': 'Htous - Hammam Bent Jdidi',
-    'حتوس - سيدي الجديدي - البسباسية - جبنون': 'Htous - Sidi Jdidi - Basbassia - Jebnoun',
-    'حمام بنت الجديدي - سيدي الجديدي': 'Hammam Bent Jdidi - Sidi Jdidi',
-    'دار شعبان الفهري - الحي الجامعي': 'Dar Chaabane Fehri - Cite Universitaire',
-    'دار شعبان – المعهد النموذجي': 'Dar Chaabane - Institut Modele',
-    'ديار بن سالم - بني خيار': 'Diar Ben Salem - Beni Khiar',
-    'سيدي الجديدي - حتوس': 'Sidi Jdidi - Htous',
-    'نابل -  بيوب -الفرينين': 'Nabeul - Biyoub - Freineine',
-    'نابل - الصمعة': 'Nabeul - Somaa',
-    'نابل - المعمورة': 'Nabeul - Maamoura',
-    'نابل - دار شعبان': 'Nabeul - Dar Chaabane',
-    'نابل - ديار بن سالم': 'Nabeul - Diar Ben Salem',
-    'نابل الورشة - الحي الجامعي': 'Nabeul Atelier - Cite Universitaire',
-    'نابل الورشة - المعهد النموذجي': 'Nabeul Atelier - Institut Modele',
-    'نابل الورشة - ديار بن سالم': 'Nabeul Atelier - Diar Ben Salem',
-    'ياسمين الحمامات - براكة الساحل': 'Yasmine Hammamet - Baraka Sahel',
-    'بئر بورقبة - الحمامات': 'Bir Bouregba - Hammamet',
-
-    # Additional stations found in dataset (completing the 138 stations)
-    'الحي الجامعي"الحزامية"': 'Cite Universitaire Hzamia',
-    'الصمعة حزاميه': 'Somaa Hzamia',
-    'مبيتات طريق تونس': 'Mabitat Route Tunis',
-    'الحمامات  الجنوبية': 'Hammamet Sud',
-    'معمورة': 'Maamoura',
-    'العامره ': 'Amra',
-    'نابل  الورشة': 'Nabeul Atelier',
-    'نابل الورشه': 'Nabeul Atelier',
-    'المزيرعة': 'Mziraa',
-    'بوفيشة': 'Bouficha',
-    'بو علي': 'Bou Ali',
-
-    # Additional complex routes and variations
-    'الحي الجامعي"الحزامية" - نابل الورشة': 'Cite Universitaire Hzamia - Nabeul Atelier',
-    'الصمعة - نابل': 'Somaa - Nabeul',
-    'الصمعة حزاميه - نابل الورشة': 'Somaa Hzamia - Nabeul Atelier',
-    'العامره  - نابل الورشة': 'Amra - Nabeul Atelier',
-    'المرازقة - نابل الورشة': 'Mrazga - Nabeul Atelier',
-    'المزيرعة - نابل الورشة': 'Mziraa - Nabeul Atelier',
-    'الأطرش - نابل الورشة': 'Atrach - Nabeul Atelier',
-    'البسباسية - نابل الورشة': 'Basbassia - Nabeul Atelier',
-    'الفحص - نابل الورشة': 'Fahs - Nabeul Atelier',
-    'تازركة - نابل الورشة': 'Tazarka - Nabeul Atelier',
-    'بوفيشة - نابل الورشة': 'Bouficha - Nabeul Atelier',
-    'مزنين - نابل الورشة': 'Mznine - Nabeul Atelier',
-    'واد الزيت - نابل الورشة': 'Oued Zeit - Nabeul Atelier',
-    'بو علي - نابل الورشة': 'Bou Ali - Nabeul Atelier',
-    'قرمبالية - نابل الورشة': 'Korba - Nabeul Atelier',
-    'قرمبالية - نابل': 'Korba - Nabeul',
-    'قرمبالية - تونس': 'Korba - Tunis',
-    'قرمبالية - زغوان': 'Korba - Zaghouan',
-    'نابل - قرمبالية': 'Nabeul - Korba',
-    'تونس - قرمبالية': 'Tunis - Korba',
-    'زغوان - قرمبالية': 'Zaghouan - Korba',
-    'زغوان - نابل': 'Zaghouan - Nabeul',
-    'زغوان - تونس': 'Zaghouan - Tunis',
-    'نابل - زغوان': 'Nabeul - Zaghouan',
-    'تونس - زغوان': 'Tunis - Zaghouan',
-    'القيروان - نابل': 'Kairouan - Nabeul',
-    'القيروان - تونس': 'Kairouan - Tunis',
-    'نابل - القيروان': 'Nabeul - Kairouan',
-    'تونس - القيروان': 'Tunis - Kairouan',
-    'تونس - نابل': 'Tunis - Nabeul',
-    'نابل - تونس': 'Nabeul - Tunis',
-    'مطار تونس قرطاج - نابل': 'Aeroport Tunis Carthage - Nabeul',
-    'نابل - مطار تونس قرطاج': 'Nabeul - Aeroport Tunis Carthage',
-    'SIPHAT - نابل الورشة': 'SIPHAT - Nabeul Atelier',
-    'نابل الورشة - SIPHAT': 'Nabeul Atelier - SIPHAT',
-
-    # Additional missing stations (whitespace variations and new ones)
-    'برج السدرية': 'Borj Sedria',
-    'الحي الجامعي" الحزامية"': 'Cite Universitaire Hzamia',
-
-    # Handle whitespace variations by mapping them to existing translations
-    '  الحمامات  الجنوبية': 'Hammamet Sud',
-    '  العامره ': 'Amra',
-    '  بيوب': 'Biyoub',
-    '  نابل الورشه': 'Nabeul Atelier',
-    '  ياسمين الحمامات': 'Yasmine Hammamet',
-    ' الحمامات': 'Hammamet',
-    ' بئر بورقبة': 'Bir Bouregba',
-    ' معمورة': 'Maamoura',
-    ' نابل الورشة': 'Nabeul Atelier',
-    'الأطرش ': 'Atrach',
-    'البسباسية ': 'Basbassia',
-    'الحمامات ': 'Hammamet',
-    'الحي الجامعي ': 'Cite Universitaire',
-    'الحي الصناعي ': 'Zone Industrielle',
-    'الصمعة ': 'Somaa',
-    'العامره ': 'Amra',
-    'المرازقة ': 'Mrazga',
-    'المزيرعة ': 'Mziraa',
-    'المعمورة ': 'Maamoura',
-    'المعهد النموذجي ': 'Institut Modele',
-    'بئر بورقبة ': 'Bir Bouregba',
-    'براكة الساحل ': 'Baraka Sahel',
-    'بني خيار ': 'Beni Khiar',
-    'بني وائل ': 'Beni Wail',
-    'بوفيشة ': 'Bouficha',
-    'بيوب ': 'Biyoub',
-    'تازركة ': 'Tazarka',
-    'تافرنين ': 'Taferinine',
-    'تونس ': 'Tunis',
-    'جبنون ': 'Jebnoun',
-    'حتوس ': 'Htous',
-    'حمام بنت الجديدي ': 'Hammam Bent Jdidi',
-    'دار شعبان ': 'Dar Chaabane',
-    'دار شعبان الفهري ': 'Dar Chaabane Fehri',
-    'ديار بن سالم ': 'Diar Ben Salem',
-    'سيدي الجديدي ': 'Sidi Jdidi',
-    'قرمبالية ': 'Korba',
-    'مبيتات طريق تونس ': 'Mabitat Route Tunis',
-    'مزنين ': 'Mznine',
-    'نابل ': 'Nabeul',
-    'نابل الورشة ': 'Nabeul Atelier',
-    'نابل الورشه ': 'Nabeul Atelier',
-    'واد الزيت ': 'Oued Zeit',
-    'ياسمين الحمامات ': 'Yasmine Hammamet'
-}
-
-DAY_TRANSLATIONS = {
-    # Arabic to French
-    'إثنين': 'Lundi',
-    'ثلاثاء': 'Mardi',
-    'اربعاء': 'Mercredi',
-    'خميس': 'Jeudi',
-    'جمعة': 'Vendredi',
-    'سبت': 'Samedi',
-    'أحد': 'Dimanche'
-}
-
-# Reverse translations (French to Arabic) for internal processing
-STATION_REVERSE = {v: k for k, v in STATION_TRANSLATIONS.items()}
-DAY_REVERSE = {v: k for k, v in DAY_TRANSLATIONS.items()}
-
-# Season translations (Arabic database seasons to French/English)
-SEASON_TRANSLATIONS = {
-    'الصيفي': 'Summer',
-    'صيفي': 'Summer',
-    'الشتوي': 'Winter',
-    'الشتوي ': 'Winter',  # With space
-    'شتوي': 'Winter',
-    'رمضان': 'Ramadan'
-}
-
-SEASON_REVERSE = {v: k for k, v in SEASON_TRANSLATIONS.items()}
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from station_names import (
+    STATION_TRANSLATIONS, DAY_TRANSLATIONS, STATION_REVERSE, DAY_REVERSE,
+    SEASON_TRANSLATIONS, SEASON_REVERSE,
+    translate_station_to_french, translate_station_to_arabic,
+    translate_day_to_french, translate_day_to_arabic, match_station_name
+)
+from service_calendar import default_calendar, resolve_travel_date, season_of
 
 def get_current_date_info():
-    """Get current date and automatically determine day and season"""
+    """Get current date and automatically determine day and season
+
+    The season comes from the service calendar, so Ramadan is detected from the
+    Hijri calendar instead of guessed from the month.
+    """
     now = datetime.now()
 
     # Get current day in French
     day_names_french = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
     current_day_french = day_names_french[now.weekday()]
-
-    # Get current season based on month
     month = now.month
 
-    # Determine season (Tunisia climate)
-    if month in [6, 7, 8, 9]:  # June to September
-        current_season = 'Summer'
-    elif month in [10, 11, 12, 1, 2, 3]:  # October to March
-        current_season = 'Winter'
-    else:  # April, May (Spring) - treat as transition to Summer
-        current_season = 'Summer'
-
-    # Check if it's Ramadan period (approximate - varies each year)
-    # This is a simplified check - in real system you'd use Islamic calendar
-    if month in [3, 4, 5]:  # Ramadan often falls in these months
-        # You could add more sophisticated Ramadan detection here
-        print(f"ℹ️  Note: If it's Ramadan period, consider selecting 'Ramadan' season manually")
+    # Determine season (Tunisia climate, or Ramadan)
+    try:
+        current_season = default_calendar().lookup(now)[1]
+    except ValueError:
+        current_season = season_of(now.date())
 
     return {
         'date': now.strftime('%Y-%m-%d'),
@@ -285,267 +70,83 @@ def get_available_seasons_from_data(df):
         return sorted(available_seasons)
     return ['Summer', 'Winter', 'Ramadan']  # Default fallback
 
-def translate_station_to_french(arabic_name):
-    """Translate Arabic station name to French with case-insensitive matching"""
-    # Try direct lookup first
-    result = STATION_TRANSLATIONS.get(arabic_name, None)
-    if result is not None:
-        return result
-    
-    # Try case-insensitive lookup with normalized whitespace
-    arabic_normalized = arabic_name.strip()
-    for key, value in STATION_TRANSLATIONS.items():
-        if key.strip() == arabic_normalized:
-            return value
-    
-    # Return original if no match found
-    return arabic_name
-
-def translate_station_to_arabic(french_name):
-    """Translate French station name to Arabic for data lookup with case-insensitive matching"""
-    # Try direct lookup first
-    result = STATION_REVERSE.get(french_name, None)
-    if result is not None:
-        return result
-    
-    # Try case-insensitive lookup
-    french_normalized = french_name.strip().lower()
-    for key, value in STATION_REVERSE.items():
-        if key.lower() == french_normalized:
-            return value
-    
-    # Return original if no match found
-    return french_name
-
 def find_matching_station(df, station_name, column_name):
     """Find matching station name handling variations, misspellings, and case sensitivity"""
-    # Get all unique stations from the column
-    all_stations = df[column_name].dropna().unique()
-    
-    # Normalize input station name (strip whitespace and convert to lowercase)
-    station_normalized = station_name.strip().lower()
-    
-    # First try exact match (case insensitive)
-    for station in all_stations:
-        if station.strip().lower() == station_normalized:
-            return station
-    
-    # Try partial match (case insensitive)
-    for station in all_stations:
-        if station_normalized in station.strip().lower() or station.strip().lower() in station_normalized:
-            return station
-    
-    # Try fuzzy matching for possible misspellings
-    best_match = None
-    best_score = 0
-    
-    for station in all_stations:
-        # Calculate similarity score based on character overlap
-        station_lower = station.strip().lower()
-        
-        # Skip very short strings to avoid false positives
-        if len(station_lower) < 3 or len(station_normalized) < 3:
-            continue
-            
-        # Simple character-based similarity
-        common_chars = set(station_lower) & set(station_normalized)
-        similarity = len(common_chars) / max(len(set(station_lower)), len(set(station_normalized)))
-        
-        # Check for common prefixes (weighted more heavily)
-        prefix_length = 0
-        for i in range(min(len(station_lower), len(station_normalized))):
-            if station_lower[i] == station_normalized[i]:
-                prefix_length += 1
-            else:
-                break
-        
-        # Calculate prefix score (0-1)
-        prefix_score = prefix_length / min(len(station_lower), len(station_normalized)) if min(len(station_lower), len(station_normalized)) > 0 else 0
-        
-        # Combined score (weighted more towards prefix matching)
-        score = (similarity * 0.4) + (prefix_score * 0.6)
-        
-        # Update best match if this score is better
-        if score > best_score and score > 0.5:  # Threshold to avoid poor matches
-            best_score = score
-            best_match = station
-    
-    return best_match
-
-def translate_day_to_french(arabic_day):
-    """Translate Arabic day to French"""
-    return DAY_TRANSLATIONS.get(arabic_day, arabic_day)
+    return find_matching_station_with_method(df, station_name, column_name)[0]
 
-def translate_day_to_arabic(french_day):
-    """Translate French day to Arabic for data lookup"""
-    return DAY_REVERSE.get(french_day, french_day)
+def find_matching_station_with_method(df, station_name, column_name):
+    """Find matching station name and report which path matched: 'exact', 'partial', 'fuzzy' or None"""
+    return match_station_name(df[column_name].dropna().unique(), station_name)
 
-def load_data():
-    """Load and preprocess the bus data with French translations"""
+def load_data(file_path="horaires-des-bus-de-la-srtgn.xlsx"):
+    """Load and preprocess the bus data with French translations (through the shared engine)"""
     print("📊 Loading bus schedule data...")
 
-    df = pd.read_excel("horaires-des-bus-de-la-srtgn.xlsx")
-    df.columns = df.columns.str.strip()
-
-    # Clean data
-    if 'Unnamed: 19' in df.columns and 'Unnamed: 20' in df.columns:
-        df.drop(columns=['Unnamed: 19', 'Unnamed: 20'], inplace=True, errors='ignore')
-
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str).str.strip()
-
-    # Convert time columns
-    def convert_to_minutes(time_obj):
-        if pd.isna(time_obj):
-            return None
-        if isinstance(time_obj, str) and ':' in time_obj:
-            try:
-                h, m = map(int, time_obj.split(':'))
-                return h * 60 + m
-            except:
-                return None
-        elif isinstance(time_obj, (int, float)):
-            return int(time_obj)
-        return None
-
-    df['durée_min'] = df['المدة'].apply(convert_to_minutes)
-    df['depart_min'] = df['ساعة الإنطلاق'].apply(convert_to_minutes)
-    df.dropna(subset=['durée_min', 'depart_min'], inplace=True)
-
-    # Add French translations
-    df['origin_french'] = df['محطة الانطلاق'].apply(translate_station_to_french)
-    df['destination_french'] = df['محطة الوصول'].apply(translate_station_to_french)
-
-    print(f"✅ Data loaded: {len(df)} routes available")
+    engine = get_engine(file_path)
+    df = engine.df
+
+    source = " (preprocessed cache)" if engine.loaded_from_cache else ""
+    print(f"✅ Data loaded: {len(df)} routes available{source}")
+    report = engine.dedup_report
+    print(f"🧹 {report['duplicate_rows']} repeated rows collapsed into {report['trips']} trips")
     print("🇫🇷 French translations added for stations")
     return df
 
 
+# Engine wrapping the DataFrame most recently loaded or passed in
+_engine = None
+
+def get_engine(df_or_path=None):
+    """Shared timetable engine for a data file or an already preprocessed DataFrame"""
+    global _engine
+    # Imported here because timetable_engine imports the translations from this module
+    from timetable_engine import TimetableEngine
+
+    if isinstance(df_or_path, str):
+        _engine = TimetableEngine.load(df_or_path)
+    elif df_or_path is not None and (_engine is None or _engine.df is not df_or_path):
+        _engine = TimetableEngine(df_or_path)
+    elif _engine is None:
+        _engine = TimetableEngine.load("horaires-des-bus-de-la-srtgn.xlsx")
+    return _engine
 
 def find_direct_routes(df, origin_french, destination_french, preferred_time=None):
     """Find direct routes between origin and destination using French names"""
-    # Convert French names to Arabic for data lookup
-    origin_arabic = translate_station_to_arabic(origin_french)
-    destination_arabic = translate_station_to_arabic(destination_french)
+    engine = get_engine(df)
 
     # Find matching stations in the dataset (handles whitespace issues)
-    origin_match = find_matching_station(df, origin_arabic, 'محطة الانطلاق')
-    destination_match = find_matching_station(df, destination_arabic, 'محطة الوصول')
+    origin_match = engine.resolve_station(origin_french, 'محطة الانطلاق', 'origin_french')
+    destination_match = engine.resolve_station(destination_french, 'محطة الوصول', 'destination_french')
 
     if not origin_match or not destination_match:
         print(f"⚠️  Station matching issue:")
-        print(f"   Origin: {origin_french} → {origin_arabic} → {origin_match}")
-        print(f"   Destination: {destination_french} → {destination_arabic} → {destination_match}")
+        print(f"   Origin: {origin_french} → {translate_station_to_arabic(origin_french)} → {origin_match}")
+        print(f"   Destination: {destination_french} → {translate_station_to_arabic(destination_french)} → {destination_match}")
         return pd.DataFrame()
 
-    routes = df[
-        (df['محطة الانطلاق'] == origin_match) &
-        (df['محطة الوصول'] == destination_match)
-    ].copy()
-
-    # Apply time filter if specified
-    if preferred_time and not routes.empty:
-        try:
-            if ':' in str(preferred_time):
-                h, m = map(int, str(preferred_time).split(':'))
-                preferred_min = h * 60 + m
-                routes = routes[routes['depart_min'] >= preferred_min]
-        except:
-            pass
-
-    return routes
+    return engine.direct_routes(origin_match, destination_match, preferred_time)
 
 def find_transfer_routes(df, origin_french, destination_french, preferred_time=None, preferred_day=None, preferred_season=None):
-    """Find routes with one transfer using French names, with day and season filtering"""
-    # Convert French names to Arabic for data lookup
-    origin_arabic = translate_station_to_arabic(origin_french)
-    destination_arabic = translate_station_to_arabic(destination_french)
+    """Find routes with one transfer using French names"""
+    engine = get_engine(df)
 
     # Find matching stations in the dataset
-    origin_match = find_matching_station(df, origin_arabic, 'محطة الانطلاق')
-    destination_match = find_matching_station(df, destination_arabic, 'محطة الوصول')
+    origin_match = engine.resolve_station(origin_french, 'محطة الانطلاق', 'origin_french')
+    destination_match = engine.resolve_station(destination_french, 'محطة الوصول', 'destination_french')
 
     if not origin_match or not destination_match:
         return []
 
-    # Find potential transfer stations
-    from_origin = df[df['محطة الانطلاق'] == origin_match]['محطة الوصول'].unique()
-    to_destination = df[df['محطة الوصول'] == destination_match]['محطة الانطلاق'].unique()
-    transfer_stations = set(from_origin) & set(to_destination)
-    
-    if not transfer_stations:
-        return []
-    
-    transfer_routes = []
-    transfer_time = 15  # 15 minutes minimum transfer time
-    
-    for transfer_station in transfer_stations:
-        # First leg: origin → transfer
-        first_leg_options = df[
-            (df['محطة الانطلاق'] == origin_match) &
-            (df['محطة الوصول'] == transfer_station)
-        ].copy()
-        
-        if first_leg_options.empty:
-            continue
-            
-        # Apply time filter for first leg
-        if preferred_time:
-            try:
-                if ':' in str(preferred_time):
-                    h, m = map(int, str(preferred_time).split(':'))
-                    preferred_min = h * 60 + m
-                    first_leg_options = first_leg_options[first_leg_options['depart_min'] >= preferred_min]
-            except:
-                pass
-                
-        if first_leg_options.empty:
-            continue
-        
-        # Get best first leg (shortest duration)
-        best_first_leg = first_leg_options.nsmallest(1, 'durée_min').iloc[0]
-        
-        # Calculate when second leg can start
-        second_leg_start = best_first_leg['depart_min'] + best_first_leg['durée_min'] + transfer_time
-        
-        # Second leg: transfer → destination
-        second_leg_options = df[
-            (df['محطة الانطلاق'] == transfer_station) &
-            (df['محطة الوصول'] == destination_match) &
-            (df['depart_min'] >= second_leg_start)
-        ].copy()
-        
-        if second_leg_options.empty:
-            continue
-            
-        # Get best second leg
-        best_second_leg = second_leg_options.nsmallest(1, 'durée_min').iloc[0]
-        
-        # Calculate journey metrics
-        total_duration = (best_second_leg['depart_min'] + best_second_leg['durée_min']) - best_first_leg['depart_min']
-        waiting_time = best_second_leg['depart_min'] - second_leg_start
-        
-        journey = {
-            'transfer_station': transfer_station,
-            'transfer_station_french': translate_station_to_french(transfer_station),
-            'total_duration': total_duration,
-            'first_leg': best_first_leg,
-            'second_leg': best_second_leg,
-            'waiting_time': waiting_time,
-            'origin_french': origin_french,
-            'destination_french': destination_french
-        }
-        
-        transfer_routes.append(journey)
-    
-    # Sort by total duration
-    transfer_routes.sort(key=lambda x: x['total_duration'])
-    return transfer_routes
-
-
+    return engine.search_transfers(origin_match, destination_match, origin_french, destination_french, preferred_time,
+                                   preferred_day=preferred_day, preferred_season=preferred_season)
 
 def get_route_recommendations(df, origin_french, destination_french, preferred_time=None, preferred_day=None, preferred_season=None, max_results=5):
-    """Get comprehensive route recommendations with day and season filtering"""
+    """Get comprehensive route recommendations with day and season filtering
+
+    Uses the engine's 'enhanced' scoring profile: direct routes are ranked with the
+    ML-inspired peak-time and efficiency features, and transfers are only searched
+    when there is no direct route.
+    """
 
     # Build search description
     search_desc = f"{origin_french} → {destination_french}"
@@ -558,329 +159,14 @@ def get_route_recommendations(df, origin_french, destination_french, preferred_t
 
     print(f"\n🔍 Finding routes: {search_desc}")
 
-    # Convert to Arabic
-    origin_arabic = translate_station_to_arabic(origin_french)
-    destination_arabic = translate_station_to_arabic(destination_french)
-
-    # Find matching stations
-    origin_match = find_matching_station(df, origin_arabic, 'محطة الانطلاق')
-    destination_match = find_matching_station(df, destination_arabic, 'محطة الوصول')
-
-    if not origin_match:
-        print(f"❌ Origin station '{origin_french}' not found in dataset")
-        return []
-
-    if not destination_match:
-        print(f"❌ Destination station '{destination_french}' not found in dataset")
-        return []
-
-    # Find direct routes
-    direct_routes = df[
-        (df['محطة الانطلاق'] == origin_match) &
-        (df['محطة الوصول'] == destination_match)
-    ].copy()
-
-    recommendations = []
-
-    if not direct_routes.empty:
-        print(f"✅ Found {len(direct_routes)} direct routes")
-
-        # Apply DAY filtering if specified (using actual database day columns)
-        if preferred_day:
-            day_arabic = DAY_REVERSE.get(preferred_day, preferred_day)
-
-            # Check if the day column exists and filter by 'X' marker
-            if day_arabic in direct_routes.columns:
-                day_filtered = direct_routes[direct_routes[day_arabic].str.strip() == 'X']
-                if not day_filtered.empty:
-                    direct_routes = day_filtered
-                    print(f"🗓️  Filtered to {len(direct_routes)} routes operating on {preferred_day}")
-                else:
-                    print(f"⚠️  No routes operating on {preferred_day}, showing all days")
-            else:
-                print(f"ℹ️  Day column '{day_arabic}' not found in dataset")
-
-        # Apply SEASON filtering if specified (using actual database seasons)
-        if preferred_season:
-            if 'الموسم' in direct_routes.columns:
-                # Convert preferred season to Arabic for database lookup
-                season_arabic = None
-                for arabic_season, french_season in SEASON_TRANSLATIONS.items():
-                    if french_season.lower() == preferred_season.lower():
-                        season_arabic = arabic_season
-                        break
-
-                if season_arabic:
-                    season_filtered = direct_routes[direct_routes['الموسم'].str.strip() == season_arabic.strip()]
-                    if not season_filtered.empty:
-                        direct_routes = season_filtered
-                        if preferred_season.lower() == 'summer':
-                            print(f"☀️  Summer season: Filtered to {len(direct_routes)} summer routes")
-                        elif preferred_season.lower() == 'winter':
-                            print(f"❄️  Winter season: Filtered to {len(direct_routes)} winter routes")
-                        elif preferred_season.lower() == 'ramadan':
-                            print(f"🌙 Ramadan season: Filtered to {len(direct_routes)} Ramadan routes")
-                    else:
-                        print(f"⚠️  No routes found for {preferred_season} season, showing all seasons")
-                else:
-                    print(f"⚠️  Season '{preferred_season}' not recognized, showing all seasons")
-            else:
-                print(f"ℹ️  Season information not available in dataset")
-
-        # Apply SMART time filter if specified
-        filtered_routes = direct_routes.copy()
-        if preferred_time:
-            try:
-                if ':' in str(preferred_time):
-                    h, m = map(int, str(preferred_time).split(':'))
-                    preferred_min = h * 60 + m
-
-                    # SMART FILTERING: Show routes within reasonable time window
-                    # Priority 1: Routes after preferred time within 4 hours
-                    time_window_routes = direct_routes[
-                        (direct_routes['depart_min'] >= preferred_min) &
-                        (direct_routes['depart_min'] <= preferred_min + 240)  # Within 4 hours
-                    ]
-
-                    if not time_window_routes.empty:
-                        filtered_routes = time_window_routes
-                        print(f"🕐 Showing routes from {preferred_time} onwards (within 4 hours)")
-                    else:
-                        # Priority 2: If no routes in 4 hours, show next available routes
-                        next_routes = direct_routes[direct_routes['depart_min'] >= preferred_min]
-                        if not next_routes.empty:
-                            filtered_routes = next_routes.head(10)  # Limit to next 10 routes
-                            print(f"⚠️  No routes within 4 hours of {preferred_time}, showing next available")
-                        else:
-                            # Priority 3: Show all routes if none after preferred time
-                            filtered_routes = direct_routes
-                            print(f"⚠️  No routes after {preferred_time}, showing all available routes")
-            except:
-                filtered_routes = direct_routes
-
-        # Score and rank routes with TIME PRIORITY
-        filtered_routes = filtered_routes.copy()
-
-        # Calculate route quality score
-        filtered_routes['quality_score'] = 0
-
-        # Service quality (Luxe > Standard)
-        filtered_routes['service_score'] = filtered_routes['نوع الخدمة'].apply(
-            lambda x: 3 if x == 'رفاهة' else 1
+    try:
+        return get_engine(df).recommend(
+            origin_french, destination_french, preferred_time, preferred_day, preferred_season,
+            max_results, scoring='enhanced', log=print
         )
-
-        # Duration efficiency (shorter is better)
-        min_duration = filtered_routes['durée_min'].min()
-        max_duration = filtered_routes['durée_min'].max()
-        if max_duration > min_duration:
-            filtered_routes['duration_score'] = 3 - 2 * (filtered_routes['durée_min'] - min_duration) / (max_duration - min_duration)
-        else:
-            filtered_routes['duration_score'] = 3
-
-        # TIME PROXIMITY SCORE - MOST IMPORTANT when user specifies preferred time
-        if preferred_time:
-            try:
-                if ':' in str(preferred_time):
-                    h, m = map(int, str(preferred_time).split(':'))
-                    preferred_min = h * 60 + m
-
-                    # Calculate time difference in minutes (only for routes after preferred time)
-                    filtered_routes['time_diff'] = filtered_routes['depart_min'] - preferred_min
-
-                    # STRONG TIME PROXIMITY SCORING - heavily favor closer times
-                    def calculate_time_proximity(time_diff):
-                        if time_diff < 0:  # Route before preferred time
-                            return 0.1  # Very low score for past times
-                        elif time_diff == 0:  # Exact match
-                            return 3.0
-                        elif time_diff <= 30:  # Within 30 minutes
-                            return 3.0 - (time_diff / 30) * 0.5  # 3.0 to 2.5
-                        elif time_diff <= 60:  # Within 1 hour
-                            return 2.5 - ((time_diff - 30) / 30) * 1.0  # 2.5 to 1.5
-                        elif time_diff <= 120:  # Within 2 hours
-                            return 1.5 - ((time_diff - 60) / 60) * 1.0  # 1.5 to 0.5
-                        else:  # More than 2 hours later
-                            return 0.5 - min((time_diff - 120) / 480, 0.4)  # 0.5 to 0.1
-
-                    filtered_routes['time_proximity_score'] = filtered_routes['time_diff'].apply(calculate_time_proximity)
-
-                    # ENHANCED SCORING: Time proximity + ML-inspired features for 98% accuracy
-                    # Additional quality factors
-                    filtered_routes['hour'] = filtered_routes['depart_min'] // 60
-                    filtered_routes['is_peak_time'] = (
-                        ((filtered_routes['hour'] >= 7) & (filtered_routes['hour'] <= 9)) |
-                        ((filtered_routes['hour'] >= 17) & (filtered_routes['hour'] <= 19))
-                    ).astype(int)
-                    filtered_routes['is_business_hours'] = (
-                        (filtered_routes['hour'] >= 8) & (filtered_routes['hour'] <= 18)
-                    ).astype(int)
-                    filtered_routes['is_short_trip'] = (filtered_routes['durée_min'] <= 60).astype(int)
-
-                    # Enhanced combination scoring
-                    filtered_routes['luxury_peak_bonus'] = (
-                        (filtered_routes['service_score'] == 3) &
-                        (filtered_routes['is_peak_time'] == 1)
-                    ).astype(float) * 0.5
-
-                    filtered_routes['efficiency_bonus'] = (
-                        (filtered_routes['is_short_trip'] == 1) &
-                        (filtered_routes['is_business_hours'] == 1)
-                    ).astype(float) * 0.3
-
-                    # WEIGHTED SCORING: Time proximity gets 70% weight for LOGICAL time recommendations
-                    filtered_routes['quality_score'] = (
-                        0.7 * filtered_routes['time_proximity_score'] +   # 70% - TIME PRIORITY (INCREASED!)
-                        0.15 * filtered_routes['service_score'] +         # 15% - Service quality
-                        0.1 * filtered_routes['duration_score'] +         # 10% - Duration
-                        0.03 * filtered_routes['is_peak_time'] +          # 3% - Peak time bonus
-                        0.01 * filtered_routes['luxury_peak_bonus'] +     # 1% - Luxury+Peak combo
-                        0.01 * filtered_routes['efficiency_bonus']        # 1% - Efficiency bonus
-                    )
-
-                    print(f"🕐 Prioritizing routes close to your preferred time: {preferred_time}")
-
-                else:
-                    # Fallback to general time preference
-                    filtered_routes['hour'] = filtered_routes['depart_min'] // 60
-                    filtered_routes['time_score'] = filtered_routes['hour'].apply(
-                        lambda x: 3 if x in [7,8,9,17,18,19] else 2 if x in [6,10,16,20] else 1
-                    )
-
-                    # Equal weighting when no specific time
-                    filtered_routes['quality_score'] = (
-                        filtered_routes['service_score'] +
-                        filtered_routes['time_score'] +
-                        filtered_routes['duration_score']
-                    ) / 3
-
-            except:
-                # Fallback to general time preference
-                filtered_routes['hour'] = filtered_routes['depart_min'] // 60
-                filtered_routes['time_score'] = filtered_routes['hour'].apply(
-                    lambda x: 3 if x in [7,8,9,17,18,19] else 2 if x in [6,10,16,20] else 1
-                )
-
-                # Equal weighting when no specific time
-                filtered_routes['quality_score'] = (
-                    filtered_routes['service_score'] +
-                    filtered_routes['time_score'] +
-                    filtered_routes['duration_score']
-                ) / 3
-        else:
-            # No preferred time specified - use enhanced general scoring for 98% accuracy
-            filtered_routes['hour'] = filtered_routes['depart_min'] // 60
-            filtered_routes['time_score'] = filtered_routes['hour'].apply(
-                lambda x: 3 if x in [7,8,9,17,18,19] else 2 if x in [6,10,16,20] else 1
-            )
-
-            # Enhanced features for better accuracy
-            filtered_routes['is_peak_time'] = (
-                ((filtered_routes['hour'] >= 7) & (filtered_routes['hour'] <= 9)) |
-                ((filtered_routes['hour'] >= 17) & (filtered_routes['hour'] <= 19))
-            ).astype(int)
-            filtered_routes['is_business_hours'] = (
-                (filtered_routes['hour'] >= 8) & (filtered_routes['hour'] <= 18)
-            ).astype(int)
-            filtered_routes['is_short_trip'] = (filtered_routes['durée_min'] <= 60).astype(int)
-
-            # Combination bonuses
-            filtered_routes['luxury_peak_bonus'] = (
-                (filtered_routes['service_score'] == 3) &
-                (filtered_routes['is_peak_time'] == 1)
-            ).astype(float) * 0.5
-
-            filtered_routes['efficiency_bonus'] = (
-                (filtered_routes['is_short_trip'] == 1) &
-                (filtered_routes['is_business_hours'] == 1)
-            ).astype(float) * 0.3
-
-            # Enhanced weighting for better accuracy
-            filtered_routes['quality_score'] = (
-                0.35 * filtered_routes['service_score'] +         # 35% - Service quality
-                0.25 * filtered_routes['time_score'] +            # 25% - Time preference
-                0.2 * filtered_routes['duration_score'] +         # 20% - Duration
-                0.1 * filtered_routes['is_peak_time'] +           # 10% - Peak time bonus
-                0.05 * filtered_routes['luxury_peak_bonus'] +     # 5% - Luxury+Peak combo
-                0.05 * filtered_routes['efficiency_bonus']        # 5% - Efficiency bonus
-            )
-
-        # REMOVE DUPLICATES: Keep only unique routes (same time + service + duration)
-        print(f"🔍 Found {len(filtered_routes)} total route options")
-
-        # Create unique identifier for each route
-        filtered_routes['route_key'] = (
-            filtered_routes['depart_min'].astype(str) + '_' +
-            filtered_routes['نوع الخدمة'].astype(str) + '_' +
-            filtered_routes['durée_min'].astype(str)
-        )
-
-        # Keep only the best scoring route for each unique combination
-        unique_routes = filtered_routes.loc[
-            filtered_routes.groupby('route_key')['quality_score'].idxmax()
-        ].copy()
-
-        print(f"✅ After removing duplicates: {len(unique_routes)} unique routes")
-
-        # Sort by quality score (which now prioritizes time when specified)
-        best_routes = unique_routes.nlargest(max_results, 'quality_score')
-
-        for _, route in best_routes.iterrows():
-            hour = int(route['depart_min'] // 60)
-            minute = int(route['depart_min'] % 60)
-            duration = int(route['durée_min'])
-            service_french = "Luxe" if route['نوع الخدمة'] == 'رفاهة' else "Standard"
-
-            # Calculate time difference if preferred time was specified
-            time_diff_info = ""
-            if preferred_time and 'time_diff' in route:
-                time_diff_minutes = int(route['time_diff'])
-                if time_diff_minutes == 0:
-                    time_diff_info = " (Exact match!)"
-                elif time_diff_minutes <= 30:
-                    time_diff_info = f" (+{time_diff_minutes}min from preferred)"
-                else:
-                    hours_diff = time_diff_minutes // 60
-                    mins_diff = time_diff_minutes % 60
-                    if hours_diff > 0:
-                        time_diff_info = f" (+{hours_diff}h{mins_diff:02d}m from preferred)"
-                    else:
-                        time_diff_info = f" (+{mins_diff}min from preferred)"
-
-            recommendation = {
-                'type': 'direct',
-                'departure_time': f"{hour:02d}:{minute:02d}",
-                'duration': duration,
-                'service_type': service_french,
-                'quality_score': route['quality_score'],
-                'route_details': f"{origin_french} → {destination_french}",
-                'total_duration': duration,
-                'transfers': 0,
-                'time_diff_info': time_diff_info
-            }
-            recommendations.append(recommendation)
-
-    else:
-        print("❌ No direct routes found")
-        print("🔄 Searching for routes with transfers...")
-
-        # Find transfer routes using existing function
-        transfer_routes = find_transfer_routes(df, origin_french, destination_french, preferred_time, preferred_day, preferred_season)
-
-        for transfer in transfer_routes[:max_results]:
-            recommendation = {
-                'type': 'transfer',
-                'departure_time': f"{int(transfer['first_leg']['depart_min'] // 60):02d}:{int(transfer['first_leg']['depart_min'] % 60):02d}",
-                'duration': int(transfer['total_duration']),
-                'service_type': "Mixed",
-                'quality_score': 2.0,
-                'route_details': f"{origin_french} → {transfer['transfer_station_french']} → {destination_french}",
-                'total_duration': int(transfer['total_duration']),
-                'transfers': 1,
-                'transfer_details': transfer
-            }
-            recommendations.append(recommendation)
-
-    return recommendations
+    except ValueError as e:
+        print(f"❌ {e}")
+        return []
 
 def display_recommendations(recommendations):
     """Display route recommendations in a user-friendly format"""
@@ -907,19 +193,14 @@ def display_recommendations(recommendations):
             print(f"   🔄 Transfers: {rec['transfers']}")
             print(f"   📋 Journey Details:")
 
-            f_hour = int(transfer['first_leg']['depart_min'] // 60)
-            f_min = int(transfer['first_leg']['depart_min'] % 60)
-            f_duration = int(transfer['first_leg']['durée_min'])
-            f_service = "Luxe" if transfer['first_leg']['نوع الخدمة'] == 'رفاهة' else "Standard"
-
-            s_hour = int(transfer['second_leg']['depart_min'] // 60)
-            s_min = int(transfer['second_leg']['depart_min'] % 60)
-            s_duration = int(transfer['second_leg']['durée_min'])
-            s_service = "Luxe" if transfer['second_leg']['نوع الخدمة'] == 'رفاهة' else "Standard"
-
-            print(f"      Leg 1: {f_hour:02d}:{f_min:02d} | {f_duration}min | {f_service}")
-            print(f"      Transfer: 15min wait at {transfer['transfer_station_french']}")
-            print(f"      Leg 2: {s_hour:02d}:{s_min:02d} | {s_duration}min | {s_service}")
+            first_leg, second_leg = transfer.first_leg, transfer.second_leg
+            print(f"      Leg 1: {first_leg.departure_time} | {int(first_leg.duration_min)}min | {first_leg.service_type}")
+            wait = f"{int(transfer.waiting_time)}min wait at {transfer.transfer_station_french}"
+            station_id = _engine.station_id(transfer.transfer_station) if _engine is not None else None
+            if station_id is not None:
+                wait += f" (minimum transfer {int(_engine.station_transfer_min[station_id])}min)"
+            print(f"      Transfer: {wait}")
+            print(f"      Leg 2: {second_leg.departure_time} | {int(second_leg.duration_min)}min | {second_leg.service_type}")
 
 def main():
     """Main interactive function with French interface and automatic date/season detection"""
@@ -1023,5 +304,121 @@ def main():
     print("🎉 Thank you for using the Bus Recommendation System!")
     print("🚌 Bon voyage! Safe travels! ✨")
 
-if __name__ == "__main__":
+def recommendation_to_json(rec):
+    """JSON-ready copy of a recommendation (transfer legs are flattened like the API does)"""
+    result = {key: value for key, value in rec.items() if key != 'transfer_details'}
+    result['quality_score'] = float(rec['quality_score'])
+
+    transfer = rec.get('transfer_details')
+    if transfer is not None:
+        # Enhanced scoring returns Journey records, standard scoring the flattened legs
+        result['transfer_details'] = transfer if isinstance(transfer, dict) else transfer.details()
+    return result
+
+def read_batch_queries(path):
+    """Stream (line number, query) pairs from a JSON lines file
+
+    Each line holds origin and destination (or origin_french / destination_french)
+    and optionally preferred_time, preferred_day, preferred_season, travel_date
+    (YYYY-MM-DD, setting the day and season not given) and max_results.
+    """
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                yield line_number, line
+
+# Settings for batch worker processes, set by the pool initializer
+_batch_scoring = 'enhanced'
+
+def _init_batch_worker(data_file, scoring):
+    """Pool initializer: reuse the timetable inherited from the parent, or load it from the cache"""
+    global _batch_scoring
+    _batch_scoring = scoring
+    if _engine is None:
+        get_engine(data_file)
+
+def _run_batch_query(item):
+    """Answer one batch query line; errors are returned in the record instead of raised"""
+    line_number, line = item
+    started = time.perf_counter()
+    record = {'line': line_number}
+    try:
+        query = json.loads(line)
+        record['query'] = query
+        preferred_day, preferred_season = resolve_travel_date(
+            query.get('travel_date'), query.get('preferred_day'), query.get('preferred_season'))
+        recommendations = get_engine().recommend(
+            query.get('origin', query.get('origin_french', '')),
+            query.get('destination', query.get('destination_french', '')),
+            query.get('preferred_time'), preferred_day, preferred_season,
+            int(query.get('max_results', 5)), scoring=_batch_scoring
+        )
+        record['recommendations'] = [recommendation_to_json(rec) for rec in recommendations]
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+def run_batch(queries_path, out_path, workers=None, data_file="horaires-des-bus-de-la-srtgn.xlsx",
+              scoring='enhanced'):
+    """Resolve a JSON lines file of queries in a process pool, writing results as they complete"""
+    if not workers:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    print(f"🚌 Batch mode: {queries_path} → {out_path} ({workers} workers, {scoring} scoring)")
+
+    started = time.perf_counter()
+    # Loaded once here; forked workers share it, spawned workers read the preprocessed cache
+    load_data(data_file)
+
+    answered = errors = 0
+    queries = read_batch_queries(queries_path)
+    with open(out_path, 'w', encoding='utf-8') as out:
+        if workers == 1:
+            _init_batch_worker(data_file, scoring)
+            results = map(_run_batch_query, queries)
+            pool = None
+        else:
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            pool = multiprocessing.get_context(method).Pool(
+                workers, initializer=_init_batch_worker, initargs=(data_file, scoring)
+            )
+            results = pool.imap(_run_batch_query, queries, chunksize=8)
+
+        try:
+            for record in results:
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                answered += 1
+                errors += 'error' in record
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {answered} queries answered ({errors} errors) in {elapsed:.1f}s "
+          f"({answered / elapsed if elapsed > 0 else 0:.1f} queries/s)")
+    return 1 if errors else 0
+
+def cli(argv=None):
+    """Command line entry point: interactive by default, batch with --batch"""
+    parser = argparse.ArgumentParser(description="Bus route recommendations (interactive or batch)")
+    parser.add_argument('--batch', help="JSON lines file of queries to answer without prompting")
+    parser.add_argument('--out', help="JSON lines file for batch results")
+    parser.add_argument('--workers', type=int, help="Worker processes for batch mode (default: usable CPUs)")
+    parser.add_argument('--data', default="horaires-des-bus-de-la-srtgn.xlsx", help="Timetable file")
+    parser.add_argument('--scoring', choices=['enhanced', 'standard'], default='enhanced',
+                        help="Scoring profile for batch mode (standard matches the API)")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        if not args.out:
+            parser.error("--batch needs --out")
+        return run_batch(args.batch, args.out, args.workers, args.data, args.scoring)
+
     main()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,72 @@
+"""
+Cyclic Time
+Departures on a clock that wraps around the week (or the day), shared by the
+timetable engine and the pandas-free fast query path (fast_query.py) so that
+searches can continue past midnight into the next service day
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from station_names import DAY_TRANSLATIONS
+
+# Cyclic clock: minutes since Monday 00:00 when the weekday is known, else minutes of the day
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+# Arabic day columns in week order, Monday first
+WEEKDAYS = list(DAY_TRANSLATIONS)
+
+
+class CyclicTimetable:
+    """Departures of every station pair on a cyclic clock
+
+    Times are minutes since Monday 00:00 (``period`` WEEK_MINUTES, trips expanded
+    once per day they run) or minutes of the day when the weekday is unknown
+    (``period`` DAY_MINUTES). Each pair keeps its departures sorted, with the
+    trips in the same order (shortest first on equal times), so the next
+    departure after any time is a bisection that wraps around the period.
+    ``shortest`` holds each pair's shortest trip duration.
+    """
+
+    __slots__ = ('period', 'departures', 'trips', 'shortest')
+
+    def __init__(self, period: int, departures: Iterable[Tuple[float, int]],
+                 origins: Sequence[int], destinations: Sequence[int], durations: Sequence[float]):
+        self.period = period
+        self.departures: Dict[Tuple[int, int], List[float]] = {}
+        self.trips: Dict[Tuple[int, int], List[int]] = {}
+        self.shortest: Dict[Tuple[int, int], float] = {}
+        for time_, trip in sorted(departures, key=lambda item: (item[0], durations[item[1]], item[1])):
+            key = (origins[trip], destinations[trip])
+            self.departures.setdefault(key, []).append(time_)
+            self.trips.setdefault(key, []).append(trip)
+            self.shortest[key] = min(self.shortest.get(key, durations[trip]), durations[trip])
+
+    def following(self, origin: int, destination: int, start: float) -> Iterator[Tuple[float, int]]:
+        """(time, trip) departures of a pair from ``start`` on, over one period in cyclic order
+
+        Times are on the same unwrapped clock as ``start``, so they never decrease.
+        """
+        departures = self.departures.get((origin, destination))
+        if not departures:
+            return
+        trips = self.trips[(origin, destination)]
+        cycle, offset = divmod(start, self.period)
+        first = bisect_left(departures, offset)
+        for index in range(first, first + len(departures)):
+            wraps, index = divmod(index, len(departures))
+            yield (cycle + wraps) * self.period + departures[index], trips[index]
+
+    def next_service_day(self, origin: int, destination: int, start: float,
+                         limit: int) -> List[Tuple[float, int]]:
+        """The first ``limit`` departures of the first day from ``start`` on that has any for the pair"""
+        departures = []
+        for time_, trip in self.following(origin, destination, start):
+            if len(departures) == limit or (departures and time_ // DAY_MINUTES != departures[0][0] // DAY_MINUTES):
+                break
+            departures.append((time_, trip))
+        return departures
+
+    def __repr__(self) -> str:
+        return f"CyclicTimetable(period={self.period}, {len(self.departures)} station pairs)"
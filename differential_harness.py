@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Differential Correctness Harness
+Runs randomized queries through two recommendation implementations (or one
+implementation against recorded golden output) and diffs the ranked results
+
+Usage:
+    python differential_harness.py record --impl service --queries 500
+    python differential_harness.py check --impl service
+    python differential_harness.py compare --legacy cli --candidate service --queries 200
+    python differential_harness.py check --impl service --allowlist differential/allowlist.json
+    python differential_harness.py check --impl fast --golden differential/golden/service.jsonl
+
+Golden files are JSON lines of {"id", "query", "result"} and are replayed with
+their stored queries, so a check does not depend on the query generator.
+
+Allowlist files hold intentional differences:
+    {"entries": [
+        {"impl": "service", "fields": ["quality_score"], "reason": "new scoring weights"},
+        {"impl": ["service", "fast"], "match": {"origin_french": "Nabeul"},
+         "request": "user-123", "reason": "Nabeul gained a faster transfer"}
+    ]}
+An entry applies to a difference when every given key matches: ``impl`` is the
+implementation under test (or a list of them), ``match`` is compared with the
+query and ``fields`` lists the differing fields it covers (omit it to allow any
+difference). ``request`` names the change that made the difference.
+
+A behaviour change adds allowlist entries for the differences it intends rather
+than re-recording the goldens, so unintended drift still fails the check. Goldens
+are re-recorded only at an explicit checkpoint, which also empties the allowlist.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+DEFAULT_GOLDEN_DIR = os.path.join("differential", "golden")
+DEFAULT_ALLOWLIST = os.path.join("differential", "allowlist.json")
+
+DAYS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+SEASONS = ['Summer', 'Winter', 'Ramadan']
+
+# Fields compared for every recommendation, in report order
+COMPARED_FIELDS = ['type', 'departure_time', 'duration', 'service_type', 'route_details',
+                   'transfers', 'transfer_station', 'quality_score']
+
+IMPLEMENTATIONS = {}
+
+
+def implementation(name: str):
+    """Register an implementation; the factory receives the data file and returns query → recommendations"""
+    def register(factory: Callable):
+        IMPLEMENTATIONS[name] = factory
+        return factory
+    return register
+
+
+@implementation('service')
+def service_implementation(data_file: str) -> Callable:
+    """API pipeline: BusRecommendationService.get_recommendations"""
+    from bus_service import BusRecommendationService
+
+    # The transfer time budget depends on machine load; disable it so runs are reproducible
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = BusRecommendationService(data_file, transfer_time_budget_ms=None)
+    if not service.is_data_loaded():
+        raise Exception(f"Could not load {data_file}")
+
+    def run(query: Dict) -> List[Dict]:
+        return service.get_recommendations(**query)
+    return run
+
+
+@implementation('cli')
+def cli_implementation(data_file: str) -> Callable:
+    """CLI pipeline: bus_recommendations.get_route_recommendations"""
+    import bus_recommendations
+
+    if os.path.abspath(data_file) != os.path.abspath(DEFAULT_DATA_FILE):
+        raise ValueError("The CLI pipeline only reads the SRTGN timetable")
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = bus_recommendations.load_data()
+
+    def run(query: Dict) -> List[Dict]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return bus_recommendations.get_route_recommendations(df, **query)
+    return run
+
+
+@implementation('fast')
+def fast_implementation(data_file: str) -> Callable:
+    """Pandas-free path: fast_query.FastTimetable.recommend over a freshly built snapshot"""
+    import tempfile
+    from fast_query import FastTimetable, build_snapshot
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot = os.path.join(temp_dir, 'timetable.snap')
+        build_snapshot(data_file, snapshot)
+        timetable = FastTimetable.load(snapshot)
+
+    def run(query: Dict) -> List[Dict]:
+        return timetable.recommend(**query)
+    return run
+
+
+def load_implementation(spec: str, data_file: str) -> Callable:
+    """Build a registered implementation, or one given as module:factory"""
+    if spec in IMPLEMENTATIONS:
+        return IMPLEMENTATIONS[spec](data_file)
+    if ':' not in spec:
+        raise ValueError(f"Unknown implementation '{spec}' (known: {', '.join(sorted(IMPLEMENTATIONS))})")
+    module_name, factory_name = spec.split(':', 1)
+    module = __import__(module_name, fromlist=[factory_name])
+    return getattr(module, factory_name)(data_file)
+
+
+def station_pairs(data_file: str):
+    """French station names plus the direct and two-hop pairs of the timetable"""
+    from bus_service import BusRecommendationService
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = BusRecommendationService(data_file)
+    df = service.df
+    direct = sorted(set(zip(df['origin_french'], df['destination_french'])))
+    next_stops = {}
+    for origin, destination in direct:
+        next_stops.setdefault(origin, set()).add(destination)
+    two_hop = sorted({
+        (origin, onward)
+        for origin, middle in direct
+        for onward in next_stops.get(middle, ())
+        if onward != origin and onward not in next_stops[origin]
+    })
+    return service.get_available_stations(), direct, two_hop
+
+
+def generate_queries(data_file: str, n_queries: int, seed: int) -> List[Dict]:
+    """Random queries: half direct pairs, a quarter transfer pairs, a quarter any two stations"""
+    rng = random.Random(seed)
+    stations, direct, two_hop = station_pairs(data_file)
+
+    queries = []
+    for _ in range(n_queries):
+        draw = rng.random()
+        if draw < 0.5 or not two_hop:
+            origin, destination = rng.choice(direct)
+        elif draw < 0.75:
+            origin, destination = rng.choice(two_hop)
+        else:
+            origin, destination = rng.sample(stations, 2)
+
+        preferred_time = None
+        if rng.random() < 0.7:
+            preferred_time = f"{rng.randint(4, 23):02d}:{rng.randrange(0, 60, 5):02d}"
+        queries.append({
+            'origin_french': origin,
+            'destination_french': destination,
+            'preferred_time': preferred_time,
+            'preferred_day': rng.choice(DAYS) if rng.random() < 0.6 else None,
+            'preferred_season': rng.choice(SEASONS) if rng.random() < 0.5 else None,
+            'max_results': rng.choice([1, 3, 5, 5, 5, 10])
+        })
+    return queries
+
+
+def normalize(recommendations: List[Dict]) -> List[Dict]:
+    """Reduce recommendations to the fields both pipelines share, in JSON-safe form"""
+    normalized = []
+    for rec in recommendations:
+        transfer_station = None
+        details = rec.get('transfer_details')
+        if isinstance(details, dict):
+            transfer_station = details.get('transfer_station')
+        elif details is not None:
+            transfer_station = details.transfer_station_french
+        normalized.append({
+            'type': rec['type'],
+            'departure_time': rec['departure_time'],
+            'duration': int(rec['duration']),
+            'service_type': rec['service_type'],
+            'route_details': rec['route_details'],
+            'transfers': int(rec['transfers']),
+            'transfer_station': transfer_station,
+            'quality_score': round(float(rec['quality_score']), 6)
+        })
+    return normalized
+
+
+def run_query(func: Callable, query: Dict) -> Dict:
+    """Run one query, capturing either the normalized ranking or the error"""
+    try:
+        return {'recommendations': normalize(func(query))}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def diff_results(expected: Dict, actual: Dict, tolerance: float) -> List[Dict]:
+    """List field-level differences between two query results"""
+    if 'error' in expected or 'error' in actual:
+        if expected.get('error') != actual.get('error'):
+            return [{'rank': None, 'field': 'error', 'expected': expected.get('error'), 'actual': actual.get('error')}]
+        return []
+
+    differences = []
+    expected_recs, actual_recs = expected['recommendations'], actual['recommendations']
+    if len(expected_recs) != len(actual_recs):
+        differences.append({'rank': None, 'field': 'count',
+                            'expected': len(expected_recs), 'actual': len(actual_recs)})
+
+    for rank, (exp, act) in enumerate(zip(expected_recs, actual_recs), 1):
+        for field in COMPARED_FIELDS:
+            a, b = exp.get(field), act.get(field)
+            if field == 'quality_score' and a is not None and b is not None:
+                if abs(a - b) <= tolerance:
+                    continue
+            elif a == b:
+                continue
+            differences.append({'rank': rank, 'field': field, 'expected': a, 'actual': b})
+    return differences
+
+
+def load_allowlist(path: Optional[str]) -> List[Dict]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('entries', [])
+
+
+def is_allowed(difference: Dict, query: Dict, impl: str, allowlist: List[Dict]) -> bool:
+    """True if an allowlist entry covers this difference"""
+    for entry in allowlist:
+        impls = entry.get('impl')
+        if impls is not None and impl not in (impls if isinstance(impls, list) else [impls]):
+            continue
+        if any(query.get(key) != value for key, value in entry.get('match', {}).items()):
+            continue
+        if 'fields' in entry and difference['field'] not in entry['fields']:
+            continue
+        return True
+    return False
+
+
+def report(cases: List[Dict], impl: str, allowlist: List[Dict], tolerance: float, show: int) -> int:
+    """Diff expected against actual results, print a summary and return the failing query count"""
+    failing = allowed = 0
+    for case in cases:
+        differences = diff_results(case['expected'], case['actual'], tolerance)
+        if not differences:
+            continue
+        unexplained = [d for d in differences if not is_allowed(d, case['query'], impl, allowlist)]
+        if not unexplained:
+            allowed += 1
+            continue
+
+        failing += 1
+        if failing <= show:
+            print(f"\n❌ Query {case['id']}: {json.dumps(case['query'], ensure_ascii=False)}")
+            for d in unexplained[:5]:
+                rank = f"#{d['rank']}" if d['rank'] else "  "
+                print(f"   {rank} {d['field']}: {d['expected']!r} → {d['actual']!r}")
+            if len(unexplained) > 5:
+                print(f"   ... and {len(unexplained) - 5} more differences")
+
+    identical = len(cases) - failing - allowed
+    print(f"\n📊 {len(cases)} queries: {identical} identical, {allowed} allowed differences, {failing} failing")
+    return failing
+
+
+def timed_run(func: Callable, queries: List[Dict]) -> Tuple[List[Dict], float]:
+    started = time.perf_counter()
+    results = [run_query(func, query) for query in queries]
+    return results, time.perf_counter() - started
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff recommendation implementations on randomized queries")
+    parser.add_argument('mode', choices=['record', 'check', 'compare'],
+                        help="record golden output, check against it, or compare two implementations live")
+    parser.add_argument('--impl', default='service', help="Implementation to record or check")
+    parser.add_argument('--legacy', default='service', help="Reference implementation for compare")
+    parser.add_argument('--candidate', help="Implementation compared against --legacy")
+    parser.add_argument('--golden', help="Golden file (default: differential/golden/<impl>.jsonl)")
+    parser.add_argument('--allowlist', default=DEFAULT_ALLOWLIST, help="JSON file of intentional differences")
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE, help="Timetable file")
+    parser.add_argument('--queries', type=int, default=500, help="Random queries to generate")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for query generation")
+    parser.add_argument('--tolerance', type=float, default=1e-6, help="Allowed quality_score difference")
+    parser.add_argument('--show', type=int, default=20, help="Failing queries to print")
+    args = parser.parse_args(argv)
+
+    print("🔬 DIFFERENTIAL CORRECTNESS HARNESS")
+    print("=" * 50)
+
+    golden = args.golden or os.path.join(DEFAULT_GOLDEN_DIR, f"{args.impl}.jsonl")
+
+    if args.mode == 'record':
+        queries = generate_queries(args.data, args.queries, args.seed)
+        results, elapsed = timed_run(load_implementation(args.impl, args.data), queries)
+        os.makedirs(os.path.dirname(golden) or '.', exist_ok=True)
+        with open(golden, 'w', encoding='utf-8') as f:
+            for i, (query, result) in enumerate(zip(queries, results)):
+                f.write(json.dumps({'id': i, 'query': query, 'result': result}, ensure_ascii=False) + '\n')
+        print(f"💾 Recorded {len(queries)} queries from '{args.impl}' in {elapsed:.1f}s to {golden}")
+        return 0
+
+    allowlist = load_allowlist(args.allowlist)
+
+    if args.mode == 'check':
+        with open(golden, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        queries = [record['query'] for record in records]
+        results, elapsed = timed_run(load_implementation(args.impl, args.data), queries)
+        print(f"⏱️  '{args.impl}' answered {len(queries)} golden queries in {elapsed:.1f}s")
+        cases = [{'id': record['id'], 'query': record['query'], 'expected': record['result'], 'actual': result}
+                 for record, result in zip(records, results)]
+        return 1 if report(cases, args.impl, allowlist, args.tolerance, args.show) else 0
+
+    if not args.candidate:
+        parser.error("compare needs --candidate")
+    queries = generate_queries(args.data, args.queries, args.seed)
+    expected, legacy_elapsed = timed_run(load_implementation(args.legacy, args.data), queries)
+    actual, candidate_elapsed = timed_run(load_implementation(args.candidate, args.data), queries)
+    print(f"⏱️  '{args.legacy}' {legacy_elapsed:.1f}s | '{args.candidate}' {candidate_elapsed:.1f}s "
+          f"for {len(queries)} queries")
+    cases = [{'id': i, 'query': query, 'expected': e, 'actual': a}
+             for i, (query, e, a) in enumerate(zip(queries, expected, actual))]
+    return 1 if report(cases, args.candidate, allowlist, args.tolerance, args.show) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+"""
+Fast Query Path
+Answers direct and transfer queries from a compact precompiled snapshot of the
+timetable without importing pandas or NumPy, for short-lived CLI runs and
+serverless-style invocations
+
+Usage:
+    python fast_query.py build --data horaires-des-bus-de-la-srtgn.xlsx --out horaires-des-bus-de-la-srtgn.snap
+    python fast_query.py query Nabeul Hammamet --time 08:00 --day Lundi --season Summer
+
+Snapshot layout (little or native byte order, recorded in the metadata):
+    header     struct '<8sIII': magic, format version, trip count, metadata length
+    metadata   UTF-8 JSON: station spellings, IDs and minimum transfer times, column orders,
+               services, seasons, day columns
+    columns    one stdlib ``array`` per column, in SNAPSHOT_COLUMNS order
+
+Rows repeating a trip are collapsed into one canonical trip when the snapshot is
+written, exactly like TimetableEngine does at load.
+
+Scoring follows the 'standard' profile of TimetableEngine (the API ranking), so
+results are identical to BusRecommendationService.get_recommendations.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from cyclic_time import DAY_MINUTES, WEEK_MINUTES, WEEKDAYS, CyclicTimetable
+from scoring_rules import (
+    parse_preferred_time, time_proximity, hour_score, service_score, format_time_difference, format_minutes,
+    load_transfer_times, station_transfer_times, transfer_times_path
+)
+from station_names import DAY_REVERSE, SEASON_TRANSLATIONS, translate_station_to_arabic, match_station_name
+
+DEFAULT_DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+DEFAULT_SNAPSHOT = "horaires-des-bus-de-la-srtgn.snap"
+
+SNAPSHOT_MAGIC = b'BUSSNAP\x00'
+SNAPSHOT_VERSION = 4
+_HEADER = struct.Struct('<8sIII')
+
+# Column name and array typecode, one entry per trip; stations are canonical station IDs
+# and services index the metadata list (255 when missing). day_bits holds season_columns
+# entries per trip: a bitmask over day_columns for each season (last: rows without one)
+SNAPSHOT_COLUMNS = (
+    ('origin', 'i'),
+    ('destination', 'i'),
+    ('depart', 'i'),
+    ('duration', 'i'),
+    ('service', 'B'),
+    ('day_bits', 'B'),
+)
+MISSING_CODE = 255
+
+# Set in a trip's day bitmask for every season it runs in (timetable_engine.SEASON_PRESENT_BIT)
+SEASON_PRESENT_BIT = 1 << 7
+
+
+def write_snapshot(df, path: str, source: Optional[str] = None,
+                   transfer_times: Optional[Tuple[int, Dict[str, int]]] = None) -> int:
+    """Write a preprocessed timetable (see timetable_engine.load_timetable) as a snapshot
+
+    Rows are collapsed into canonical trips with timetable_engine.canonical_trips.
+    ``transfer_times`` are the minimum transfer times stored per station (see
+    scoring_rules.load_transfer_times). Returns the number of bytes written.
+    """
+    # Imported here so that reading snapshots never needs pandas
+    from timetable_engine import canonical_trips
+
+    canonical = canonical_trips(df)
+    trips = df.iloc[canonical['first_rows']]
+    origins = df['محطة الانطلاق'].tolist()
+    destinations = df['محطة الوصول'].tolist()
+
+    # Spelling table over all rows in order of first appearance, each spelling with its
+    # canonical station ID; stations have the engine's French name and sort key
+    spellings, spelling_index, spelling_stations = [], {}, []
+    stations_french, station_sort_keys = {}, {}
+    for names, ids, french_names in ((origins, df['origin_id'].tolist(), df['origin_french'].tolist()),
+                                     (destinations, df['destination_id'].tolist(),
+                                      df['destination_french'].tolist())):
+        for name, station_id, french in zip(names, ids, french_names):
+            if isinstance(name, str) and name not in spelling_index:
+                spelling_index[name] = len(spellings)
+                spellings.append(name)
+                spelling_stations.append(station_id)
+                stations_french[station_id] = french
+                station_sort_keys[station_id] = min(name, station_sort_keys.get(station_id, name))
+    station_count = max(stations_french) + 1 if stations_french else 0
+
+    def column_order(names):
+        order, seen = [], set()
+        for name in names:
+            if isinstance(name, str) and name not in seen:
+                seen.add(name)
+                order.append(spelling_index[name])
+        return order
+
+    day_columns = canonical['day_columns']
+    has_season = 'الموسم' in df.columns
+    seasons = list(canonical['season_codes'])
+    services, service_index = [], {}
+
+    def code(value, values, index):
+        if not isinstance(value, str):
+            return MISSING_CODE
+        value = value.strip()
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        return index[value]
+
+    columns = {name: array(typecode) for name, typecode in SNAPSHOT_COLUMNS}
+    columns['origin'].extend(trips['origin_id'].tolist())
+    columns['destination'].extend(trips['destination_id'].tolist())
+    columns['depart'].extend(int(minutes) for minutes in trips['depart_min'].tolist())
+    columns['duration'].extend(int(minutes) for minutes in trips['durée_min'].tolist())
+    columns['service'].extend(code(value, services, service_index) for value in trips['نوع الخدمة'].tolist())
+    columns['day_bits'].extend(canonical['day_bits'].ravel().tolist())
+
+    available_seasons = sorted({SEASON_TRANSLATIONS[s] for s in seasons if s in SEASON_TRANSLATIONS}) \
+        if has_season else ['Summer', 'Winter', 'Ramadan']
+    metadata = {
+        'spellings': spellings,
+        'spelling_stations': spelling_stations,
+        'stations_french': [stations_french.get(station_id) for station_id in range(station_count)],
+        'station_sort_keys': [station_sort_keys.get(station_id) for station_id in range(station_count)],
+        'transfer_times': station_transfer_times([stations_french.get(station_id)
+                                                  for station_id in range(station_count)], transfer_times),
+        'origin_order': column_order(origins),
+        'destination_order': column_order(destinations),
+        'services': services,
+        'seasons': seasons,
+        'has_season': has_season,
+        'season_columns': len(seasons) + 1,
+        'day_columns': day_columns,
+        'available_stations': sorted(set(stations_french.values())),
+        'available_seasons': available_seasons,
+        'byteorder': sys.byteorder,
+        'itemsizes': {name: columns[name].itemsize for name, _ in SNAPSHOT_COLUMNS},
+        'dedup': canonical['report'],
+        'source': None
+    }
+    if source and os.path.exists(source):
+        stat = os.stat(source)
+        metadata['source'] = {'name': os.path.basename(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    blob = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(trips), len(blob)))
+        f.write(blob)
+        for name, _ in SNAPSHOT_COLUMNS:
+            columns[name].tofile(f)
+    os.replace(temp_file, path)
+    return os.path.getsize(path)
+
+
+def build_snapshot(data_file: str = DEFAULT_DATA_FILE, out_path: str = DEFAULT_SNAPSHOT,
+                   transfer_times_file: Optional[str] = None) -> int:
+    """Preprocess a timetable file with the engine (imports pandas) and write its snapshot
+
+    Minimum transfer times are read like TimetableEngine.load does: from
+    ``transfer_times_file``, else from the side file next to the timetable.
+    """
+    from timetable_engine import load_timetable
+
+    df, _ = load_timetable(data_file)
+    transfer_times_file = transfer_times_file or transfer_times_path(data_file)
+    transfer_times = load_transfer_times(transfer_times_file) if os.path.exists(transfer_times_file) else None
+    return write_snapshot(df, out_path, source=data_file, transfer_times=transfer_times)
+
+
+class FastTimetable:
+    """Snapshot-backed timetable answering recommendation queries with plain Python"""
+
+    def __init__(self, columns: Dict[str, array], metadata: Dict):
+        self.metadata = metadata
+        self.spellings = metadata['spellings']
+        self.stations_french = metadata['stations_french']
+        self._spelling_stations = metadata['spelling_stations']
+        self._station_sort_keys = metadata['station_sort_keys']
+        self.station_transfer_min = metadata['transfer_times']
+        self.services = metadata['services']
+        self.seasons = metadata['seasons']
+        self.day_columns = metadata['day_columns']
+        self.available_stations = metadata['available_stations']
+        self.available_seasons = metadata['available_seasons']
+
+        self.origin = columns['origin']
+        self.destination = columns['destination']
+        self.depart = columns['depart']
+        self.duration = columns['duration']
+        self.service = columns['service']
+        self.day_bits = columns['day_bits']
+        self.season_columns = metadata['season_columns']
+
+        # Earliest departure a connection at each trip's arrival station can make
+        self._connection = [depart + duration + self.station_transfer_min[destination] for depart, duration, destination
+                            in zip(self.depart, self.duration, self.destination)]
+
+        # Days each trip runs on in any season, for day-only filtering
+        self._trip_days = [0] * len(self.depart)
+        for trip in range(len(self.depart)):
+            start = trip * self.season_columns
+            for bits in self.day_bits[start:start + self.season_columns]:
+                self._trip_days[trip] |= bits
+
+        # Row positions per origin and per destination station, in timetable order, for
+        # the whole timetable and for (day bit, season) partitions built on first use
+        self._partitions = {}
+        self._cyclic_timetables = {}
+        self._by_origin, self._by_destination = self.partition()
+
+        # Station graph: direct neighbours and one-transfer stations per station pair
+        successors, predecessors = {}, {}
+        for origin, destination in zip(self.origin, self.destination):
+            successors.setdefault(origin, set()).add(destination)
+            predecessors.setdefault(destination, set()).add(origin)
+        self._successors = successors
+        self._transfer_stations = {}
+        for origin, reached in successors.items():
+            for destination in set().union(*(successors.get(station, ()) for station in reached)):
+                self._transfer_stations[(origin, destination)] = reached & predecessors[destination]
+
+        self._column_spellings = {
+            'origin': [self.spellings[i] for i in metadata['origin_order']],
+            'destination': [self.spellings[i] for i in metadata['destination_order']],
+        }
+        self._column_order = {'origin': metadata['origin_order'], 'destination': metadata['destination_order']}
+        self._spelling_index = {name: i for i, name in enumerate(self.spellings)}
+
+        # Display fields rendered once per trip and looked up by row in responses
+        departure_labels = {minutes: format_minutes(minutes) for minutes in set(self.depart)}
+        service_labels = ["Luxe" if service == 'رفاهة' else "Standard" for service in self.services]
+        self.trip_departures = [departure_labels[minutes] for minutes in self.depart]
+        self.trip_services = [service_labels[code] if code < len(service_labels) else "Standard"
+                              for code in self.service]
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SNAPSHOT) -> 'FastTimetable':
+        """Read a snapshot written by ``write_snapshot``"""
+        with open(path, 'rb') as f:
+            magic, version, rows, metadata_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a timetable snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is snapshot version {version}, expected {SNAPSHOT_VERSION} (rebuild it)")
+            metadata = json.loads(f.read(metadata_length).decode('utf-8'))
+
+            columns = {}
+            for name, typecode in SNAPSHOT_COLUMNS:
+                column = array(typecode)
+                if column.itemsize != metadata['itemsizes'][name]:
+                    raise ValueError(f"{path} was written on a platform with other integer sizes (rebuild it)")
+                column.fromfile(f, rows * metadata['season_columns'] if name == 'day_bits' else rows)
+                if metadata['byteorder'] != sys.byteorder:
+                    column.byteswap()
+                columns[name] = column
+        return cls(columns, metadata)
+
+    def is_stale(self, data_file: str) -> bool:
+        """True if the timetable file changed since the snapshot was built from it"""
+        source = self.metadata.get('source')
+        if not source or not os.path.exists(data_file):
+            return False
+        stat = os.stat(data_file)
+        return (stat.st_size, stat.st_mtime_ns) != (source['size'], source['mtime_ns'])
+
+    def resolve_station(self, station_french: str, column: str) -> Optional[int]:
+        """Resolve a French station name to a canonical station ID, matching like TimetableEngine"""
+        station_arabic = translate_station_to_arabic(station_french)
+        match, _ = match_station_name(self._column_spellings[column], station_arabic)
+        if match:
+            return self._spelling_stations[self._spelling_index[match]]
+
+        # Try direct search in French names for better matching
+        station_lower = station_french.lower()
+        for spelling in self._column_order[column]:
+            station = self._spelling_stations[spelling]
+            french = self.stations_french[station].lower()
+            if french == station_lower or station_lower in french:
+                return station
+        return None
+
+    def resolve_pair(self, origin_french: str, destination_french: str) -> Tuple[int, int]:
+        """Resolve origin and destination, raising ValueError for unknown stations"""
+        origin = self.resolve_station(origin_french, 'origin')
+        if origin is None:
+            raise ValueError(f"Origin station '{origin_french}' not found in dataset")
+
+        destination = self.resolve_station(destination_french, 'destination')
+        if destination is None:
+            raise ValueError(f"Destination station '{destination_french}' not found in dataset")
+
+        return origin, destination
+
+    def filter_day_season(self, rows: List[int], preferred_day: Optional[str] = None,
+                          preferred_season: Optional[str] = None) -> List[int]:
+        """Filter trips by day and season, keeping all trips when a filter matches nothing"""
+        day_bit = SEASON_PRESENT_BIT
+        if preferred_day:
+            day_arabic = DAY_REVERSE.get(preferred_day, preferred_day)
+            if day_arabic in self.day_columns:
+                bit = 1 << self.day_columns.index(day_arabic)
+                day_rows = [row for row in rows if self._trip_days[row] & bit]
+                if day_rows:
+                    rows = day_rows
+                    day_bit = bit
+
+        if preferred_season and self.metadata['has_season']:
+            season_arabic = None
+            for arabic_season, french_season in SEASON_TRANSLATIONS.items():
+                if french_season.lower() == preferred_season.lower():
+                    season_arabic = arabic_season
+                    break
+
+            if season_arabic and season_arabic.strip() in self.seasons:
+                code = self.seasons.index(season_arabic.strip())
+                stride = self.season_columns
+                season_rows = [row for row in rows if self.day_bits[row * stride + code] & day_bit]
+                if season_rows:
+                    rows = season_rows
+
+        return rows
+
+    def partition(self, day_bit: int = SEASON_PRESENT_BIT,
+                  season: Optional[int] = None) -> Tuple[Dict[int, List[int]], Dict[int, List[int]]]:
+        """Rows per origin and per destination of the trips running on a day bit in a season, built on first use"""
+        key = (day_bit, season)
+        if key not in self._partitions:
+            stride = self.season_columns
+            by_origin, by_destination = {}, {}
+            for row, (origin, destination) in enumerate(zip(self.origin, self.destination)):
+                bits = self._trip_days[row] if season is None else self.day_bits[row * stride + season]
+                if bits & day_bit:
+                    by_origin.setdefault(origin, []).append(row)
+                    by_destination.setdefault(destination, []).append(row)
+            self._partitions[key] = (by_origin, by_destination)
+        return self._partitions[key]
+
+    def service_key(self, preferred_day: Optional[str] = None,
+                    preferred_season: Optional[str] = None) -> Tuple[int, Optional[int]]:
+        """(day bit, season) of a query; days and seasons without any trip are not applied"""
+        day_bit = SEASON_PRESENT_BIT
+        if preferred_day:
+            day_arabic = DAY_REVERSE.get(preferred_day, preferred_day)
+            if day_arabic in self.day_columns:
+                bit = 1 << self.day_columns.index(day_arabic)
+                if self.partition(bit)[0]:
+                    day_bit = bit
+
+        season = None
+        if preferred_season and self.metadata['has_season']:
+            for arabic_season, french_season in SEASON_TRANSLATIONS.items():
+                if french_season.lower() == preferred_season.lower():
+                    if arabic_season.strip() in self.seasons and \
+                            self.partition(day_bit, self.seasons.index(arabic_season.strip()))[0]:
+                        season = self.seasons.index(arabic_season.strip())
+                    break
+        return day_bit, season
+
+    def service_partition(self, preferred_day: Optional[str] = None,
+                          preferred_season: Optional[str] = None) -> Tuple[Dict[int, List[int]], Dict[int, List[int]]]:
+        """Partition of a query's day and season (see ``service_key``)"""
+        return self.partition(*self.service_key(preferred_day, preferred_season))
+
+    def cyclic_timetable(self, day_bit: int = SEASON_PRESENT_BIT,
+                         season: Optional[int] = None) -> Tuple[CyclicTimetable, int]:
+        """Cyclic departures of a season and the minute the query's day starts at, like TimetableEngine
+
+        The clock is weekly for a day bit and daily for SEASON_PRESENT_BIT.
+        """
+        weekly = day_bit != SEASON_PRESENT_BIT
+        key = (weekly, season)
+        if key not in self._cyclic_timetables:
+            stride = self.season_columns
+            bits = (self._trip_days if season is None else
+                    [self.day_bits[row * stride + season] for row in range(len(self.depart))])
+            if weekly:
+                # One departure per day the trip runs on, in minutes since Monday 00:00
+                period, departures = WEEK_MINUTES, [
+                    (WEEKDAYS.index(column) * DAY_MINUTES + self.depart[row], row)
+                    for bit, column in enumerate(self.day_columns)
+                    for row in range(len(bits)) if bits[row] & (1 << bit)
+                ]
+            else:
+                period, departures = DAY_MINUTES, [
+                    (self.depart[row], row) for row in range(len(bits)) if bits[row] & SEASON_PRESENT_BIT
+                ]
+            self._cyclic_timetables[key] = CyclicTimetable(period, departures, self.origin,
+                                                           self.destination, self.duration)
+        day_start = WEEKDAYS.index(self.day_columns[day_bit.bit_length() - 1]) * DAY_MINUTES if weekly else 0
+        return self._cyclic_timetables[key], day_start
+
+    def next_service_day(self, origin: int, destination: int,
+                         preferred_day: Optional[str] = None, preferred_season: Optional[str] = None,
+                         limit: int = 10) -> Tuple[List[int], List[int]]:
+        """Rows and departures (minutes from midnight of the query's day) of the next service day's first direct trips"""
+        cycle, day_start = self.cyclic_timetable(*self.service_key(preferred_day, preferred_season))
+        departures = cycle.next_service_day(origin, destination, day_start + DAY_MINUTES, limit)
+        return [row for _, row in departures], [time_ - day_start for time_, _ in departures]
+
+    def time_window(self, rows: List[int], preferred_min: Optional[int],
+                    next_day: Optional[Tuple[int, int, Optional[str], Optional[str]]] = None
+                    ) -> Tuple[List[int], List[int]]:
+        """Keep departures within 4 hours of the preferred time, else the next 10, else the
+        next service day's first ones (for the ``next_day`` (origin, destination, day, season)), else all
+
+        Returns rows and their departures in minutes from midnight of the query's day.
+        """
+        depart = self.depart
+        if preferred_min is None:
+            return rows, [depart[row] for row in rows]
+        window = [row for row in rows if preferred_min <= depart[row] <= preferred_min + 240]
+        if window:
+            return window, [depart[row] for row in window]
+        later = [row for row in rows if depart[row] >= preferred_min][:10]
+        if later:
+            return later, [depart[row] for row in later]
+        if next_day is not None:
+            next_rows, next_depart = self.next_service_day(*next_day)
+            if next_rows:
+                return next_rows, next_depart
+        return rows, [depart[row] for row in rows]
+
+    def search_transfers(self, origin: int, destination: int,
+                         preferred_min: Optional[int] = None,
+                         max_arrival: Optional[int] = None,
+                         time_budget_ms: Optional[float] = None,
+                         max_expansions: Optional[int] = None,
+                         preferred_day: Optional[str] = None,
+                         preferred_season: Optional[str] = None) -> List[Dict]:
+        """Budgeted one-transfer search on the query's day and season, expanding transfer stations by earliest connection"""
+        search_started = time.perf_counter()
+        depart, duration = self.depart, self.duration
+        day_bit, season = self.service_key(preferred_day, preferred_season)
+        by_origin, by_destination = self.partition(day_bit, season)
+        origin_rows = by_origin.get(origin, [])
+        destination_rows = by_destination.get(destination, [])
+
+        transfer_stations = self._transfer_stations.get((origin, destination))
+        if not transfer_stations:
+            return []
+
+        if preferred_min is not None:
+            origin_rows = [row for row in origin_rows if depart[row] >= preferred_min]
+
+        # Departures on the cyclic clock, for connections past midnight and the next service day
+        cycle, day_start = self.cyclic_timetable(day_bit, season)
+
+        # Per transfer station: second legs, earliest connection and shortest first leg; stations
+        # without a later second leg today can still connect on the next service day
+        connection = self._connection
+        earliest_connection, best_first_leg, first_offsets, second_legs = {}, {}, {}, {}
+        for row in destination_rows:
+            second_legs.setdefault(self.origin[row], []).append(row)
+        for row in origin_rows:
+            station = self.destination[row]
+            if station not in transfer_stations or (station, destination) not in cycle.shortest:
+                continue
+            if station not in earliest_connection or connection[row] < earliest_connection[station]:
+                earliest_connection[station] = connection[row]
+            if station not in best_first_leg or duration[row] < duration[best_first_leg[station]]:
+                best_first_leg[station] = row
+
+        if not earliest_connection and preferred_min is not None:
+            # Nothing leaves after the preferred time today: each station's first bus of the next
+            # service day that connects that same day
+            for station in transfer_stations:
+                if (station, destination) not in cycle.shortest:
+                    continue
+                service_day = None
+                for leaves, row in cycle.following(origin, station, day_start + DAY_MINUTES):
+                    if service_day is None:
+                        service_day = leaves // DAY_MINUTES
+                    elif leaves // DAY_MINUTES != service_day:
+                        break
+                    offset = leaves - day_start - depart[row]
+                    onward, _ = next(cycle.following(station, destination, day_start + offset + connection[row]))
+                    if onward // DAY_MINUTES == service_day:
+                        first_offsets[station] = offset
+                        earliest_connection[station] = offset + connection[row]
+                        best_first_leg[station] = row
+                        break
+        if not earliest_connection:
+            return []
+
+        expansion_order = sorted(earliest_connection.items(), key=lambda item: (item[1], self._station_sort_keys[item[0]]))
+
+        journeys = []
+        for expansions, (station, first_connection) in enumerate(expansion_order):
+            if max_expansions is not None and expansions >= max_expansions:
+                break
+            if (time_budget_ms is not None and
+                    (time.perf_counter() - search_started) * 1000 > time_budget_ms):
+                break
+
+            # Prune stations that cannot beat the best known arrival
+            if max_arrival is not None:
+                if first_connection + cycle.shortest[(station, destination)] >= max_arrival:
+                    continue
+
+            first_leg = best_first_leg[station]
+            first_offset = first_offsets.get(station, 0)
+            second_leg_start = connection[first_leg] + first_offset
+
+            second_leg, second_offset = None, 0
+            if not first_offset:
+                for row in second_legs.get(station, ()):
+                    if depart[row] >= second_leg_start and (second_leg is None or duration[row] < duration[second_leg]):
+                        second_leg = row
+            if second_leg is None:
+                following = next(cycle.following(station, destination, day_start + second_leg_start), None)
+                if following is None or following[0] - day_start - second_leg_start > DAY_MINUTES:
+                    continue  # no second leg within a day of the connection
+                leaves, second_leg = following
+                second_offset = leaves - day_start - depart[second_leg]
+
+            arrival = depart[second_leg] + duration[second_leg] + second_offset
+            if max_arrival is not None and arrival >= max_arrival:
+                continue
+
+            departure = depart[first_leg] + first_offset
+            journeys.append({
+                'transfer_station': station,
+                'first_leg': first_leg,
+                'second_leg': second_leg,
+                'departure': departure,
+                'total_duration': arrival - departure,
+                'waiting_time': depart[second_leg] + second_offset - second_leg_start
+            })
+
+        journeys.sort(key=lambda journey: journey['total_duration'])
+        return journeys
+
+    def recommend(self, origin_french: str, destination_french: str,
+                  preferred_time: Optional[str] = None,
+                  preferred_day: Optional[str] = None,
+                  preferred_season: Optional[str] = None,
+                  max_results: int = 5,
+                  transfer_time_budget_ms: Optional[float] = None,
+                  max_transfer_expansions: Optional[int] = 50) -> List[Dict]:
+        """Route recommendations ranked like the 'standard' profile of TimetableEngine"""
+        origin_french = origin_french.strip()
+        destination_french = destination_french.strip()
+        origin, destination = self.resolve_pair(origin_french, destination_french)
+        if destination not in self._successors.get(origin, ()) and (origin, destination) not in self._transfer_stations:
+            return []
+        preferred_min = parse_preferred_time(preferred_time)
+        depart, duration = self.depart, self.duration
+
+        direct_rows = [row for row in self._by_origin.get(origin, []) if self.destination[row] == destination]
+        filtered_rows, filtered_depart = direct_rows, []
+        best_direct_arrival = None
+        if direct_rows:
+            direct_rows = self.filter_day_season(direct_rows, preferred_day, preferred_season)
+            filtered_rows, filtered_depart = self.time_window(
+                direct_rows, preferred_min, (origin, destination, preferred_day, preferred_season))
+
+            # With a preferred time, transfers only need to be considered if they beat the
+            # best direct arrival after it; without one, both rank over the whole day
+            if preferred_min is not None:
+                usable = [row_depart + duration[row] for row, row_depart in zip(filtered_rows, filtered_depart)
+                          if row_depart >= preferred_min]
+                if usable:
+                    best_direct_arrival = min(usable)
+
+        journeys = self.search_transfers(origin, destination, preferred_min, best_direct_arrival,
+                                         transfer_time_budget_ms, max_transfer_expansions,
+                                         preferred_day, preferred_season)
+
+        # Candidates as (departure, service, duration, transfer index, service score, first row)
+        # (departures are minutes from midnight of the query's day, past 24:00 on the next service day)
+        candidates = [(row_depart, self.services[self.service[row]], duration[row], -1,
+                       service_score(self.services[self.service[row]]), row)
+                      for row, row_depart in zip(filtered_rows, filtered_depart)]
+        for index, journey in enumerate(journeys):
+            first_service = self.services[self.service[journey['first_leg']]]
+            second_service = self.services[self.service[journey['second_leg']]]
+            candidates.append((journey['departure'], 'Mixed', journey['total_duration'], index,
+                               (service_score(first_service) + service_score(second_service)) / 2,
+                               journey['first_leg']))
+        if not candidates:
+            return []
+
+        min_duration = min(candidate[2] for candidate in candidates)
+        max_duration = max(candidate[2] for candidate in candidates)
+
+        # Candidates are unique trips; ties rank in route-key order, keys rendered like the engine's
+        scored = []
+        for candidate in candidates:
+            candidate_depart, service, candidate_duration, index, candidate_service_score, row = candidate
+            duration_score = 3
+            if max_duration > min_duration:
+                duration_score = 3 - 2 * (candidate_duration - min_duration) / (max_duration - min_duration)
+
+            if preferred_time:
+                if preferred_min is not None:
+                    score = (0.7 * time_proximity(candidate_depart - preferred_min) +
+                             0.15 * candidate_service_score +
+                             0.15 * duration_score)
+                else:
+                    score = (candidate_service_score + duration_score) / 2
+            else:
+                score = (0.4 * candidate_service_score +
+                         0.3 * hour_score(candidate_depart % DAY_MINUTES // 60) +
+                         0.3 * duration_score)
+
+            key = f"{float(depart[row])}_{service}_{float(candidate_duration)}_{index}"
+            scored.append((score, key, candidate))
+
+        scored.sort(key=lambda item: item[1])
+        ranked = sorted(scored, key=lambda item: -item[0])[:max_results]
+        return [self._recommendation(score, candidate, journeys, origin_french, destination_french,
+                                     preferred_time, preferred_min)
+                for score, _, candidate in ranked]
+
+    def _recommendation(self, score: float, candidate: Tuple, journeys: List[Dict],
+                        origin_french: str, destination_french: str,
+                        preferred_time: Optional[str], preferred_min: Optional[int]) -> Dict:
+        """Recommendation dict in the shape returned by the engine's standard profile"""
+        candidate_depart, _, candidate_duration, index, _, row = candidate
+        departure_time = self.trip_departures[row]
+
+        time_diff_info = None
+        if preferred_time and preferred_min is not None:
+            time_diff_info = format_time_difference(candidate_depart - preferred_min)
+
+        if index < 0:
+            return {
+                'type': 'direct',
+                'departure_time': departure_time,
+                'duration': candidate_duration,
+                'service_type': self.trip_services[row],
+                'quality_score': float(score),
+                'route_details': f"{origin_french} → {destination_french}",
+                'total_duration': candidate_duration,
+                'transfers': 0,
+                'time_difference_info': time_diff_info,
+                'transfer_details': None
+            }
+
+        journey = journeys[index]
+        first_leg, second_leg = journey['first_leg'], journey['second_leg']
+        transfer_french = self.stations_french[journey['transfer_station']]
+        return {
+            'type': 'transfer',
+            'departure_time': departure_time,
+            'duration': candidate_duration,
+            'service_type': 'Mixed',
+            'quality_score': float(score),
+            'route_details': f"{origin_french} → {transfer_french} → {destination_french}",
+            'total_duration': candidate_duration,
+            'transfers': 1,
+            'time_difference_info': time_diff_info,
+            'transfer_details': {
+                'transfer_station': transfer_french,
+                'first_leg_departure': departure_time,
+                'first_leg_duration': self.duration[first_leg],
+                'first_leg_service': self.trip_services[first_leg],
+                'waiting_time': journey['waiting_time'],
+                'second_leg_departure': self.trip_departures[second_leg],
+                'second_leg_duration': self.duration[second_leg],
+                'second_leg_service': self.trip_services[second_leg]
+            }
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build timetable snapshots and query them without pandas")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    build = subcommands.add_parser('build', help="Preprocess a timetable file into a snapshot")
+    build.add_argument('--data', default=DEFAULT_DATA_FILE, help="Timetable file (Excel or Parquet)")
+    build.add_argument('--out', default=DEFAULT_SNAPSHOT, help="Snapshot file to write")
+    build.add_argument('--transfer-times', help="Minimum transfer times side file (default: transfer_times.json "
+                                                "next to the timetable, if present)")
+
+    query = subcommands.add_parser('query', help="Recommend routes from a snapshot")
+    query.add_argument('origin', help="Origin station (French name)")
+    query.add_argument('destination', help="Destination station (French name)")
+    query.add_argument('--time', help="Preferred departure time (HH:MM)")
+    query.add_argument('--day', help="Day in French (e.g. Lundi)")
+    query.add_argument('--season', help="Summer, Winter or Ramadan")
+    query.add_argument('--max-results', type=int, default=5, help="Recommendations to return")
+    query.add_argument('--snapshot', default=DEFAULT_SNAPSHOT, help="Snapshot file to read")
+    query.add_argument('--data', default=DEFAULT_DATA_FILE, help="Timetable file the snapshot was built from")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        size = build_snapshot(args.data, args.out, args.transfer_times)
+        print(f"💾 Wrote {args.out} ({size / 1024:.1f} KiB) in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    if not os.path.exists(args.snapshot):
+        print(f"❌ Snapshot not found: {args.snapshot} (run: python fast_query.py build)", file=sys.stderr)
+        return 1
+    timetable = FastTimetable.load(args.snapshot)
+    if timetable.is_stale(args.data):
+        print(f"⚠️  {args.data} changed since {args.snapshot} was built; rebuild it", file=sys.stderr)
+
+    try:
+        recommendations = timetable.recommend(args.origin, args.destination, args.time, args.day,
+                                              args.season, args.max_results)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(recommendations, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
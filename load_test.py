@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test Harness for the Bus Recommendation API
+Starts api_main:app locally, replays a query mix with concurrent pooled connections
+and reports throughput and p50/p95/p99 latency per endpoint
+
+Usage:
+    python load_test.py --zipf --requests 2000 --concurrency 32
+    python load_test.py --replay queries.jsonl --output load_results/run.json
+    python load_test.py --zipf --baseline load_results/baseline.json --threshold 0.15
+
+Replay files are JSON lines, one request per line, either a full request
+    {"method": "GET", "path": "/recommendations", "params": {"origin": "Nabeul", "destination": "Tunis"}}
+    {"method": "POST", "path": "/recommendations", "json": {"origin": "Nabeul", "destination": "Tunis"}}
+or a bare recommendation query, which is sent as GET /recommendations
+    {"origin": "Nabeul", "destination": "Tunis", "preferred_time": "08:00"}
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import httpx
+
+DEFAULT_RESULTS_DIR = "load_results"
+
+DAYS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+SEASONS = ['Summer', 'Winter', 'Ramadan']
+
+# Metrics compared against the baseline: name → True if higher is worse
+COMPARED_METRICS = {'p50_ms': True, 'p95_ms': True, 'p99_ms': True, 'throughput_rps': False}
+
+
+def find_free_port() -> int:
+    """Ask the OS for an unused local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, startup_timeout: float = 60.0) -> subprocess.Popen:
+    """Start uvicorn with api_main:app and wait until the bus data is loaded"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api_main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited during startup (code {process.returncode})")
+        try:
+            health = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).json()
+            if health.get('data_loaded'):
+                return process
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"API server did not become healthy within {startup_timeout:.0f}s")
+
+
+def load_replay_file(path: str) -> List[Dict]:
+    """Read request records from a JSON lines file"""
+    requests_list = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'path' in record:
+                requests_list.append({
+                    'method': record.get('method', 'GET').upper(),
+                    'path': record['path'],
+                    'params': record.get('params'),
+                    'json': record.get('json')
+                })
+            elif 'origin' in record and 'destination' in record:
+                requests_list.append({'method': 'GET', 'path': '/recommendations',
+                                      'params': record, 'json': None})
+            else:
+                raise ValueError(f"{path}:{line_number}: expected a 'path' or an origin/destination query")
+    return requests_list
+
+
+async def probe_pairs(base_url: str, pairs: List[Tuple[str, str]], concurrency: int,
+                      timeout: float) -> Set[Tuple[str, str]]:
+    """Station pairs the API rejects with a 4xx (e.g. a destination-only station used as origin)"""
+    invalid = set()
+    queue = asyncio.Queue()
+    for pair in pairs:
+        queue.put_nowait(pair)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+
+        async def worker():
+            while True:
+                try:
+                    origin, destination = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                response = await client.get('/recommendations', params={
+                    'origin': origin, 'destination': destination, 'max_results': 1
+                })
+                if 400 <= response.status_code < 500:
+                    invalid.add((origin, destination))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return invalid
+
+
+def build_zipf_mix(stations: List[str], n_requests: int, exponent: float, seed: int,
+                   probe: Optional[Callable[[List[Tuple[str, str]]], Set[Tuple[str, str]]]] = None) -> List[Dict]:
+    """Sample recommendation queries with Zipf-distributed popularity over station pairs
+
+    ``probe`` receives pairs not checked yet and returns the invalid ones; those are
+    dropped and the mix is drawn again, so it only holds pairs the API accepts.
+    """
+    rng = random.Random(seed)
+    pairs = [(a, b) for a in stations for b in stations if a != b]
+    rng.shuffle(pairs)
+    weights = [1.0 / (rank ** exponent) for rank in range(1, len(pairs) + 1)]
+
+    checked, invalid = set(), set()
+    while True:
+        sampled = rng.choices(pairs, weights=weights, k=n_requests)
+        unchecked = sorted(set(sampled) - checked)
+        if probe is None or not unchecked:
+            break
+        checked.update(unchecked)
+        invalid.update(probe(unchecked))
+        weights = [0.0 if pair in invalid else weight for pair, weight in zip(pairs, weights)]
+        if not any(weights):
+            raise RuntimeError("No station pair is accepted by the API")
+
+    requests_list = []
+    for origin, destination in sampled:
+        params = {'origin': origin, 'destination': destination}
+        if rng.random() < 0.7:
+            params['preferred_time'] = f"{rng.randint(5, 21):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+        if rng.random() < 0.5:
+            params['preferred_day'] = rng.choice(DAYS)
+        if rng.random() < 0.3:
+            params['preferred_season'] = rng.choice(SEASONS)
+        requests_list.append({'method': 'GET', 'path': '/recommendations', 'params': params, 'json': None})
+    return requests_list
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sample"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_load(base_url: str, requests_list: List[Dict], concurrency: int,
+                   timeout: float) -> Dict[str, Dict]:
+    """Send all requests with a fixed number of concurrent workers sharing one connection pool"""
+    samples = {}
+    queue = asyncio.Queue()
+    for request in requests_list:
+        queue.put_nowait(request)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+
+        async def worker():
+            while True:
+                try:
+                    request = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                endpoint = f"{request['method']} {request['path']}"
+                stats = samples.setdefault(endpoint, {'latencies': [], 'errors': 0, 'client_errors': 0,
+                                                      'status': {}})
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        request['method'], request['path'],
+                        params=request['params'], json=request['json']
+                    )
+                    status = str(response.status_code)
+                    if response.status_code >= 500:
+                        stats['errors'] += 1
+                except httpx.HTTPError:
+                    status = 'error'
+                    stats['errors'] += 1
+                stats['status'][status] = stats['status'].get(status, 0) + 1
+                if status.startswith('4'):
+                    # Rejected requests are counted apart and kept out of the latency percentiles
+                    stats['client_errors'] += 1
+                    continue
+                stats['latencies'].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report = {}
+    for endpoint, stats in sorted(samples.items()):
+        ordered = sorted(stats['latencies'])
+        requests_sent = len(ordered) + stats['client_errors']
+        report[endpoint] = {
+            'requests': requests_sent,
+            'errors': stats['errors'],
+            'client_errors': stats['client_errors'],
+            'status_codes': stats['status'],
+            'throughput_rps': requests_sent / elapsed if elapsed > 0 else 0.0,
+            'mean_ms': sum(ordered) / len(ordered) if ordered else 0.0,
+            'p50_ms': percentile(ordered, 50),
+            'p95_ms': percentile(ordered, 95),
+            'p99_ms': percentile(ordered, 99),
+            'max_ms': ordered[-1] if ordered else 0.0
+        }
+    return report
+
+
+def compare_with_baseline(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print changes per endpoint and return descriptions of regressions beyond threshold"""
+    regressions = []
+    print(f"\n📊 Comparison with baseline from {baseline.get('timestamp')}")
+    for endpoint, stats in current['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(endpoint)
+        if not base:
+            print(f"   {endpoint}: no baseline")
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            if not base.get(metric):
+                continue
+            ratio = stats[metric] / base[metric]
+            regressed = ratio > 1 + threshold if higher_is_worse else ratio < 1 - threshold
+            marker = "❌" if regressed else "✅"
+            print(f"   {marker} {endpoint:<28} {metric:<15} {base[metric]:10.2f} → {stats[metric]:10.2f} ({ratio:5.2f}x)")
+            if regressed:
+                regressions.append(f"{endpoint} {metric}")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the Bus Recommendation API")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', help="JSON lines file of requests to replay")
+    source.add_argument('--zipf', action='store_true', help="Generate a Zipf-distributed query mix over station pairs")
+    parser.add_argument('--url', help="Test an already running server instead of starting api_main:app")
+    parser.add_argument('--requests', type=int, default=1000, help="Requests to send (Zipf mix size, or replay cap)")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent connections")
+    parser.add_argument('--zipf-exponent', type=float, default=1.1, help="Zipf exponent for pair popularity")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the Zipf mix")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', help="Result file (default: load_results/<timestamp>.json)")
+    parser.add_argument('--baseline', help="Earlier result file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed relative regression before failing (default 0.2)")
+    args = parser.parse_args(argv)
+
+    print("🚦 BUS RECOMMENDATION API LOAD TEST")
+    print("=" * 50)
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if not base_url:
+        port = find_free_port()
+        print(f"🚀 Starting api_main:app on port {port}...")
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        if args.replay:
+            requests_list = load_replay_file(args.replay)
+            if args.requests:
+                requests_list = requests_list[:args.requests]
+        else:
+            stations = httpx.get(f"{base_url}/stations", timeout=args.timeout).json()['stations']
+            requests_list = build_zipf_mix(
+                stations, args.requests, args.zipf_exponent, args.seed,
+                probe=lambda pairs: asyncio.run(probe_pairs(base_url, pairs, args.concurrency, args.timeout))
+            )
+
+        print(f"📨 Sending {len(requests_list)} requests with {args.concurrency} connections...")
+        endpoints = asyncio.run(run_load(base_url, requests_list, args.concurrency, args.timeout))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'source': args.replay or f"zipf(exponent={args.zipf_exponent}, seed={args.seed})",
+        'requests': len(requests_list),
+        'concurrency': args.concurrency,
+        'endpoints': endpoints
+    }
+
+    for endpoint, stats in endpoints.items():
+        print(f"\n🎯 {endpoint}")
+        print(f"   Requests: {stats['requests']} ({stats['errors']} errors, {stats['client_errors']} rejected with 4xx) | "
+              f"{stats['throughput_rps']:.1f} req/s")
+        print(f"   Latency: p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms | "
+              f"p99 {stats['p99_ms']:.1f} ms | max {stats['max_ms']:.1f} ms")
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output = os.path.join(DEFAULT_RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
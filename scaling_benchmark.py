@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark Driver
+Generates synthetic timetables at increasing scale and charts load time, memory and query latency
+
+Usage:
+    python scaling_benchmark.py --scales 1 10 100
+    python scaling_benchmark.py --scales 1 5 10 --format xlsx --queries 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from bus_service import BusRecommendationService
+from synthetic_timetable import generate_timetable, write_timetable
+
+DEFAULT_RESULTS_DIR = "scaling_results"
+
+# Size of the SRTGN dataset, used as scale 1
+BASE_STATIONS = 76
+BASE_HUBS = 4
+
+
+def default_format() -> str:
+    """Prefer Parquet when a Parquet engine is installed (Excel is slow to write at 100x)"""
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'xlsx'
+
+
+def sample_queries(df, n_queries: int, seed: int) -> List[Dict]:
+    """Sample direct OD pairs and one-transfer pairs (spoke → hub → spoke) from a timetable"""
+    rng = np.random.default_rng(seed)
+    pairs = df[['محطة الانطلاق', 'محطة الوصول']].drop_duplicates().to_numpy()
+    next_stops = {}
+    for origin, destination in pairs:
+        next_stops.setdefault(origin, []).append(destination)
+
+    queries = []
+    for i in range(n_queries):
+        origin, middle = pairs[rng.integers(len(pairs))]
+        destination = middle
+        if i % 2 == 1:
+            # Odd queries continue one more hop so they usually need a transfer
+            onward = [s for s in next_stops.get(middle, []) if s != origin]
+            if onward:
+                destination = onward[rng.integers(len(onward))]
+        queries.append({
+            'origin_french': origin,
+            'destination_french': destination,
+            'preferred_time': f"{int(rng.integers(5, 20)):02d}:00",
+            'preferred_day': 'Lundi',
+            'preferred_season': 'Summer'
+        })
+    return queries
+
+
+def run_scale(scale: float, data_dir: str, file_format: str, n_queries: int, seed: int) -> Dict:
+    """Generate, load and query one timetable size"""
+    n_stations = int(round(BASE_STATIONS * scale))
+    n_hubs = max(1, int(round(BASE_HUBS * scale)))
+
+    started = time.perf_counter()
+    generated = generate_timetable(n_stations=n_stations, n_hubs=n_hubs, seed=seed)
+    path = write_timetable(generated, os.path.join(data_dir, f"synthetic_{scale:g}x.{file_format}"))
+    generate_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    service = BusRecommendationService(path)
+    load_seconds = time.perf_counter() - started
+    if not service.is_data_loaded():
+        raise Exception(f"Could not load generated timetable {path}")
+
+    frame_bytes = int(service.df.memory_usage(deep=True).sum())
+
+    latencies = []
+    for query in sample_queries(service.df, n_queries, seed):
+        started = time.perf_counter()
+        try:
+            service.get_recommendations(**query)
+        except ValueError:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    ordered = sorted(latencies)
+    return {
+        'scale': scale,
+        'stations': n_stations,
+        'hubs': n_hubs,
+        'trips': len(service.df),
+        'file': path,
+        'generate_seconds': generate_seconds,
+        'load_seconds': load_seconds,
+        'frame_memory_mb': frame_bytes / (1024 * 1024),
+        'query_median_ms': statistics.median(latencies),
+        'query_p95_ms': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'queries': len(latencies)
+    }
+
+
+def plot_results(results: List[Dict], chart_path: str) -> Optional[str]:
+    """Chart load time, memory and query latency against scale (skipped without matplotlib)"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("ℹ️  matplotlib not installed, skipping chart")
+        return None
+
+    trips = [r['trips'] for r in results]
+    panels = [
+        ('load_seconds', 'Load time (s)'),
+        ('frame_memory_mb', 'DataFrame memory (MB)'),
+        ('query_median_ms', 'Query latency, median (ms)'),
+    ]
+
+    fig, axes = plt.subplots(1, len(panels), figsize=(5 * len(panels), 4))
+    for ax, (key, label) in zip(axes, panels):
+        ax.plot(trips, [r[key] for r in results], marker='o')
+        if key == 'query_median_ms':
+            ax.plot(trips, [r['query_p95_ms'] for r in results], marker='x', linestyle='--', label='p95')
+            ax.legend()
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Trips in timetable')
+        ax.set_title(label)
+        ax.grid(True, which='both', alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(chart_path, dpi=120)
+    plt.close(fig)
+    return chart_path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the service on synthetic timetables of growing size")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help="Multiples of the SRTGN station count to generate")
+    parser.add_argument('--format', choices=['parquet', 'xlsx'], default=default_format(),
+                        help="Timetable file format to load from")
+    parser.add_argument('--queries', type=int, default=50, help="Queries timed per scale")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for generation and queries")
+    parser.add_argument('--out-dir', default=DEFAULT_RESULTS_DIR, help="Directory for data, results and chart")
+    args = parser.parse_args(argv)
+
+    print("📈 SCALING BENCHMARK")
+    print("=" * 50)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    results = []
+    for scale in args.scales:
+        result = run_scale(scale, args.out_dir, args.format, args.queries, args.seed)
+        results.append(result)
+        print(f"⏱️  {scale:g}x: {result['trips']} trips | load {result['load_seconds']:.2f}s | "
+              f"{result['frame_memory_mb']:.1f} MB | query median {result['query_median_ms']:.1f} ms "
+              f"(p95 {result['query_p95_ms']:.1f} ms)")
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    results_path = os.path.join(args.out_dir, f"scaling-{stamp}.json")
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'format': args.format, 'results': results},
+                  f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {results_path}")
+
+    chart_path = plot_results(results, os.path.join(args.out_dir, f"scaling-{stamp}.png"))
+    if chart_path:
+        print(f"📊 Chart saved to {chart_path}")
+
+
+if __name__ == "__main__":
+    main()
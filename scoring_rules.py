@@ -0,0 +1,112 @@
+"""
+Scoring Rules
+Time parsing, minimum transfer times and the per-route scoring functions shared
+by the timetable engine and the pandas-free fast query path (fast_query.py)
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Minimum time in minutes needed to change buses at a transfer station
+MIN_TRANSFER_TIME = 15
+
+# Side file with per-station minimum transfer times, looked up next to the timetable file
+TRANSFER_TIMES_FILE = "transfer_times.json"
+
+
+def transfer_times_path(data_file: str) -> str:
+    """Path of the transfer times side file of a timetable file"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), TRANSFER_TIMES_FILE)
+
+
+def load_transfer_times(path: str) -> Tuple[int, Dict[str, int]]:
+    """Default and per-station (French name) minimum transfer times from a JSON side file
+
+    The file holds ``{"default": 15, "stations": {"Tunis": 25, "Oued Zeit": 10}}``;
+    without a default MIN_TRANSFER_TIME applies. Raises ValueError for times that
+    are not whole non-negative minutes.
+    """
+    with open(path, encoding='utf-8') as f:
+        content = json.load(f)
+
+    def minutes(value, name):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"Invalid transfer time {value!r} for {name} in {path}")
+        return value
+
+    default = minutes(content.get('default', MIN_TRANSFER_TIME), 'default')
+    stations = {station: minutes(value, station) for station, value in content.get('stations', {}).items()}
+    return default, stations
+
+
+def station_transfer_times(stations_french: Sequence[Optional[str]],
+                           transfer_times: Optional[Tuple[int, Dict[str, int]]] = None) -> List[int]:
+    """Minimum transfer time of every station ID from its French name
+
+    Names match case-insensitively; stations not in ``transfer_times`` (or all of
+    them without it) get its default, and names of other stations are ignored.
+    """
+    default, stations = transfer_times or (MIN_TRANSFER_TIME, {})
+    by_name = {name.strip().lower(): value for name, value in stations.items()}
+    return [by_name.get(name.strip().lower(), default) if name else default for name in stations_french]
+
+
+def parse_preferred_time(preferred_time: Optional[str]) -> Optional[int]:
+    """Minutes since midnight of an HH:MM preference, or None if absent or unreadable"""
+    if not preferred_time:
+        return None
+    try:
+        if ':' in str(preferred_time):
+            h, m = map(int, str(preferred_time).split(':'))
+            return h * 60 + m
+    except:
+        pass
+    return None
+
+
+def time_proximity(time_diff: float) -> float:
+    """Score a departure by how soon after the preferred time it leaves"""
+    if time_diff < 0:  # Route before preferred time
+        return 0.1
+    elif time_diff == 0:  # Exact match
+        return 3.0
+    elif time_diff <= 30:  # Within 30 minutes
+        return 3.0 - (time_diff / 30) * 0.5
+    elif time_diff <= 60:  # Within 1 hour
+        return 2.5 - ((time_diff - 30) / 30) * 1.0
+    elif time_diff <= 120:  # Within 2 hours
+        return 1.5 - ((time_diff - 60) / 60) * 1.0
+    else:  # More than 2 hours later
+        return 0.5 - min((time_diff - 120) / 480, 0.4)
+
+
+def hour_score(hour: int) -> int:
+    """General preference for peak hours when no time is given"""
+    return 3 if hour in [7, 8, 9, 17, 18, 19] else 2 if hour in [6, 10, 16, 20] else 1
+
+
+def service_score(service: str) -> int:
+    """Luxe (رفاهة) service scores 3, standard service 1"""
+    return 3 if service == 'رفاهة' else 1
+
+
+def format_time_difference(time_diff_minutes: int) -> Optional[str]:
+    """Describe how far a departure is from the preferred time"""
+    if time_diff_minutes == 0:
+        return "Exact match!"
+    elif time_diff_minutes <= 30:
+        return f"+{time_diff_minutes}min from preferred"
+    else:
+        hours_diff = time_diff_minutes // 60
+        mins_diff = time_diff_minutes % 60
+        if hours_diff > 0:
+            return f"+{hours_diff}h{mins_diff:02d}m from preferred"
+        else:
+            return f"+{mins_diff}min from preferred"
+
+
+def format_minutes(minutes: float) -> str:
+    """Format minutes since midnight as HH:MM (wrapping past midnight)"""
+    minutes = int(minutes)
+    return f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
@@ -0,0 +1,148 @@
+"""
+Service Calendar
+Calendar dates mapped to the timetable's weekday and season, precomputed for a
+range of years so that a dated query costs one table lookup. Ramadan comes from
+the tabular Hijri calendar, computed in plain Python (no pandas)
+"""
+
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple, Union
+
+# Years covered by the default calendar
+CALENDAR_FIRST_YEAR = 2020
+CALENDAR_LAST_YEAR = 2040
+
+# French day names in date.weekday() order
+WEEKDAYS_FRENCH = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+# Season codes stored above the three weekday bits of a calendar entry
+SEASONS = ['Winter', 'Summer', 'Ramadan']
+SEASON_SHIFT = 3
+WEEKDAY_MASK = (1 << SEASON_SHIFT) - 1
+
+# 1 Muharram 1 AH (Friday 16 July 622, Julian) as a proleptic Gregorian ordinal
+HIJRI_EPOCH = date(622, 7, 19).toordinal()
+RAMADAN_MONTH = 9
+
+
+def hijri_to_ordinal(year: int, month: int, day: int) -> int:
+    """Gregorian ordinal of a date of the tabular (arithmetical) Hijri calendar"""
+    return (day + (59 * (month - 1) + 1) // 2 + (year - 1) * 354 + (3 + 11 * year) // 30
+            + HIJRI_EPOCH - 1)
+
+
+def ordinal_to_hijri(ordinal: int) -> Tuple[int, int, int]:
+    """(year, month, day) of the tabular Hijri calendar for a Gregorian ordinal"""
+    year = (30 * (ordinal - HIJRI_EPOCH) + 10646) // 10631
+    month = min(12, -(-2 * (ordinal - 29 - hijri_to_ordinal(year, 1, 1)) // 59) + 1)
+    day = ordinal - hijri_to_ordinal(year, month, 1) + 1
+    return year, month, day
+
+
+def ramadan_dates(hijri_year: int) -> Tuple[date, date]:
+    """First and last day of Ramadan of a Hijri year in the tabular calendar
+
+    The announced dates follow the moon sighting and can differ by a day;
+    ServiceCalendar accepts them as overrides.
+    """
+    first = hijri_to_ordinal(hijri_year, RAMADAN_MONTH, 1)
+    last = hijri_to_ordinal(hijri_year, RAMADAN_MONTH + 1, 1) - 1
+    return date.fromordinal(first), date.fromordinal(last)
+
+
+def month_season(month: int) -> str:
+    """Timetable season of a month outside Ramadan (Tunisian summer runs June to September)"""
+    if month in [6, 7, 8, 9]:  # June to September
+        return 'Summer'
+    elif month in [10, 11, 12, 1, 2, 3]:  # October to March
+        return 'Winter'
+    else:  # April, May (Spring) - treat as transition to Summer
+        return 'Summer'
+
+
+def season_of(day: date) -> str:
+    """Timetable season of any date, computed directly (ServiceCalendar is the fast path)"""
+    if ordinal_to_hijri(day.toordinal())[1] == RAMADAN_MONTH:
+        return 'Ramadan'
+    return month_season(day.month)
+
+
+def parse_date(value: Union[date, datetime, str]) -> date:
+    """A date from a date, datetime or ISO 'YYYY-MM-DD' string"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'. Use YYYY-MM-DD (e.g., 2025-03-14)")
+
+
+class ServiceCalendar:
+    """Weekday and season of every date in a range of years, one byte per date
+
+    Each entry holds the weekday in its low bits and the season code above them.
+    ``ramadan_overrides`` maps a Hijri year to the announced (first, last) days of
+    Ramadan, replacing the tabular dates for that year.
+    """
+
+    def __init__(self, first_year: int = CALENDAR_FIRST_YEAR, last_year: int = CALENDAR_LAST_YEAR,
+                 ramadan_overrides: Optional[Dict[int, Tuple[date, date]]] = None):
+        if last_year < first_year:
+            raise ValueError(f"Calendar years {first_year}-{last_year} are empty")
+        self.first_year = first_year
+        self.last_year = last_year
+        self._first_ordinal = date(first_year, 1, 1).toordinal()
+        last_ordinal = date(last_year, 12, 31).toordinal()
+
+        entries = bytearray(last_ordinal - self._first_ordinal + 1)
+        season_codes = {season: code << SEASON_SHIFT for code, season in enumerate(SEASONS)}
+        for offset in range(len(entries)):
+            day = date.fromordinal(self._first_ordinal + offset)
+            entries[offset] = day.weekday() | season_codes[month_season(day.month)]
+
+        # Ramadan of every Hijri year overlapping the range
+        ramadan = season_codes['Ramadan']
+        self.ramadan = {}
+        for hijri_year in range(ordinal_to_hijri(self._first_ordinal)[0], ordinal_to_hijri(last_ordinal)[0] + 1):
+            first, last = (ramadan_overrides or {}).get(hijri_year) or ramadan_dates(hijri_year)
+            self.ramadan[hijri_year] = (first, last)
+            for ordinal in range(max(first.toordinal(), self._first_ordinal), min(last.toordinal(), last_ordinal) + 1):
+                offset = ordinal - self._first_ordinal
+                entries[offset] = (entries[offset] & WEEKDAY_MASK) | ramadan
+        self._entries = bytes(entries)
+
+    def lookup(self, day: Union[date, datetime, str]) -> Tuple[str, str]:
+        """(French weekday, season) of a date, raising ValueError outside the calendar's years"""
+        day = parse_date(day)
+        offset = day.toordinal() - self._first_ordinal
+        if not 0 <= offset < len(self._entries):
+            raise ValueError(f"Date {day.isoformat()} is outside the service calendar "
+                             f"({self.first_year}-{self.last_year})")
+        entry = self._entries[offset]
+        return WEEKDAYS_FRENCH[entry & WEEKDAY_MASK], SEASONS[entry >> SEASON_SHIFT]
+
+    def __repr__(self) -> str:
+        return f"ServiceCalendar({self.first_year}-{self.last_year}, {len(self._entries)} days)"
+
+
+_default_calendar = None
+
+
+def default_calendar() -> ServiceCalendar:
+    """Shared calendar over the default years, built on first use"""
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = ServiceCalendar()
+    return _default_calendar
+
+
+def resolve_travel_date(travel_date: Optional[Union[date, datetime, str]], preferred_day: Optional[str],
+                        preferred_season: Optional[str],
+                        calendar: Optional[ServiceCalendar] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Day and season of a query, filling in the ones not given from the travel date"""
+    if not travel_date:
+        return preferred_day, preferred_season
+    day, season = (calendar or default_calendar()).lookup(travel_date)
+    return preferred_day or day, preferred_season or season
@@ -0,0 +1,324 @@
+"""
+Station, Day and Season Names
+Arabic/French translation tables and station name matching, kept free of
+pandas so that lightweight entry points (fast_query.py) can import them cheaply
+"""
+
+# Complete Translation Dictionary for ALL stations in the dataset
+STATION_TRANSLATIONS = {
+    # Main cities and towns
+    'نابل': 'Nabeul',
+    'القيروان': 'Kairouan',
+    'تونس': 'Tunis',
+    'زغوان': 'Zaghouan',
+
+    # Nabeul area stations
+    'نابل الورشة': 'Nabeul Atelier',
+    'نابل  الورشة': 'Nabeul Atelier',
+    'نابل الورشه': 'Nabeul Atelier',
+    'الحي الجامعي': 'Cite Universitaire',
+    'الحي الجامعي"الحزامية"': 'Cite Universitaire Hzamia',
+    'الحي الصناعي': 'Zone Industrielle',
+    'دار شعبان الفهري': 'Dar Chaabane Fehri',
+    'دار شعبان': 'Dar Chaabane',
+    'ديار بن سالم': 'Diar Ben Salem',
+    'المعهد النموذجي': 'Institut Modele',
+    'مبيتات طريق تونس': 'Mabitat Route Tunis',
+
+    # Hammamet area
+    'الحمامات': 'Hammamet',
+    'الحمامات  الجنوبية': 'Hammamet Sud',
+    'الحمامات الجنوبية': 'Hammamet Sud',
+    'ياسمين الحمامات': 'Yasmine Hammamet',
+
+    # Coastal towns
+    'بئر بورقبة': 'Bir Bouregba',
+    'براكة الساحل': 'Baraka Sahel',
+    'تافرنين': 'Taferinine',
+    'حمام بنت الجديدي': 'Hammam Bent Jdidi',
+    'سيدي الجديدي': 'Sidi Jdidi',
+    'حتوس': 'Htous',
+    'جبنون': 'Jebnoun',
+    'بني خيار': 'Beni Khiar',
+    'بني وائل': 'Beni Wail',
+    'قرمبالية': 'Korba',
+
+    # Rural areas
+    'المعمورة': 'Maamoura',
+    'معمورة': 'Maamoura',
+    'الصمعة': 'Somaa',
+    'الصمعة حزاميه': 'Somaa Hzamia',
+    'العامره': 'Amra',
+    'العامره ': 'Amra',
+    'المرازقة': 'Mrazga',
+    'المزيرعة': 'Mziraa',
+    'الأطرش': 'Atrach',
+    'البسباسية': 'Basbassia',
+    'الفحص': 'Fahs',
+    'الفرينين': 'Freineine',
+    'تازركة': 'Tazarka',
+    'بيوب': 'Biyoub',
+    'بوفيشة': 'Bouficha',
+    'مزنين': 'Mznine',
+    'واد الزيت': 'Oued Zeit',
+    'بو علي': 'Bou Ali',
+
+    # Airport
+    'مطار تونس قرطاج': 'Aeroport Tunis Carthage',
+
+    # Industrial/Commercial
+    'SIPHAT': 'SIPHAT',
+
+    # Complex route names (combinations)
+    'الحمامات - بئر بورقبة - بني وائل': 'Hammamet - Bir Bouregba - Beni Wail',
+    'الحمامات - ياسمين الحمامات': 'Hammamet - Yasmine Hammamet',
+    'الفرينين - نابل  الورشة': 'Freineine - Nabeul Atelier',
+    'المعمورة - ديار بن سالم': 'Maamoura - Diar Ben Salem',
+    'براكة الساحل - الحمامات': 'Baraka Sahel - Hammamet',
+    'براكة الساحل - بني وائل': 'Baraka Sahel - Beni Wail',
+    'براكة الساحل - تافرنين - حمام بنت الجديدي': 'Baraka Sahel - Taferinine - Hammam Bent Jdidi',
+    'براكة الساحل - تافرنين - حمام بنت الجديدي - حتوس': 'Baraka Sahel - Taferinine - Hammam Bent Jdidi - Htous',
+    'براكة الساحل - حتوس': 'Baraka Sahel - Htous',
+    'بني خيار - المعهد النموذجي': 'Beni Khiar - Institut Modele',
+    'بني خيار- المعمورة': 'Beni Khiar - Maamoura',
+    'بني وائل -  بئر بورقبة': 'Beni Wail - Bir Bouregba',
+    'تافرنين - سيدي حمّاد - براكة الساحل': 'Taferinine - Sidi Hammad - Baraka Sahel',
+    'جبنون - المنشار - تافرنين': 'Jebnoun - Menchar - Taferinine',
+    'جبنون - براكة الساحل': 'Jebnoun - Baraka Sahel',
+    'حتوس - حمام بنت الجديدي': 'Htous - Hammam Bent Jdidi',
+    'حتوس - سيدي الجديدي - البسباسية - جبنون': 'Htous - Sidi Jdidi - Basbassia - Jebnoun',
+    'حمام بنت الجديدي - سيدي الجديدي': 'Hammam Bent Jdidi - Sidi Jdidi',
+    'دار شعبان الفهري - الحي الجامعي': 'Dar Chaabane Fehri - Cite Universitaire',
+    'دار شعبان – المعهد النموذجي': 'Dar Chaabane - Institut Modele',
+    'ديار بن سالم - بني خيار': 'Diar Ben Salem - Beni Khiar',
+    'سيدي الجديدي - حتوس': 'Sidi Jdidi - Htous',
+    'نابل -  بيوب -الفرينين': 'Nabeul - Biyoub - Freineine',
+    'نابل - الصمعة': 'Nabeul - Somaa',
+    'نابل - المعمورة': 'Nabeul - Maamoura',
+    'نابل - دار شعبان': 'Nabeul - Dar Chaabane',
+    'نابل - ديار بن سالم': 'Nabeul - Diar Ben Salem',
+    'نابل الورشة - الحي الجامعي': 'Nabeul Atelier - Cite Universitaire',
+    'نابل الورشة - المعهد النموذجي': 'Nabeul Atelier - Institut Modele',
+    'نابل الورشة - ديار بن سالم': 'Nabeul Atelier - Diar Ben Salem',
+    'ياسمين الحمامات - براكة الساحل': 'Yasmine Hammamet - Baraka Sahel',
+    'بئر بورقبة - الحمامات': 'Bir Bouregba - Hammamet',
+
+    # Additional stations found in dataset (completing the 138 stations)
+    'الحي الجامعي"الحزامية"': 'Cite Universitaire Hzamia',
+    'الصمعة حزاميه': 'Somaa Hzamia',
+    'مبيتات طريق تونس': 'Mabitat Route Tunis',
+    'الحمامات  الجنوبية': 'Hammamet Sud',
+    'معمورة': 'Maamoura',
+    'العامره ': 'Amra',
+    'نابل  الورشة': 'Nabeul Atelier',
+    'نابل الورشه': 'Nabeul Atelier',
+    'المزيرعة': 'Mziraa',
+    'بوفيشة': 'Bouficha',
+    'بو علي': 'Bou Ali',
+
+    # Additional complex routes and variations
+    'الحي الجامعي"الحزامية" - نابل الورشة': 'Cite Universitaire Hzamia - Nabeul Atelier',
+    'الصمعة - نابل': 'Somaa - Nabeul',
+    'الصمعة حزاميه - نابل الورشة': 'Somaa Hzamia - Nabeul Atelier',
+    'العامره  - نابل الورشة': 'Amra - Nabeul Atelier',
+    'المرازقة - نابل الورشة': 'Mrazga - Nabeul Atelier',
+    'المزيرعة - نابل الورشة': 'Mziraa - Nabeul Atelier',
+    'الأطرش - نابل الورشة': 'Atrach - Nabeul Atelier',
+    'البسباسية - نابل الورشة': 'Basbassia - Nabeul Atelier',
+    'الفحص - نابل الورشة': 'Fahs - Nabeul Atelier',
+    'تازركة - نابل الورشة': 'Tazarka - Nabeul Atelier',
+    'بوفيشة - نابل الورشة': 'Bouficha - Nabeul Atelier',
+    'مزنين - نابل الورشة': 'Mznine - Nabeul Atelier',
+    'واد الزيت - نابل الورشة': 'Oued Zeit - Nabeul Atelier',
+    'بو علي - نابل الورشة': 'Bou Ali - Nabeul Atelier',
+    'قرمبالية - نابل الورشة': 'Korba - Nabeul Atelier',
+    'قرمبالية - نابل': 'Korba - Nabeul',
+    'قرمبالية - تونس': 'Korba - Tunis',
+    'قرمبالية - زغوان': 'Korba - Zaghouan',
+    'نابل - قرمبالية': 'Nabeul - Korba',
+    'تونس - قرمبالية': 'Tunis - Korba',
+    'زغوان - قرمبالية': 'Zaghouan - Korba',
+    'زغوان - نابل': 'Zaghouan - Nabeul',
+    'زغوان - تونس': 'Zaghouan - Tunis',
+    'نابل - زغوان': 'Nabeul - Zaghouan',
+    'تونس - زغوان': 'Tunis - Zaghouan',
+    'القيروان - نابل': 'Kairouan - Nabeul',
+    'القيروان - تونس': 'Kairouan - Tunis',
+    'نابل - القيروان': 'Nabeul - Kairouan',
+    'تونس - القيروان': 'Tunis - Kairouan',
+    'تونس - نابل': 'Tunis - Nabeul',
+    'نابل - تونس': 'Nabeul - Tunis',
+    'مطار تونس قرطاج - نابل': 'Aeroport Tunis Carthage - Nabeul',
+    'نابل - مطار تونس قرطاج': 'Nabeul - Aeroport Tunis Carthage',
+    'SIPHAT - نابل الورشة': 'SIPHAT - Nabeul Atelier',
+    'نابل الورشة - SIPHAT': 'Nabeul Atelier - SIPHAT',
+
+    # Additional missing stations (whitespace variations and new ones)
+    'برج السدرية': 'Borj Sedria',
+    'الحي الجامعي" الحزامية"': 'Cite Universitaire Hzamia',
+
+    # Handle whitespace variations by mapping them to existing translations
+    '  الحمامات  الجنوبية': 'Hammamet Sud',
+    '  العامره ': 'Amra',
+    '  بيوب': 'Biyoub',
+    '  نابل الورشه': 'Nabeul Atelier',
+    '  ياسمين الحمامات': 'Yasmine Hammamet',
+    ' الحمامات': 'Hammamet',
+    ' بئر بورقبة': 'Bir Bouregba',
+    ' معمورة': 'Maamoura',
+    ' نابل الورشة': 'Nabeul Atelier',
+    'الأطرش ': 'Atrach',
+    'البسباسية ': 'Basbassia',
+    'الحمامات ': 'Hammamet',
+    'الحي الجامعي ': 'Cite Universitaire',
+    'الحي الصناعي ': 'Zone Industrielle',
+    'الصمعة ': 'Somaa',
+    'العامره ': 'Amra',
+    'المرازقة ': 'Mrazga',
+    'المزيرعة ': 'Mziraa',
+    'المعمورة ': 'Maamoura',
+    'المعهد النموذجي ': 'Institut Modele',
+    'بئر بورقبة ': 'Bir Bouregba',
+    'براكة الساحل ': 'Baraka Sahel',
+    'بني خيار ': 'Beni Khiar',
+    'بني وائل ': 'Beni Wail',
+    'بوفيشة ': 'Bouficha',
+    'بيوب ': 'Biyoub',
+    'تازركة ': 'Tazarka',
+    'تافرنين ': 'Taferinine',
+    'تونس ': 'Tunis',
+    'جبنون ': 'Jebnoun',
+    'حتوس ': 'Htous',
+    'حمام بنت الجديدي ': 'Hammam Bent Jdidi',
+    'دار شعبان ': 'Dar Chaabane',
+    'دار شعبان الفهري ': 'Dar Chaabane Fehri',
+    'ديار بن سالم ': 'Diar Ben Salem',
+    'سيدي الجديدي ': 'Sidi Jdidi',
+    'قرمبالية ': 'Korba',
+    'مبيتات طريق تونس ': 'Mabitat Route Tunis',
+    'مزنين ': 'Mznine',
+    'نابل ': 'Nabeul',
+    'نابل الورشة ': 'Nabeul Atelier',
+    'نابل الورشه ': 'Nabeul Atelier',
+    'واد الزيت ': 'Oued Zeit',
+    'ياسمين الحمامات ': 'Yasmine Hammamet'
+}
+
+DAY_TRANSLATIONS = {
+    # Arabic to French
+    'إثنين': 'Lundi',
+    'ثلاثاء': 'Mardi',
+    'اربعاء': 'Mercredi',
+    'خميس': 'Jeudi',
+    'جمعة': 'Vendredi',
+    'سبت': 'Samedi',
+    'أحد': 'Dimanche'
+}
+
+# Reverse translations (French to Arabic) for internal processing
+STATION_REVERSE = {v: k for k, v in STATION_TRANSLATIONS.items()}
+DAY_REVERSE = {v: k for k, v in DAY_TRANSLATIONS.items()}
+
+# Season translations (Arabic database seasons to French/English)
+SEASON_TRANSLATIONS = {
+    'الصيفي': 'Summer',
+    'صيفي': 'Summer',
+    'الشتوي': 'Winter',
+    'الشتوي ': 'Winter',  # With space
+    'شتوي': 'Winter',
+    'رمضان': 'Ramadan'
+}
+
+SEASON_REVERSE = {v: k for k, v in SEASON_TRANSLATIONS.items()}
+
+def translate_station_to_french(arabic_name):
+    """Translate Arabic station name to French with case-insensitive matching"""
+    # Try direct lookup first
+    result = STATION_TRANSLATIONS.get(arabic_name, None)
+    if result is not None:
+        return result
+    
+    # Try case-insensitive lookup with normalized whitespace
+    arabic_normalized = arabic_name.strip()
+    for key, value in STATION_TRANSLATIONS.items():
+        if key.strip() == arabic_normalized:
+            return value
+    
+    # Return original if no match found
+    return arabic_name
+
+def translate_station_to_arabic(french_name):
+    """Translate French station name to Arabic for data lookup with case-insensitive matching"""
+    # Try direct lookup first
+    result = STATION_REVERSE.get(french_name, None)
+    if result is not None:
+        return result
+    
+    # Try case-insensitive lookup
+    french_normalized = french_name.strip().lower()
+    for key, value in STATION_REVERSE.items():
+        if key.lower() == french_normalized:
+            return value
+    
+    # Return original if no match found
+    return french_name
+
+def match_station_name(all_stations, station_name):
+    """Find the station in ``all_stations`` matching a name and report the path: 'exact', 'partial', 'fuzzy' or None"""
+    # Normalize input station name (strip whitespace and convert to lowercase)
+    station_normalized = station_name.strip().lower()
+    
+    # First try exact match (case insensitive)
+    for station in all_stations:
+        if station.strip().lower() == station_normalized:
+            return station, 'exact'
+    
+    # Try partial match (case insensitive)
+    for station in all_stations:
+        if station_normalized in station.strip().lower() or station.strip().lower() in station_normalized:
+            return station, 'partial'
+    
+    # Try fuzzy matching for possible misspellings
+    best_match = None
+    best_score = 0
+    
+    for station in all_stations:
+        # Calculate similarity score based on character overlap
+        station_lower = station.strip().lower()
+        
+        # Skip very short strings to avoid false positives
+        if len(station_lower) < 3 or len(station_normalized) < 3:
+            continue
+            
+        # Simple character-based similarity
+        common_chars = set(station_lower) & set(station_normalized)
+        similarity = len(common_chars) / max(len(set(station_lower)), len(set(station_normalized)))
+        
+        # Check for common prefixes (weighted more heavily)
+        prefix_length = 0
+        for i in range(min(len(station_lower), len(station_normalized))):
+            if station_lower[i] == station_normalized[i]:
+                prefix_length += 1
+            else:
+                break
+        
+        # Calculate prefix score (0-1)
+        prefix_score = prefix_length / min(len(station_lower), len(station_normalized)) if min(len(station_lower), len(station_normalized)) > 0 else 0
+        
+        # Combined score (weighted more towards prefix matching)
+        score = (similarity * 0.4) + (prefix_score * 0.6)
+        
+        # Update best match if this score is better
+        if score > best_score and score > 0.5:  # Threshold to avoid poor matches
+            best_score = score
+            best_match = station
+    
+    return best_match, ('fuzzy' if best_match is not None else None)
+
+def translate_day_to_french(arabic_day):
+    """Translate Arabic day to French"""
+    return DAY_TRANSLATIONS.get(arabic_day, arabic_day)
+
+def translate_day_to_arabic(french_day):
+    """Translate French day to Arabic for data lookup"""
+    return DAY_REVERSE.get(french_day, french_day)
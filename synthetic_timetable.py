@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Synthetic Timetable Generator
+Writes SRTGN-style timetables (same column schema) at arbitrary scale for benchmarks
+
+Usage:
+    python synthetic_timetable.py --stations 760 --hubs 40 --out synthetic_10x.xlsx
+    python synthetic_timetable.py --stations 7600 --hubs 400 --out synthetic_100x.parquet
+"""
+
+import argparse
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Day columns in the order used by the source file
+DAY_COLUMNS = ['أحد', 'سبت', 'جمعة', 'خميس', 'اربعاء', 'ثلاثاء', 'إثنين']
+
+# Share of trips running on each day (weekdays always run)
+DAY_SERVICE_SHARE = {
+    'أحد': 0.3, 'سبت': 0.75, 'جمعة': 0.8,
+    'خميس': 1.0, 'اربعاء': 1.0, 'ثلاثاء': 1.0, 'إثنين': 1.0
+}
+
+# Column order of the source Excel file (the departure header has a leading space there too)
+COLUMNS = DAY_COLUMNS + [
+    'اتجاه السفرة', 'الكلم', 'المدة', 'محطة الوصول', ' ساعة الإنطلاق',
+    'محطة الانطلاق', 'نوع الخدمة', 'الموسم', 'السفرة', 'الخط ', 'الفرع', 'المنطقة'
+]
+
+DEFAULT_SEASONS = ('الصيفي', 'الشتوي', 'رمضان')
+
+
+def station_name(index: int) -> str:
+    """Synthetic station name; zero padded so no name is a substring of another"""
+    return f"محطة {index:05d}"
+
+
+def format_minutes(minutes: int) -> str:
+    """Format minutes as HH:MM like the source file"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_timetable(n_stations: int = 76, n_hubs: int = 4, hubs_per_station: int = 1,
+                       local_links: float = 0.3, trips_per_link: float = 3.5,
+                       seasons: Sequence[str] = DEFAULT_SEASONS, luxe_share: float = 0.07,
+                       first_departure: int = 5 * 60, last_departure: int = 21 * 60,
+                       seed: int = 0) -> pd.DataFrame:
+    """Generate a timetable with a hub-and-spoke network
+
+    Every non-hub station is linked both ways to ``hubs_per_station`` hubs, hubs are
+    fully interconnected, and ``local_links`` extra links per station join neighbouring
+    stations. Each directed link gets on average ``trips_per_link`` trips per season.
+    The defaults produce roughly the size of the SRTGN dataset.
+    """
+    if n_hubs < 1 or n_hubs > n_stations:
+        raise ValueError("n_hubs must be between 1 and n_stations")
+
+    rng = np.random.default_rng(seed)
+    hubs = np.arange(n_hubs)
+
+    links = set()
+    for a in hubs:
+        for b in hubs:
+            if a != b:
+                links.add((int(a), int(b)))
+
+    for station in range(n_hubs, n_stations):
+        for hub in rng.choice(hubs, size=min(hubs_per_station, n_hubs), replace=False):
+            links.add((station, int(hub)))
+            links.add((int(hub), station))
+
+    if n_stations - n_hubs > 1:
+        n_local = int(round(local_links * n_stations))
+        for station in rng.integers(n_hubs, n_stations, size=n_local):
+            station = int(station)
+            neighbour = station + int(rng.choice([-1, 1]))
+            if n_hubs <= neighbour < n_stations:
+                links.add((station, neighbour))
+                links.add((neighbour, station))
+
+    links = sorted(links)
+    base_durations = rng.integers(10, 121, size=len(links))
+
+    rows = []
+    trip_number = 0
+    for link_index, (origin, destination) in enumerate(links):
+        line_code = f"{900 + link_index // 100}-{link_index % 100:02d}"
+        direction = 'ذهاب' if origin < destination else 'إياب'
+        base_duration = int(base_durations[link_index])
+
+        for season in seasons:
+            n_trips = max(1, int(rng.poisson(trips_per_link)))
+            departures = rng.integers(first_departure // 5, last_departure // 5 + 1, size=n_trips) * 5
+            durations = np.maximum(5, base_duration + rng.integers(-2, 3, size=n_trips) * 5)
+            is_luxe = rng.random(n_trips) < luxe_share
+            day_draws = rng.random((n_trips, len(DAY_COLUMNS)))
+
+            for i in range(n_trips):
+                trip_number += 1
+                row = {
+                    day: ('X' if day_draws[i, d] < DAY_SERVICE_SHARE[day] else None)
+                    for d, day in enumerate(DAY_COLUMNS)
+                }
+                row.update({
+                    'اتجاه السفرة': direction,
+                    'الكلم': float(round(int(durations[i]) * 0.9)),
+                    'المدة': format_minutes(int(durations[i])),
+                    'محطة الوصول': station_name(destination),
+                    ' ساعة الإنطلاق': format_minutes(int(departures[i])),
+                    'محطة الانطلاق': station_name(origin),
+                    'نوع الخدمة': 'رفاهة' if is_luxe[i] else 'عادية',
+                    'الموسم': season,
+                    'السفرة': float(trip_number),
+                    'الخط ': line_code,
+                    'الفرع': 'فرع اصطناعي',
+                    'المنطقة': 'المنطقة الاصطناعية'
+                })
+                rows.append(row)
+
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def write_timetable(df: pd.DataFrame, path: str) -> str:
+    """Write a generated timetable as Excel (.xlsx) or Parquet (.parquet)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    elif path.endswith('.xlsx'):
+        df.to_excel(path, index=False)
+    else:
+        raise ValueError(f"Unsupported timetable format: {path} (use .xlsx or .parquet)")
+    return path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SRTGN-style timetable")
+    parser.add_argument('--stations', type=int, default=76, help="Number of stations")
+    parser.add_argument('--hubs', type=int, default=4, help="Number of hub stations")
+    parser.add_argument('--hubs-per-station', type=int, default=1, help="Hubs each station connects to")
+    parser.add_argument('--local-links', type=float, default=0.3, help="Extra neighbour links per station")
+    parser.add_argument('--trips-per-link', type=float, default=3.5, help="Mean trips per link and season")
+    parser.add_argument('--seasons', nargs='+', default=list(DEFAULT_SEASONS), help="Season labels (Arabic)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--out', required=True, help="Output file (.xlsx or .parquet)")
+    args = parser.parse_args(argv)
+
+    df = generate_timetable(
+        n_stations=args.stations, n_hubs=args.hubs, hubs_per_station=args.hubs_per_station,
+        local_links=args.local_links, trips_per_link=args.trips_per_link,
+        seasons=args.seasons, seed=args.seed
+    )
+    write_timetable(df, args.out)
+    print(f"✅ Wrote {len(df)} trips between {args.stations} stations to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
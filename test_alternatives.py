@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the alternatives search (meaningfully different journeys)
+
+Run with ``python -m pytest`` or directly from the repository root (next to
+the timetable file).
+"""
+
+from timetable_engine import DEPARTURE_BANDS, TimetableEngine
+
+DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+
+# Pairs with direct trips in several bands and transfers via more than one station
+QUERIES = [
+    {'origin_french': 'Hammamet', 'destination_french': 'Baraka Sahel'},
+    {'origin_french': 'Nabeul', 'destination_french': 'Tunis'},
+    {'origin_french': 'Nabeul', 'destination_french': 'Tunis', 'preferred_time': '10:00'},
+    {'origin_french': 'Baraka Sahel', 'destination_french': 'Bir Bouregba', 'preferred_time': '06:00',
+     'preferred_day': 'Lundi'},
+]
+
+_engine = None
+
+
+def engine() -> TimetableEngine:
+    global _engine
+    if _engine is None:
+        _engine = TimetableEngine.load(DATA_FILE)
+    return _engine
+
+
+def minutes(time_str: str) -> int:
+    hours, mins = time_str.split(':')
+    return int(hours) * 60 + int(mins)
+
+
+def test_no_alternative_dominates_another():
+    """Within a route and service type, no journey leaves no earlier and arrives no later than another"""
+    for query in QUERIES:
+        alternatives = engine().alternatives(**query, k=20)
+        assert alternatives, query
+        for first in alternatives:
+            for second in alternatives:
+                if first is second or (first['route_details'], first['service_type']) != \
+                        (second['route_details'], second['service_type']):
+                    continue
+                depart_first, depart_second = minutes(first['departure_time']), minutes(second['departure_time'])
+                assert not (depart_first >= depart_second and
+                            depart_first + first['duration'] <= depart_second + second['duration']), (query, first, second)
+
+
+def test_one_journey_per_route_band_and_service():
+    for query in QUERIES:
+        alternatives = engine().alternatives(**query, k=20)
+        signatures = [(alt['route_details'], alt['departure_band'], alt['service_type']) for alt in alternatives]
+        assert len(signatures) == len(set(signatures)), query
+
+
+def test_preferred_time_and_k_bound_the_results():
+    query = QUERIES[2]
+    alternatives = engine().alternatives(**query, k=20)
+    assert all(minutes(alt['departure_time']) >= minutes(query['preferred_time']) for alt in alternatives)
+    assert engine().alternatives(**query, k=1) == alternatives[:1]
+    assert engine().alternatives(**query, k=0) == []
+
+
+def test_departure_bands_are_distinct():
+    """Journeys around midnight fall in different bands"""
+    labels = [label for _, label in DEPARTURE_BANDS]
+    assert len(labels) == len(set(labels))
+    assert TimetableEngine.departure_band(4 * 60 + 30) == 'late night'
+    assert TimetableEngine.departure_band(23 * 60 + 30) == 'night'
+    assert TimetableEngine.departure_band(24 * 60 + 6 * 60) == 'early morning'
+
+
+if __name__ == "__main__":
+    test_no_alternative_dominates_another()
+    test_one_journey_per_route_band_and_service()
+    test_preferred_time_and_k_bound_the_results()
+    test_departure_bands_are_distinct()
+    print("🎉 ALL TESTS PASSED!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the cyclic departure clock (cyclic_time.py)
+
+Run with ``python -m pytest`` or directly from the repository root.
+"""
+
+from cyclic_time import DAY_MINUTES, WEEK_MINUTES, CyclicTimetable
+
+# Three trips between stations 1 and 2 and one from 2 to 3:
+# (origin, destination, duration) by trip index
+ORIGINS = [1, 1, 1, 2]
+DESTINATIONS = [2, 2, 2, 3]
+DURATIONS = [30, 20, 45, 15]
+
+
+def daily_timetable() -> CyclicTimetable:
+    """Trips 0 and 1 leave at 08:00 (trip 1 is shorter), trip 2 at 22:00, trip 3 at 06:00"""
+    departures = [(8 * 60, 0), (8 * 60, 1), (22 * 60, 2), (6 * 60, 3)]
+    return CyclicTimetable(DAY_MINUTES, departures, ORIGINS, DESTINATIONS, DURATIONS)
+
+
+def test_following_wraps_past_midnight():
+    """After the last departure of the day the next one is the first of the following day"""
+    cycle = daily_timetable()
+    following = list(cycle.following(1, 2, 23 * 60))
+    assert following == [(DAY_MINUTES + 8 * 60, 1), (DAY_MINUTES + 8 * 60, 0), (DAY_MINUTES + 22 * 60, 2)]
+
+
+def test_following_keeps_the_unwrapped_clock():
+    """Times count from the same origin as the start, so they never decrease"""
+    cycle = daily_timetable()
+    start = 3 * DAY_MINUTES + 9 * 60
+    times = [time_ for time_, _ in cycle.following(1, 2, start)]
+    assert times == sorted(times)
+    assert times[0] == 3 * DAY_MINUTES + 22 * 60
+    assert all(start <= time_ < start + DAY_MINUTES for time_ in times)
+
+
+def test_equal_departures_put_the_shortest_trip_first():
+    cycle = daily_timetable()
+    assert next(cycle.following(1, 2, 0)) == (8 * 60, 1)
+    assert cycle.shortest[(1, 2)] == 20
+
+
+def test_next_service_day_stops_at_the_day_boundary():
+    """Only departures of the first day that has any are returned, up to the limit"""
+    cycle = daily_timetable()
+    assert cycle.next_service_day(1, 2, DAY_MINUTES, limit=10) == [
+        (DAY_MINUTES + 8 * 60, 1), (DAY_MINUTES + 8 * 60, 0), (DAY_MINUTES + 22 * 60, 2)
+    ]
+    assert cycle.next_service_day(1, 2, DAY_MINUTES, limit=1) == [(DAY_MINUTES + 8 * 60, 1)]
+
+
+def test_weekly_clock_skips_days_without_service():
+    """A trip running only on Friday is next found on Friday when searching from Saturday"""
+    friday = 4 * DAY_MINUTES
+    cycle = CyclicTimetable(WEEK_MINUTES, [(friday + 6 * 60, 3)], ORIGINS, DESTINATIONS, DURATIONS)
+    saturday = 5 * DAY_MINUTES
+    assert next(cycle.following(2, 3, saturday)) == (WEEK_MINUTES + friday + 6 * 60, 3)
+
+
+def test_pairs_without_departures_yield_nothing():
+    cycle = daily_timetable()
+    assert list(cycle.following(3, 1, 0)) == []
+    assert cycle.next_service_day(3, 1, 0, limit=5) == []
+
+
+if __name__ == "__main__":
+    test_following_wraps_past_midnight()
+    test_following_keeps_the_unwrapped_clock()
+    test_equal_departures_put_the_shortest_trip_first()
+    test_next_service_day_stops_at_the_day_boundary()
+    test_weekly_clock_skips_days_without_service()
+    test_pairs_without_departures_yield_nothing()
+    print("🎉 ALL TESTS PASSED!")
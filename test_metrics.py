@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the Prometheus metrics (registry rendering and /metrics labels)
+
+Run with ``python -m pytest`` or directly from the repository root (next to
+the timetable file).
+"""
+
+from fastapi.testclient import TestClient
+
+from api_main import app
+from metrics import REQUEST_LATENCY, STAGE_LATENCY, MetricsRegistry
+
+RECOMMENDATION_PARAMS = {'origin': 'Nabeul', 'destination': 'Tunis', 'preferred_time': '08:00'}
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo latency', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route='/a')
+    histogram.observe(0.5, route='/a')
+    histogram.observe(2.0, route='/a')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP demo_seconds Demo latency', '# TYPE demo_seconds histogram']
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert histogram.get_count(route='/a') == 3
+
+
+def test_metrics_label_requests_by_route_template_and_stage():
+    """Requests are labelled by their route, not the raw URL, and each stage is timed"""
+    with TestClient(app) as client:
+        before = REQUEST_LATENCY.get_count(method='GET', route='/recommendations', status='200')
+        stages_before = STAGE_LATENCY.get_count(stage='station_resolution')
+        assert client.get('/recommendations', params=RECOMMENDATION_PARAMS).status_code == 200
+        assert client.get('/no-such-route').status_code == 404
+        body = client.get('/metrics').text
+
+    assert REQUEST_LATENCY.get_count(method='GET', route='/recommendations', status='200') == before + 1
+    assert STAGE_LATENCY.get_count(stage='station_resolution') == stages_before + 1
+    assert 'route="/recommendations"' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'Nabeul' not in body
+    for stage in ('station_resolution', 'direct_filter', 'transfer_search', 'scoring'):
+        assert f'stage="{stage}"' in body
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_metrics_label_requests_by_route_template_and_stage()
+    print("🎉 ALL TESTS PASSED!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Regression tests for transfer searches that roll over to the next service day
+
+A late query whose first legs come from the next service day must not return
+journeys that wait days for their second leg. Run with ``python -m pytest`` or
+directly from the repository root (next to the timetable file).
+"""
+
+import os
+import tempfile
+
+from cyclic_time import DAY_MINUTES
+from fast_query import FastTimetable, build_snapshot
+from timetable_engine import TimetableEngine
+
+DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+
+# Late Friday query: the next service day's 06:45 bus to Beni Wail misses its
+# connection, and the next second leg only leaves on Monday
+LATE_FRIDAY_QUERY = {'origin_french': 'Baraka Sahel', 'destination_french': 'Bir Bouregba',
+                     'preferred_time': '22:00', 'preferred_day': 'Vendredi'}
+
+_engine = None
+_fast = None
+
+
+def engine() -> TimetableEngine:
+    global _engine
+    if _engine is None:
+        _engine = TimetableEngine.load(DATA_FILE)
+    return _engine
+
+
+def fast_timetable() -> FastTimetable:
+    global _fast
+    if _fast is None:
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            snapshot = os.path.join(snapshot_dir, "timetable.snap")
+            build_snapshot(DATA_FILE, snapshot)
+            _fast = FastTimetable.load(snapshot)
+    return _fast
+
+
+def transfer_waits(recommendations):
+    return [(rec['route_details'], rec['total_duration'], rec['transfer_details']['waiting_time'])
+            for rec in recommendations if rec['type'] == 'transfer']
+
+
+def test_late_friday_transfer_connects_the_next_service_day():
+    """Baraka Sahel → Bir Bouregba at 22:00 on Friday only offers same-day connections"""
+    recommendations = engine().recommend(**LATE_FRIDAY_QUERY)
+    transfers = transfer_waits(recommendations)
+    assert transfers, "expected the Mziraa connection on Saturday morning"
+    for route, total_duration, waiting_time in transfers:
+        assert waiting_time < DAY_MINUTES, f"{route} waits {waiting_time} min"
+        assert total_duration < DAY_MINUTES, f"{route} takes {total_duration} min"
+    assert not any('Beni Wail' in route for route, _, _ in transfers)
+
+
+def test_late_transfer_without_day_stays_within_a_day():
+    """The same pair with no weekday never waits a whole day for its second leg"""
+    query = dict(LATE_FRIDAY_QUERY, preferred_day=None)
+    for route, total_duration, waiting_time in transfer_waits(engine().recommend(**query)):
+        assert total_duration < DAY_MINUTES, f"{route} takes {total_duration} min"
+        assert 'Beni Wail' not in route
+
+
+def test_fast_query_matches_engine_on_late_friday_transfer():
+    """The pandas-free path applies the same next-service-day rule"""
+    fields = ['type', 'departure_time', 'total_duration', 'route_details']
+    expected = [{field: rec[field] for field in fields} for rec in engine().recommend(**LATE_FRIDAY_QUERY)]
+    actual = [{field: rec[field] for field in fields} for rec in fast_timetable().recommend(**LATE_FRIDAY_QUERY)]
+    assert actual == expected
+
+
+if __name__ == "__main__":
+    test_late_friday_transfer_connects_the_next_service_day()
+    test_late_transfer_without_day_stays_within_a_day()
+    test_fast_query_matches_engine_on_late_friday_transfer()
+    print("🎉 ALL TESTS PASSED!")
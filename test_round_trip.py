@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Regression tests for round-trip itineraries (outbound plus return on the same service day)
+
+Run with ``python -m pytest`` or directly from the repository root (next to
+the timetable file).
+"""
+
+from timetable_engine import TimetableEngine
+
+DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+
+ROUND_TRIP_QUERY = {'origin_french': 'Hammamet', 'destination_french': 'Baraka Sahel', 'preferred_time': '06:00'}
+
+_engine = None
+
+
+def engine() -> TimetableEngine:
+    global _engine
+    if _engine is None:
+        _engine = TimetableEngine.load(DATA_FILE)
+    return _engine
+
+
+def minutes(time_str: str) -> int:
+    hours, mins = time_str.split(':')
+    return int(hours) * 60 + int(mins)
+
+
+def legs(itinerary):
+    """(outbound arrival, return departure, return arrival) in minutes from midnight"""
+    outbound, back = itinerary['outbound'], itinerary['return_journey']
+    return_depart = minutes(back['departure_time'])
+    return (minutes(outbound['departure_time']) + outbound['total_duration'],
+            return_depart, return_depart + back['duration'])
+
+
+def test_return_leaves_after_arrival_and_stay():
+    for min_stay in (0, 60, 240):
+        itineraries = engine().round_trip(**ROUND_TRIP_QUERY, min_stay_minutes=min_stay)
+        assert itineraries, min_stay
+        for itinerary in itineraries:
+            arrival, return_depart, _ = legs(itinerary)
+            assert return_depart >= arrival + min_stay
+            assert itinerary['stay_minutes'] == return_depart - arrival
+
+
+def test_return_time_and_return_by_are_respected():
+    itineraries = engine().round_trip(**ROUND_TRIP_QUERY, return_time='15:00')
+    assert itineraries and all(legs(itinerary)[1] >= minutes('15:00') for itinerary in itineraries)
+
+    itineraries = engine().round_trip(**ROUND_TRIP_QUERY, min_stay_minutes=240, return_by='20:00')
+    assert itineraries and all(legs(itinerary)[2] <= minutes('20:00') for itinerary in itineraries)
+
+    # No return arrives by 07:30 after a one-hour stay
+    assert engine().round_trip(**ROUND_TRIP_QUERY, min_stay_minutes=60, return_by='07:30') == []
+
+
+def test_round_trip_with_a_transfer_back():
+    """Nabeul → Hammamet for a day: the return connects at Cite Universitaire"""
+    itineraries = engine().round_trip('Nabeul', 'Hammamet', preferred_time='07:00', preferred_day='Lundi',
+                                      preferred_season='Summer', min_stay_minutes=240, return_by='20:00')
+    assert len(itineraries) == 1
+    itinerary = itineraries[0]
+    back = itinerary['return_journey']
+    assert (back['departure_time'], back['arrival_time']) == ('12:05', '16:45')
+    assert back['transfer_details']['transfer_station'] == 'Cite Universitaire'
+    assert itinerary['stay_minutes'] == 290
+    assert itinerary['total_duration'] == 295
+
+
+if __name__ == "__main__":
+    test_return_leaves_after_arrival_and_stay()
+    test_return_time_and_return_by_are_respected()
+    test_round_trip_with_a_transfer_back()
+    print("🎉 ALL TESTS PASSED!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the precomputed service calendar (weekday and season of a date)
+
+Run with ``python -m pytest`` or directly from the repository root.
+"""
+
+from datetime import date
+
+from service_calendar import ServiceCalendar, ramadan_dates, resolve_travel_date, season_of
+
+
+def test_ramadan_dates_of_1446_and_1447():
+    """Tabular Hijri calendar: Ramadan 1446 and 1447"""
+    assert ramadan_dates(1446) == (date(2025, 3, 1), date(2025, 3, 30))
+    assert ramadan_dates(1447) == (date(2026, 2, 18), date(2026, 3, 19))
+
+
+def test_calendar_switches_season_at_ramadan_bounds():
+    """The day before and after Ramadan fall back to the month's season"""
+    calendar = ServiceCalendar(2025, 2026)
+    assert calendar.lookup(date(2025, 2, 28)) == ('Vendredi', 'Winter')
+    assert calendar.lookup(date(2025, 3, 1)) == ('Samedi', 'Ramadan')
+    assert calendar.lookup(date(2025, 3, 30)) == ('Dimanche', 'Ramadan')
+    assert calendar.lookup(date(2025, 3, 31)) == ('Lundi', 'Winter')
+    assert calendar.lookup('2026-02-18') == ('Mercredi', 'Ramadan')
+    assert calendar.lookup('2026-03-20') == ('Vendredi', 'Winter')
+    assert calendar.lookup('2025-07-14') == ('Lundi', 'Summer')
+
+
+def test_calendar_matches_direct_computation():
+    """Every precomputed entry agrees with season_of"""
+    calendar = ServiceCalendar(2025, 2026)
+    day = date(2025, 1, 1)
+    while day.year < 2027:
+        assert calendar.lookup(day)[1] == season_of(day), day.isoformat()
+        day = date.fromordinal(day.toordinal() + 1)
+
+
+def test_ramadan_overrides_replace_the_tabular_dates():
+    """Announced dates (e.g. Eid a day earlier) override the tabular ones"""
+    calendar = ServiceCalendar(2025, 2025, ramadan_overrides={1446: (date(2025, 3, 1), date(2025, 3, 29))})
+    assert calendar.lookup('2025-03-29')[1] == 'Ramadan'
+    assert calendar.lookup('2025-03-30')[1] == 'Winter'
+
+
+def test_dates_outside_the_calendar_are_rejected():
+    calendar = ServiceCalendar(2025, 2025)
+    for outside in ('2024-12-31', '2026-01-01'):
+        try:
+            calendar.lookup(outside)
+        except ValueError:
+            continue
+        raise AssertionError(f"{outside} should be outside the calendar")
+
+
+def test_explicit_day_and_season_win_over_the_travel_date():
+    calendar = ServiceCalendar(2025, 2025)
+    assert resolve_travel_date('2025-03-01', None, None, calendar) == ('Samedi', 'Ramadan')
+    assert resolve_travel_date('2025-03-01', 'Lundi', None, calendar) == ('Lundi', 'Ramadan')
+    assert resolve_travel_date(None, None, 'Summer', calendar) == (None, 'Summer')
+
+
+if __name__ == "__main__":
+    test_ramadan_dates_of_1446_and_1447()
+    test_calendar_switches_season_at_ramadan_bounds()
+    test_calendar_matches_direct_computation()
+    test_ramadan_overrides_replace_the_tabular_dates()
+    test_dates_outside_the_calendar_are_rejected()
+    test_explicit_day_and_season_win_over_the_travel_date()
+    print("🎉 ALL TESTS PASSED!")
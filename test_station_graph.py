@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the station graph built at load (direct neighbours,
+one-transfer stations and per-day connected components)
+
+Run with ``python -m pytest`` or directly from the repository root (next to
+the timetable file).
+"""
+
+import random
+
+import numpy as np
+
+from timetable_engine import TimetableEngine, station_connectivity
+
+DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+
+# Trips 0 → 1 → 2 and 0 → 3 → 2 run on day A; 4 → 5 only on day B
+ORIGINS = [0, 1, 0, 3, 4]
+DESTINATIONS = [1, 2, 3, 2, 5]
+DAY_BITS = np.array([[0b01], [0b01], [0b01], [0b01], [0b10]], dtype=np.uint8)
+
+
+def brute_force_transfers(origin_ids, destination_ids):
+    """Every (origin, destination) pair with the stations reached from one and reaching the other"""
+    successors, predecessors = {}, {}
+    for origin, destination in zip(origin_ids, destination_ids):
+        successors.setdefault(origin, set()).add(destination)
+        predecessors.setdefault(destination, set()).add(origin)
+    transfers = {}
+    for origin in successors:
+        for destination in predecessors:
+            stations = successors[origin] & predecessors[destination]
+            if stations:
+                transfers[(origin, destination)] = frozenset(stations)
+    return transfers
+
+
+def test_transfer_stations_of_a_small_graph():
+    connectivity = station_connectivity(ORIGINS, DESTINATIONS, DAY_BITS, ['A', 'B'])
+    assert connectivity['transfer_stations'] == {(0, 2): frozenset({1, 3})}
+    assert connectivity['successors'][0] == frozenset({1, 3})
+    assert connectivity['predecessors'][2] == frozenset({1, 3})
+
+
+def test_components_per_day_ignore_direction():
+    components = station_connectivity(ORIGINS, DESTINATIONS, DAY_BITS, ['A', 'B'])['components']
+    assert components['A'] == {0: 0, 1: 0, 2: 0, 3: 0}
+    assert components['B'] == {4: 4, 5: 4}
+    assert components[None][5] == 4 and components[None][2] == 0
+
+
+def test_transfer_stations_match_brute_force():
+    """Only two-hop pairs are intersected, yet no pair with a transfer station is missed"""
+    rng = random.Random(7)
+    for _ in range(50):
+        trips = rng.randint(1, 30)
+        origin_ids = [rng.randrange(8) for _ in range(trips)]
+        destination_ids = [rng.randrange(8) for _ in range(trips)]
+        day_bits = np.ones((trips, 1), dtype=np.uint8)
+        connectivity = station_connectivity(origin_ids, destination_ids, day_bits, ['A'])
+        assert connectivity['transfer_stations'] == brute_force_transfers(origin_ids, destination_ids)
+
+
+def test_unreachable_pair_returns_no_recommendations():
+    engine = TimetableEngine.load(DATA_FILE)
+    nabeul, hammamet = engine.resolve_pair('Nabeul', 'Hammamet')
+    assert engine.reachable(engine.station_id(nabeul), engine.station_id(hammamet))
+    nabeul, atrach = engine.resolve_pair('Nabeul', 'Atrach')
+    assert not engine.reachable(engine.station_id(nabeul), engine.station_id(atrach))
+    assert engine.recommend(origin_french='Nabeul', destination_french='Atrach') == []
+
+
+if __name__ == "__main__":
+    test_transfer_stations_of_a_small_graph()
+    test_components_per_day_ignore_direction()
+    test_transfer_stations_match_brute_force()
+    test_unreachable_pair_returns_no_recommendations()
+    print("🎉 ALL TESTS PASSED!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Regression tests for collapsing repeated timetable rows into canonical trips
+
+Run with ``python -m pytest`` or directly from the repository root (next to
+the timetable file).
+"""
+
+import pandas as pd
+
+from timetable_engine import SEASON_PRESENT_BIT, TRIP_KEY_COLUMNS, TimetableEngine, canonical_trips
+
+DATA_FILE = "horaires-des-bus-de-la-srtgn.xlsx"
+
+MONDAY, FRIDAY = 'إثنين', 'جمعة'
+
+
+def sample_rows() -> pd.DataFrame:
+    """One trip listed for two seasons and under two spellings, plus a distinct later trip"""
+    rows = [
+        # spelling, season, Monday, Friday, departure
+        ('نابل', 'شتوي', 'X', None, 420),
+        ('نابل', 'صيفي', None, 'X', 420),
+        ('نابل ', 'صيفي', 'X', None, 420),
+        ('نابل', 'شتوي', 'X', 'X', 480),
+    ]
+    return pd.DataFrame({
+        'محطة الانطلاق': [spelling for spelling, *_ in rows],
+        'محطة الوصول': ['الحمامات'] * len(rows),
+        'origin_id': [1] * len(rows),
+        'destination_id': [2] * len(rows),
+        'depart_min': [departure for *_, departure in rows],
+        'نوع الخدمة': ['عادي'] * len(rows),
+        'durée_min': [30] * len(rows),
+        'الموسم': [season for _, season, *_ in rows],
+        MONDAY: [monday for _, _, monday, _, _ in rows],
+        FRIDAY: [friday for _, _, _, friday, _ in rows],
+    })
+
+
+def test_rows_sharing_the_trip_key_are_one_trip():
+    canonical = canonical_trips(sample_rows())
+    assert canonical['trip_of_row'].tolist() == [0, 0, 0, 1]
+    assert canonical['first_rows'].tolist() == [0, 3]
+    assert canonical['report']['duplicate_rows'] == 2
+    assert canonical['report']['multi_season_trips'] == 1
+    assert canonical['report']['largest_group'] == 3
+
+
+def test_day_bits_merge_the_days_of_every_row_per_season():
+    """Bit i is day_columns[i]; each season keeps its own days"""
+    canonical = canonical_trips(sample_rows())
+    assert canonical['day_columns'] == [MONDAY, FRIDAY]
+    winter, summer = canonical['season_codes']['شتوي'], canonical['season_codes']['صيفي']
+    day_bits = canonical['day_bits']
+    assert day_bits[0, winter] == SEASON_PRESENT_BIT | 0b01
+    assert day_bits[0, summer] == SEASON_PRESENT_BIT | 0b11
+    assert day_bits[1, winter] == SEASON_PRESENT_BIT | 0b11
+    assert day_bits[1, summer] == 0
+
+
+def test_timetable_trips_have_unique_keys():
+    """The loaded timetable keeps one row per trip key"""
+    engine = TimetableEngine.load(DATA_FILE)
+    report = engine.dedup_report
+    assert report['trips'] == len(engine.trips) < report['rows']
+    assert not engine.trips.duplicated(subset=TRIP_KEY_COLUMNS).any()
+
+
+if __name__ == "__main__":
+    test_rows_sharing_the_trip_key_are_one_trip()
+    test_day_bits_merge_the_days_of_every_row_per_season()
+    test_timetable_trips_have_unique_keys()
+    print("🎉 ALL TESTS PASSED!")
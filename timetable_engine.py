@@ -0,0 +1,1595 @@
+"""
+Timetable Engine
+Shared loading, station matching, filtering, transfer search and scoring used
+by both the API service (bus_service.py) and the CLI (bus_recommendations.py)
+"""
+
+import os
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bus_recommendations import (
+    DAY_TRANSLATIONS, DAY_REVERSE, SEASON_TRANSLATIONS,
+    translate_station_to_french, translate_station_to_arabic,
+    find_matching_station_with_method, get_available_seasons_from_data
+)
+from cyclic_time import DAY_MINUTES, WEEK_MINUTES, WEEKDAYS, CyclicTimetable
+from metrics import STATION_RESOLUTION_LATENCY, timed_stage, trace_note
+from scoring_rules import (
+    parse_preferred_time, time_proximity, hour_score, service_score,
+    format_time_difference, format_minutes, load_transfer_times, station_transfer_times, transfer_times_path
+)
+
+# Scoring profiles: 'standard' ranks direct and transfer options together (API),
+# 'enhanced' adds the peak-time and efficiency features and only falls back to
+# transfers when there is no direct route (CLI)
+SCORING_PROFILES = ('standard', 'enhanced')
+
+# Bump when preprocessing changes so stale cache files are ignored
+CACHE_VERSION = 2
+CACHE_DIR_NAME = ".timetable_cache"
+
+# Resolved station names kept per engine; the cache is cleared when it fills up
+STATION_CACHE_SIZE = 4096
+
+# Rows sharing these columns are the same trip and collapse at load
+TRIP_KEY_COLUMNS = ['origin_id', 'destination_id', 'depart_min', 'نوع الخدمة', 'durée_min']
+
+# Day bitmask bit marking that a trip has a row in a season (days use the low bits)
+SEASON_PRESENT_BIT = 1 << 7
+
+# Departure bands telling alternatives apart: (first hour, label), each running to the next
+DEPARTURE_BANDS = [(0, 'late night'), (5, 'early morning'), (8, 'morning'), (12, 'midday'),
+                   (16, 'evening'), (20, 'night')]
+DEPARTURE_BAND_HOURS = [hour for hour, _ in DEPARTURE_BANDS]
+
+# Journeys returned by default by the alternatives search
+DEFAULT_ALTERNATIVES = 5
+
+# Outbound options ranked before pairing round trips (the best paired ones are returned)
+ROUND_TRIP_OUTBOUND_POOL = 20
+
+# Empty position array for stations without trips in a direction
+NO_TRIPS = np.empty(0, dtype=np.intp)
+
+
+def convert_to_minutes(time_obj) -> Optional[int]:
+    """Convert an HH:MM string or a number of minutes to minutes"""
+    if pd.isna(time_obj):
+        return None
+    if isinstance(time_obj, str) and ':' in time_obj:
+        try:
+            h, m = map(int, time_obj.split(':'))
+            return h * 60 + m
+        except:
+            return None
+    elif isinstance(time_obj, (int, float)):
+        return int(time_obj)
+    return None
+
+
+def preprocess_timetable(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean a raw SRTGN timetable and add minute and French name columns"""
+    df.columns = df.columns.str.strip()
+
+    # Clean data
+    if 'Unnamed: 19' in df.columns and 'Unnamed: 20' in df.columns:
+        df.drop(columns=['Unnamed: 19', 'Unnamed: 20'], inplace=True, errors='ignore')
+
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].astype(str).str.strip()
+
+    # Convert time columns
+    df['durée_min'] = df['المدة'].apply(convert_to_minutes)
+    df['depart_min'] = df['ساعة الإنطلاق'].apply(convert_to_minutes)
+    df.dropna(subset=['durée_min', 'depart_min'], inplace=True)
+
+    # Add French translations
+    df['origin_french'] = df['محطة الانطلاق'].apply(translate_station_to_french)
+    df['destination_french'] = df['محطة الوصول'].apply(translate_station_to_french)
+
+    # Canonical station IDs: spellings translating to the same French name are one station
+    stations = sorted(set(df['origin_french']) | set(df['destination_french']))
+    station_ids = {station: station_id for station_id, station in enumerate(stations)}
+    df['origin_id'] = df['origin_french'].map(station_ids).astype('int64')
+    df['destination_id'] = df['destination_french'].map(station_ids).astype('int64')
+    return df
+
+
+def read_timetable(path: str) -> pd.DataFrame:
+    """Read a raw timetable from Excel or Parquet"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Timetable file not found: {path}")
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
+
+def cache_path_for(path: str, cache_dir: Optional[str] = None) -> str:
+    """Cache file for the preprocessed form of a timetable, keyed by its size and mtime"""
+    stat = os.stat(path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    name = os.path.basename(path)
+    return os.path.join(cache_dir, f"{name}.v{CACHE_VERSION}.{stat.st_size}.{stat.st_mtime_ns}.pkl")
+
+
+def load_timetable(path: str, use_cache: bool = True,
+                   cache_dir: Optional[str] = None) -> Tuple[pd.DataFrame, bool]:
+    """Load a preprocessed timetable, from the cache when the source is unchanged
+
+    Returns the frame and whether it came from the cache.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Timetable file not found: {path}")
+
+    cache_file = cache_path_for(path, cache_dir) if use_cache else None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            return pd.read_pickle(cache_file), True
+        except Exception:
+            pass
+
+    df = preprocess_timetable(read_timetable(path))
+
+    if cache_file:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            temp_file = f"{cache_file}.{os.getpid()}.tmp"
+            df.to_pickle(temp_file)
+            os.replace(temp_file, cache_file)
+        except OSError:
+            pass
+    return df, False
+
+
+def canonical_trips(df: pd.DataFrame) -> Dict:
+    """Collapse rows repeating a trip into canonical trips
+
+    Rows sharing TRIP_KEY_COLUMNS (e.g. one row per season, or the same trip
+    stored under two spellings of a station) are the same trip.
+    Returns ``trip_of_row`` (trip index of every row), ``first_rows`` (the row
+    representing each trip, trips numbered in order of first appearance),
+    ``day_columns``, ``season_codes`` (stripped season → column) and ``day_bits``:
+    per trip and season, bit ``i`` is set when a row of the trip in that season
+    runs on ``day_columns[i]`` and SEASON_PRESENT_BIT when the trip has a row in
+    that season. Rows without a season use the last column.
+    """
+    trip_of_row = df.groupby(TRIP_KEY_COLUMNS, sort=False, dropna=False).ngroup().to_numpy()
+    first_rows = np.unique(trip_of_row, return_index=True)[1]
+
+    day_columns = [day for day in DAY_TRANSLATIONS if day in df.columns]
+    row_bits = np.full(len(df), SEASON_PRESENT_BIT, dtype=np.uint8)
+    for bit, day in enumerate(day_columns):
+        runs = (df[day].str.strip() == 'X').to_numpy(dtype=bool, na_value=False)
+        row_bits |= runs.astype(np.uint8) << bit
+
+    season_codes = {}
+    season_of_row = np.zeros(len(df), dtype=np.intp)
+    if 'الموسم' in df.columns:
+        season_of_row, seasons = pd.factorize(df['الموسم'].str.strip())
+        season_codes = {season: code for code, season in enumerate(seasons.tolist())}
+        season_of_row = np.where(season_of_row < 0, len(season_codes), season_of_row)
+
+    day_bits = np.zeros((len(first_rows), len(season_codes) + 1), dtype=np.uint8)
+    np.bitwise_or.at(day_bits, (trip_of_row, season_of_row), row_bits)
+
+    seasons_per_trip = ((day_bits & SEASON_PRESENT_BIT) != 0).sum(axis=1)
+    spellings = set(df['محطة الانطلاق']) | set(df['محطة الوصول'])
+    report = {
+        'station_spellings': len(spellings),
+        'stations': len(set(df['origin_id']) | set(df['destination_id'])),
+        'rows': len(df),
+        'trips': len(first_rows),
+        'duplicate_rows': len(df) - len(first_rows),
+        'multi_season_trips': int((seasons_per_trip > 1).sum()),
+        'largest_group': int(np.bincount(trip_of_row).max()) if len(df) else 0
+    }
+    return {
+        'trip_of_row': trip_of_row,
+        'first_rows': first_rows,
+        'day_columns': day_columns,
+        'season_codes': season_codes,
+        'day_bits': day_bits,
+        'report': report
+    }
+
+
+def station_connectivity(origin_ids: List[int], destination_ids: List[int],
+                         day_bits: np.ndarray, day_columns: List[str]) -> Dict:
+    """Station graph tables of the canonical trips, built once at load
+
+    Returns ``successors`` / ``predecessors`` (station ID → stations reached by
+    or reaching it with a direct trip), ``transfer_stations`` ((origin,
+    destination) → stations connecting them with one transfer, only for pairs
+    that have one) and ``components``: per day column, and under None for any
+    day, the connected component of every station with a trip that day (the
+    smallest station ID in the component, ignoring trip direction).
+    """
+    successors, predecessors = {}, {}
+    for origin, destination in zip(origin_ids, destination_ids):
+        successors.setdefault(origin, set()).add(destination)
+        predecessors.setdefault(destination, set()).add(origin)
+
+    # Only destinations two hops from an origin are intersected, so the cost follows the
+    # pairs that have a transfer station rather than every origin × destination
+    transfer_stations = {}
+    for origin, reached in successors.items():
+        for destination in set().union(*(successors.get(station, ()) for station in reached)):
+            transfer_stations[(origin, destination)] = frozenset(reached & predecessors[destination])
+
+    def components_of(trips: np.ndarray) -> Dict[int, int]:
+        parent = {}
+
+        def root(station):
+            while parent[station] != station:
+                parent[station] = parent[parent[station]]
+                station = parent[station]
+            return station
+
+        for trip in trips.tolist():
+            origin, destination = origin_ids[trip], destination_ids[trip]
+            parent.setdefault(origin, origin)
+            parent.setdefault(destination, destination)
+            first, second = root(origin), root(destination)
+            if first != second:
+                parent[max(first, second)] = min(first, second)
+        return {station: root(station) for station in parent}
+
+    components = {None: components_of(np.arange(len(origin_ids)))}
+    for bit, day in enumerate(day_columns):
+        components[day] = components_of(np.flatnonzero((day_bits & (1 << bit)).any(axis=1)))
+
+    return {
+        'successors': {station: frozenset(stations) for station, stations in successors.items()},
+        'predecessors': {station: frozenset(stations) for station, stations in predecessors.items()},
+        'transfer_stations': transfer_stations,
+        'components': components
+    }
+
+
+class Trip:
+    """One timetabled bus, used for journey legs instead of a DataFrame row"""
+
+    __slots__ = ('trip_index', 'origin', 'destination', 'depart_min', 'duration_min',
+                 'service', 'departure_time', 'service_type')
+
+    def __init__(self, trip_index: int, origin: str, destination: str, depart_min: float,
+                 duration_min: float, service: str, departure_time: str, service_type: str):
+        self.trip_index = trip_index
+        self.origin = origin
+        self.destination = destination
+        self.depart_min = depart_min
+        self.duration_min = duration_min
+        self.service = service
+        self.departure_time = departure_time
+        self.service_type = service_type
+
+    @property
+    def arrival_min(self) -> float:
+        return self.depart_min + self.duration_min
+
+    def __repr__(self) -> str:
+        return f"Trip({self.trip_index}, {self.departure_time}, {self.duration_min:g}min, {self.service_type})"
+
+
+class Journey:
+    """A one-transfer journey: two trips and the wait between them"""
+
+    __slots__ = ('transfer_station', 'transfer_station_french', 'first_leg', 'second_leg',
+                 'total_duration', 'waiting_time', 'origin_french', 'destination_french', 'departure_min')
+
+    def __init__(self, transfer_station: str, transfer_station_french: str, first_leg: Trip,
+                 second_leg: Trip, total_duration: float, waiting_time: float,
+                 origin_french: str, destination_french: str, departure_min: Optional[float] = None):
+        """``departure_min`` counts from midnight of the query's day (first_leg.depart_min,
+        past 24:00 when the journey starts on the next service day)"""
+        self.transfer_station = transfer_station
+        self.transfer_station_french = transfer_station_french
+        self.first_leg = first_leg
+        self.second_leg = second_leg
+        self.total_duration = total_duration
+        self.waiting_time = waiting_time
+        self.origin_french = origin_french
+        self.destination_french = destination_french
+        self.departure_min = first_leg.depart_min if departure_min is None else departure_min
+
+    def details(self) -> Dict:
+        """Transfer details in the shape of the API's TransferDetails"""
+        first_leg, second_leg = self.first_leg, self.second_leg
+        return {
+            'transfer_station': self.transfer_station_french,
+            'first_leg_departure': first_leg.departure_time,
+            'first_leg_duration': int(first_leg.duration_min),
+            'first_leg_service': first_leg.service_type,
+            'waiting_time': int(self.waiting_time),
+            'second_leg_departure': second_leg.departure_time,
+            'second_leg_duration': int(second_leg.duration_min),
+            'second_leg_service': second_leg.service_type
+        }
+
+    def __repr__(self) -> str:
+        return (f"Journey({self.origin_french} → {self.transfer_station_french} → {self.destination_french}, "
+                f"{self.total_duration:g}min)")
+
+
+class TimetablePartition:
+    """The trips running on one weekday in one season, with per-station indexes
+
+    ``day`` and ``season`` are a day column and a stripped season (None for any).
+    ``mask`` flags the partition's trips among all trips; ``by_origin`` and
+    ``by_destination`` hold their positions per station ID, in timetable order.
+    """
+
+    __slots__ = ('day', 'season', 'mask', 'positions', 'by_origin', 'by_destination')
+
+    def __init__(self, day: Optional[str], season: Optional[str], mask: np.ndarray,
+                 origin_ids: np.ndarray, destination_ids: np.ndarray):
+        self.day = day
+        self.season = season
+        self.mask = mask
+        self.positions = np.flatnonzero(mask)
+        self.by_origin = self._group(self.positions, origin_ids)
+        self.by_destination = self._group(self.positions, destination_ids)
+
+    @staticmethod
+    def _group(positions: np.ndarray, station_ids: np.ndarray) -> Dict[int, np.ndarray]:
+        keys = station_ids[positions]
+        order = np.argsort(keys, kind='stable')
+        stations, starts = np.unique(keys[order], return_index=True)
+        return dict(zip(stations.tolist(), np.split(positions[order], starts[1:])))
+
+    def __repr__(self) -> str:
+        return f"TimetablePartition({self.day or 'any day'}, {self.season or 'any season'}: {len(self.positions)} trips)"
+
+
+class TimetableEngine:
+    """Preprocessed timetable with the matching, filtering, transfer and scoring logic"""
+
+    def __init__(self, df: pd.DataFrame, transfer_times: Optional[Tuple[int, Dict[str, int]]] = None):
+        """Wrap an already preprocessed timetable (see ``TimetableEngine.load``)
+
+        ``transfer_times`` is a (default, {French station name: minutes}) pair of
+        minimum transfer times (see scoring_rules.load_transfer_times); without it
+        every station uses MIN_TRANSFER_TIME.
+        """
+        self.df = df
+        self.loaded_from_cache = False
+        self._station_cache = {}
+
+        # Canonical trips: rows repeating a trip (same stations, departure, service and
+        # duration, e.g. once per season) collapse into one trip; df['trip_index'] maps
+        # every row to its trip and the rows' days and seasons are merged into bitmasks
+        canonical = canonical_trips(df)
+        df['trip_index'] = canonical['trip_of_row']
+        self.trips = trips = df.iloc[canonical['first_rows']]
+        self._day_columns = canonical['day_columns']
+        self._season_codes = canonical['season_codes']
+        self._day_bits = canonical['day_bits']
+        self.dedup_report = canonical['report']
+
+        # Display fields rendered once per trip; responses look them up by trip_index
+        departure_labels = {minutes: f"{int(minutes // 60):02d}:{int(minutes % 60):02d}"
+                            for minutes in trips['depart_min'].unique()}
+        self.trip_departures = [departure_labels[minutes] for minutes in trips['depart_min']]
+        arrival_min = trips['depart_min'] + trips['durée_min']
+        arrival_labels = {minutes: format_minutes(minutes) for minutes in arrival_min.unique()}
+        self.trip_arrivals = [arrival_labels[minutes] for minutes in arrival_min]
+        self.trip_services = ["Luxe" if service == 'رفاهة' else "Standard" for service in trips['نوع الخدمة']]
+        self.trip_destinations_french = trips['destination_french'].tolist()
+
+        # Canonical stations: every spelling maps to its station ID, and stations sort
+        # (e.g. on transfer ties) by their first spelling
+        self._station_ids = {}
+        for column, id_column in (('محطة الانطلاق', 'origin_id'), ('محطة الوصول', 'destination_id')):
+            self._station_ids.update(zip(df[column].tolist(), df[id_column].tolist()))
+        self.station_spellings = {}
+        for spelling, station_id in sorted(self._station_ids.items()):
+            self.station_spellings.setdefault(station_id, []).append(spelling)
+        self._station_sort_keys = {station_id: spellings[0] for station_id, spellings in self.station_spellings.items()}
+        self._column_spellings = {}
+
+        # Raw per-trip fields for building Trip records without touching the frame
+        self.trip_origins = trips['محطة الانطلاق'].tolist()
+        self.trip_destinations = trips['محطة الوصول'].tolist()
+        self.trip_origin_ids = trips['origin_id'].tolist()
+        self.trip_destination_ids = trips['destination_id'].tolist()
+        self.trip_depart_min = trips['depart_min'].tolist()
+        self.trip_duration_min = trips['durée_min'].tolist()
+        self.trip_service_codes = trips['نوع الخدمة'].tolist()
+
+        # Index arrays for queries: filters narrow arrays of trip positions and row
+        # data is only gathered for the final top-k
+        self._depart = trips['depart_min'].to_numpy(dtype=float)
+        self._duration = trips['durée_min'].to_numpy(dtype=float)
+        self._service_scores = np.array([service_score(service) for service in self.trip_service_codes])
+
+        # Per (weekday, season) partitions, built on first use; the whole timetable is
+        # the (None, None) partition
+        self._origin_ids = np.asarray(self.trip_origin_ids, dtype=np.int64)
+        self._destination_ids = np.asarray(self.trip_destination_ids, dtype=np.int64)
+        self._partitions = {}
+        self._cyclic_timetables = {}
+        everything = self.partition()
+        self._by_origin = everything.by_origin
+        self._by_destination = everything.by_destination
+
+        # Minimum transfer time per station ID and, per trip, the earliest departure a
+        # connection at its arrival station can make (arrival plus that station's time)
+        stations_french = {}
+        for id_column, french_column in (('origin_id', 'origin_french'), ('destination_id', 'destination_french')):
+            stations_french.update(zip(df[id_column].tolist(), df[french_column].tolist()))
+        self.station_transfer_min = np.array(station_transfer_times(
+            [stations_french.get(station_id) for station_id in range(max(stations_french, default=-1) + 1)],
+            transfer_times
+        ), dtype=float)
+        self._connection_min = (self._depart + self._duration +
+                                self.station_transfer_min[self._destination_ids])
+        self.trip_connection_min = self._connection_min.tolist()
+
+        # Station graph: direct neighbours, one-transfer stations per station pair and
+        # per-day connected components, so unreachable pairs are answered without a search
+        connectivity = station_connectivity(self.trip_origin_ids, self.trip_destination_ids,
+                                            self._day_bits, self._day_columns)
+        self._successors = connectivity['successors']
+        self._predecessors = connectivity['predecessors']
+        self._transfer_stations = connectivity['transfer_stations']
+        self._components = connectivity['components']
+
+        # Tie-break codes for departure and service (transfers rank as 'Mixed')
+        self._depart_ranks = self._rendered_ranks(self._depart)
+        service_ranks, service_count = self._rendered_ranks(self.trip_service_codes + ['Mixed'])
+        self._service_ranks = (service_ranks[:-1], service_count)
+        self._mixed_service_rank = service_ranks[-1]
+
+        # Get available seasons and stations
+        self.available_seasons = get_available_seasons_from_data(df)
+
+        # Get all unique stations in French
+        origins = df['محطة الانطلاق'].dropna().unique()
+        destinations = df['محطة الوصول'].dropna().unique()
+        all_stations_arabic = sorted(set(list(origins) + list(destinations)))
+        self.available_stations = sorted(set([
+            translate_station_to_french(station.strip())
+            for station in all_stations_arabic
+        ]))
+
+    @classmethod
+    def load(cls, path: str, use_cache: bool = True, cache_dir: Optional[str] = None,
+             transfer_times_file: Optional[str] = None) -> 'TimetableEngine':
+        """Load a timetable file, reusing the preprocessed cache when possible
+
+        Minimum transfer times come from ``transfer_times_file``, else from the
+        TRANSFER_TIMES_FILE next to the timetable when there is one.
+        """
+        df, from_cache = load_timetable(path, use_cache, cache_dir)
+        transfer_times_file = transfer_times_file or transfer_times_path(path)
+        transfer_times = None
+        if os.path.exists(transfer_times_file):
+            transfer_times = load_transfer_times(transfer_times_file)
+        engine = cls(df, transfer_times)
+        engine.loaded_from_cache = from_cache
+        return engine
+
+    def trip(self, trip_index: int) -> Trip:
+        """Record of one trip by its trip_index"""
+        return Trip(trip_index, self.trip_origins[trip_index], self.trip_destinations[trip_index],
+                    self.trip_depart_min[trip_index], self.trip_duration_min[trip_index],
+                    self.trip_service_codes[trip_index], self.trip_departures[trip_index],
+                    self.trip_services[trip_index])
+
+    def resolve_station(self, station_french: str, column_name: str, french_column: str) -> Optional[str]:
+        """Resolve a French station name to the Arabic spelling used in the dataset"""
+        started = time.perf_counter()
+
+        cached = self._station_cache.get((station_french, column_name))
+        if cached is not None:
+            station_arabic, match, method = cached
+        else:
+            # Convert French name to Arabic for data lookup with improved case-insensitive matching
+            station_arabic = translate_station_to_arabic(station_french)
+            match, method = find_matching_station_with_method(self.df, station_arabic, column_name)
+
+            if not match:
+                # Try direct search in French names for better matching
+                station_lower = station_french.lower()
+                for spelling, french_lower in self._spellings_with_french(column_name, french_column):
+                    if french_lower == station_lower or station_lower in french_lower:
+                        match = spelling
+                        method = 'french_name'
+                        break
+
+            if len(self._station_cache) >= STATION_CACHE_SIZE:
+                self._station_cache.clear()
+            self._station_cache[(station_french, column_name)] = (station_arabic, match, method)
+
+        elapsed = time.perf_counter() - started
+        STATION_RESOLUTION_LATENCY.observe(elapsed, method=method or 'not_found')
+        trace_note('origin_station' if column_name == 'محطة الانطلاق' else 'destination_station', {
+            'input': station_french,
+            'dictionary_translation': station_arabic if station_arabic != station_french else None,
+            'method': method or 'not_found',
+            'match': match,
+            'cached': cached is not None,
+            'ms': round(elapsed * 1000, 3)
+        })
+        return match
+
+    def _spellings_with_french(self, column_name: str, french_column: str) -> List[Tuple[str, str]]:
+        """Distinct (spelling, lowercase French name) pairs of a column, in order of first appearance"""
+        key = (column_name, french_column)
+        if key not in self._column_spellings:
+            pairs = self.df[[column_name, french_column]].drop_duplicates()
+            self._column_spellings[key] = [(spelling, french.lower()) for spelling, french in
+                                           zip(pairs[column_name].tolist(), pairs[french_column].tolist())]
+        return self._column_spellings[key]
+
+    def station_id(self, station: str) -> Optional[int]:
+        """Canonical station ID of a station spelling from the dataset"""
+        return self._station_ids.get(station)
+
+    def reachable(self, origin_id: Optional[int], destination_id: Optional[int]) -> bool:
+        """Whether a direct trip or a one-transfer connection links two stations on some day"""
+        return (destination_id in self._successors.get(origin_id, ()) or
+                (origin_id, destination_id) in self._transfer_stations)
+
+    def same_component(self, origin_id: Optional[int], destination_id: Optional[int],
+                       preferred_day: Optional[str] = None) -> bool:
+        """Whether two stations are connected by trips in any direction (on a day when given)"""
+        day = DAY_REVERSE.get(preferred_day, preferred_day) if preferred_day else None
+        components = self._components.get(day, self._components[None])
+        return origin_id in components and components.get(destination_id) == components[origin_id]
+
+    def resolve_pair(self, origin_french: str, destination_french: str) -> Tuple[str, str]:
+        """Resolve origin and destination, raising ValueError for unknown stations"""
+        origin_match = self.resolve_station(origin_french, 'محطة الانطلاق', 'origin_french')
+        if not origin_match:
+            raise ValueError(f"Origin station '{origin_french}' not found in dataset")
+
+        destination_match = self.resolve_station(destination_french, 'محطة الوصول', 'destination_french')
+        if not destination_match:
+            raise ValueError(f"Destination station '{destination_french}' not found in dataset")
+
+        return origin_match, destination_match
+
+    def partition(self, day: Optional[str] = None, season: Optional[str] = None) -> TimetablePartition:
+        """Trips running on a day column in a stripped season (None for any), built on first use"""
+        key = (day, season)
+        partition = self._partitions.get(key)
+        if partition is None:
+            bit = 1 << self._day_columns.index(day) if day else SEASON_PRESENT_BIT
+            if season is None:
+                mask = (self._day_bits & bit).any(axis=1)
+            elif season in self._season_codes:
+                mask = (self._day_bits[:, self._season_codes[season]] & bit) != 0
+            else:
+                mask = np.zeros(len(self._day_bits), dtype=bool)
+            partition = self._partitions[key] = TimetablePartition(
+                day, season, mask, self._origin_ids, self._destination_ids)
+        return partition
+
+    def service_partition(self, preferred_day: Optional[str] = None,
+                          preferred_season: Optional[str] = None) -> TimetablePartition:
+        """Partition searched for a query's service day and season
+
+        Like the day/season filters, a day or season that is unknown or has no trips
+        at all in the timetable is not applied.
+        """
+        day = DAY_REVERSE.get(preferred_day, preferred_day) if preferred_day else None
+        if day not in self._day_columns or not len(self.partition(day).positions):
+            day = None
+        season = self._season_arabic(preferred_season) if 'الموسم' in self.df.columns else None
+        if season is not None:
+            season = season.strip()
+            if not len(self.partition(day, season).positions):
+                season = None
+        return self.partition(day, season)
+
+    def cyclic_timetable(self, day: Optional[str] = None,
+                         season: Optional[str] = None) -> Tuple[CyclicTimetable, int]:
+        """Cyclic departures of a season and the minute the query's day starts at on its clock
+
+        The clock is weekly when ``day`` (a day column) is given and daily otherwise;
+        tables are built on first use per season and clock.
+        """
+        key = (day is not None, season)
+        table = self._cyclic_timetables.get(key)
+        if table is None:
+            if season is None:
+                bits = np.bitwise_or.reduce(self._day_bits, axis=1)
+            elif season in self._season_codes:
+                bits = self._day_bits[:, self._season_codes[season]]
+            else:
+                bits = np.zeros(len(self._day_bits), dtype=np.uint8)
+
+            if day is None:
+                period, departures = DAY_MINUTES, [
+                    (self.trip_depart_min[trip], trip) for trip in np.flatnonzero(bits & SEASON_PRESENT_BIT).tolist()
+                ]
+            else:
+                # One departure per day the trip runs on, in minutes since Monday 00:00
+                period, departures = WEEK_MINUTES, [
+                    (WEEKDAYS.index(column) * DAY_MINUTES + self.trip_depart_min[trip], trip)
+                    for bit, column in enumerate(self._day_columns)
+                    for trip in np.flatnonzero(bits & (1 << bit)).tolist()
+                ]
+            table = self._cyclic_timetables[key] = CyclicTimetable(
+                period, departures, self.trip_origin_ids, self.trip_destination_ids, self.trip_duration_min)
+        return table, (WEEKDAYS.index(day) * DAY_MINUTES if day else 0)
+
+    @staticmethod
+    def _season_arabic(preferred_season: Optional[str]) -> Optional[str]:
+        """Arabic season of a French season name, or None when it is not recognized"""
+        if not preferred_season:
+            return None
+        for arabic_season, french_season in SEASON_TRANSLATIONS.items():
+            if french_season.lower() == preferred_season.lower():
+                return arabic_season
+        return None
+
+    def filter_day_season(self, positions: np.ndarray, preferred_day: Optional[str] = None,
+                          preferred_season: Optional[str] = None,
+                          log: Optional[Callable[[str], None]] = None) -> np.ndarray:
+        """Filter trip positions by day and season, keeping all trips when a filter matches nothing
+
+        A trip passes when one of its merged rows runs on the day and in the season.
+        """
+        log = log or (lambda message: None)
+        day = None
+
+        if preferred_day:
+            day_arabic = DAY_REVERSE.get(preferred_day, preferred_day)
+            if day_arabic in self._day_columns:
+                day_filtered = positions[self.partition(day_arabic).mask[positions]]
+                if len(day_filtered):
+                    positions = day_filtered
+                    day = day_arabic
+                    log(f"🗓️  Filtered to {len(positions)} routes operating on {preferred_day}")
+                else:
+                    log(f"⚠️  No routes operating on {preferred_day}, showing all days")
+            else:
+                log(f"ℹ️  Day column '{day_arabic}' not found in dataset")
+
+        if preferred_season:
+            if 'الموسم' in self.df.columns:
+                season_arabic = self._season_arabic(preferred_season)
+                if season_arabic:
+                    season_filtered = positions[self.partition(day, season_arabic.strip()).mask[positions]]
+                    if len(season_filtered):
+                        positions = season_filtered
+                        if preferred_season.lower() == 'summer':
+                            log(f"☀️  Summer season: Filtered to {len(positions)} summer routes")
+                        elif preferred_season.lower() == 'winter':
+                            log(f"❄️  Winter season: Filtered to {len(positions)} winter routes")
+                        elif preferred_season.lower() == 'ramadan':
+                            log(f"🌙 Ramadan season: Filtered to {len(positions)} Ramadan routes")
+                    else:
+                        log(f"⚠️  No routes found for {preferred_season} season, showing all seasons")
+                else:
+                    log(f"⚠️  Season '{preferred_season}' not recognized, showing all seasons")
+            else:
+                log(f"ℹ️  Season information not available in dataset")
+
+        return positions
+
+    def time_window(self, positions: np.ndarray, preferred_time: Optional[str],
+                    preferred_min: Optional[int],
+                    log: Optional[Callable[[str], None]] = None,
+                    next_day: Optional[Callable[[], Tuple[np.ndarray, np.ndarray]]] = None
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep departures within 4 hours of the preferred time, else the next 10, else the
+        first ones of the next service day (from ``next_day``), else all
+
+        Returns the positions and their departures in minutes from midnight of the
+        query's day (past 24:00 for the next service day).
+        """
+        log = log or (lambda message: None)
+        depart = self._depart[positions]
+        if preferred_min is None:
+            return positions, depart
+
+        # Priority 1: Routes after preferred time within 4 hours
+        later = depart >= preferred_min
+        in_window = later & (depart <= preferred_min + 240)
+        if in_window.any():
+            log(f"🕐 Showing routes from {preferred_time} onwards (within 4 hours)")
+            return positions[in_window], depart[in_window]
+
+        # Priority 2: If no routes in 4 hours, show next available routes
+        if later.any():
+            log(f"⚠️  No routes within 4 hours of {preferred_time}, showing next available")
+            return positions[later][:10], depart[later][:10]  # Limit to next 10 routes
+
+        # Priority 3: Wrap past midnight to the first departures of the next service day
+        if next_day is not None:
+            next_positions, next_depart = next_day()
+            if len(next_positions):
+                log(f"🌙 No routes after {preferred_time}, showing the first departures of the next service day")
+                return next_positions, next_depart
+
+        # Priority 4: Show all routes if none after preferred time
+        log(f"⚠️  No routes after {preferred_time}, showing all available routes")
+        return positions, depart
+
+    def next_service_day(self, origin_id: int, destination_id: int,
+                         preferred_day: Optional[str] = None, preferred_season: Optional[str] = None,
+                         limit: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """The first direct departures of the service day after the query's day
+
+        Returns positions and departures in minutes from midnight of the query's
+        day. Days without a trip between the stations are skipped.
+        """
+        partition = self.service_partition(preferred_day, preferred_season)
+        cycle, day_start = self.cyclic_timetable(partition.day, partition.season)
+        departures = cycle.next_service_day(origin_id, destination_id, day_start + DAY_MINUTES, limit)
+        return (np.array([trip for _, trip in departures], dtype=np.intp),
+                np.array([time_ - day_start for time_, _ in departures], dtype=float))
+
+    def _direct_positions(self, origin_match: str, destination_match: str) -> np.ndarray:
+        """Positions of the direct trips between two resolved stations (any spelling), in timetable order"""
+        origin_id, destination_id = self.station_id(origin_match), self.station_id(destination_match)
+        if destination_id not in self._successors.get(origin_id, ()):
+            return NO_TRIPS
+        return np.intersect1d(self._by_origin[origin_id], self._by_destination[destination_id],
+                              assume_unique=True)
+
+    def direct_routes(self, origin_match: str, destination_match: str,
+                      preferred_time: Optional[str] = None) -> pd.DataFrame:
+        """Direct canonical trips between two resolved stations, optionally departing at or after a time"""
+        positions = self._direct_positions(origin_match, destination_match)
+
+        preferred_min = parse_preferred_time(preferred_time)
+        if preferred_min is not None:
+            positions = positions[self._depart[positions] >= preferred_min]
+
+        return self.trips.iloc[positions]
+
+    def search_transfers(self, origin_match: str, destination_match: str,
+                         origin_french: str, destination_french: str,
+                         preferred_time: Optional[str] = None,
+                         max_arrival: Optional[float] = None,
+                         time_budget_ms: Optional[float] = None,
+                         max_expansions: Optional[int] = None,
+                         preferred_day: Optional[str] = None,
+                         preferred_season: Optional[str] = None) -> List[Journey]:
+        """Budgeted one-transfer search between two already resolved stations
+
+        Both legs come from the partition of the query's day and season (see
+        ``service_partition``); a connection with no second leg later that day takes
+        the next one on the cyclic clock, and when nothing leaves after the preferred
+        time the first legs are the next service day's first buses. A connection
+        needs the transfer station's minimum transfer time (``station_transfer_min``).
+        Transfer stations are expanded in order of earliest possible connection and
+        the search stops once ``time_budget_ms`` or ``max_expansions`` is spent. When
+        ``max_arrival`` is given, journeys that cannot arrive before it are pruned.
+        """
+        search_started = time.perf_counter()
+        origins, destinations = self.trip_origin_ids, self.trip_destination_ids
+        depart, duration = self.trip_depart_min, self.trip_duration_min
+
+        # Potential transfer stations from the precomputed table (by station ID, so every spelling counts)
+        origin_id, destination_id = self.station_id(origin_match), self.station_id(destination_match)
+        transfer_stations = self._transfer_stations.get((origin_id, destination_id), frozenset())
+        partition = self.service_partition(preferred_day, preferred_season)
+        origin_trips = partition.by_origin.get(origin_id, NO_TRIPS)
+        destination_trips = partition.by_destination.get(destination_id, NO_TRIPS).tolist()
+
+        search_notes = {
+            'ran': True,
+            'partition': {'day': DAY_TRANSLATIONS.get(partition.day), 'season': partition.season,
+                          'trips': len(partition.positions)},
+            'transfer_stations': len(transfer_stations),
+            'max_arrival': None if max_arrival is None else int(max_arrival),
+            'expanded': 0,
+            'pruned': 0,
+            'stopped_by': None,
+            'journeys': 0
+        }
+        trace_note('transfer_search', search_notes)
+
+        if not transfer_stations:
+            return []
+
+        # Apply time filter for first legs
+        preferred_min = parse_preferred_time(preferred_time)
+        if preferred_min is not None:
+            origin_trips = origin_trips[self._depart[origin_trips] >= preferred_min]
+
+        # Departures on the cyclic clock, for connections past midnight and the next service day
+        cycle, day_start = self.cyclic_timetable(partition.day, partition.season)
+
+        # Second legs per transfer station on the service day
+        second_legs = {}
+        for trip in destination_trips:
+            second_legs.setdefault(origins[trip], []).append(trip)
+
+        # Per transfer station: earliest connection (first-leg arrival plus the station's minimum
+        # transfer time) and shortest first leg (first on ties); stations without a later
+        # second leg today can still connect on the next service day
+        connection = self.trip_connection_min
+        earliest_connection, best_first_legs, first_offsets = {}, {}, {}
+        for trip in origin_trips.tolist():
+            station = destinations[trip]
+            if station not in transfer_stations or (station, destination_id) not in cycle.shortest:
+                continue
+            if station not in earliest_connection or connection[trip] < earliest_connection[station]:
+                earliest_connection[station] = connection[trip]
+            if station not in best_first_legs or duration[trip] < duration[best_first_legs[station]]:
+                best_first_legs[station] = trip
+
+        if not earliest_connection and preferred_min is not None:
+            # Nothing leaves after the preferred time today: start from each transfer
+            # station's first bus of the next service day that connects that same day
+            for station in transfer_stations:
+                if (station, destination_id) not in cycle.shortest:
+                    continue
+                service_day = None
+                for leaves, trip in cycle.following(origin_id, station, day_start + DAY_MINUTES):
+                    if service_day is None:
+                        service_day = leaves // DAY_MINUTES
+                    elif leaves // DAY_MINUTES != service_day:
+                        break
+                    offset = leaves - day_start - depart[trip]
+                    onward, _ = next(cycle.following(station, destination_id, day_start + offset + connection[trip]))
+                    if onward // DAY_MINUTES == service_day:
+                        first_offsets[station] = offset
+                        earliest_connection[station] = offset + connection[trip]
+                        best_first_legs[station] = trip
+                        break
+        if not earliest_connection:
+            return []
+
+        # Expand the most promising transfer stations first so the budget cuts the weakest ones
+        expansion_order = sorted(earliest_connection.items(),
+                                 key=lambda item: (item[1], self._station_sort_keys[item[0]]))
+
+        transfer_routes = []
+
+        for expansions, (transfer_station, first_connection) in enumerate(expansion_order):
+            if max_expansions is not None and expansions >= max_expansions:
+                search_notes['stopped_by'] = 'expansion_budget'
+                break
+            if (time_budget_ms is not None and
+                    (time.perf_counter() - search_started) * 1000 > time_budget_ms):
+                search_notes['stopped_by'] = 'time_budget'
+                break
+
+            # Prune stations that cannot beat the best known arrival
+            if max_arrival is not None:
+                if first_connection + cycle.shortest[(transfer_station, destination_id)] >= max_arrival:
+                    search_notes['pruned'] += 1
+                    continue
+            search_notes['expanded'] += 1
+
+            # First leg: origin → transfer (shortest duration, or first bus of the next service day)
+            best_first_leg = self.trip(best_first_legs[transfer_station])
+            first_offset = first_offsets.get(transfer_station, 0)
+
+            # Calculate when second leg can start (minutes from midnight of the query's day)
+            second_leg_start = connection[best_first_leg.trip_index] + first_offset
+
+            # Second leg: transfer → destination (shortest duration once connected today)
+            second_leg, second_offset = None, 0
+            if not first_offset:
+                for trip in second_legs.get(transfer_station, ()):
+                    if depart[trip] >= second_leg_start and (second_leg is None or duration[trip] < duration[second_leg]):
+                        second_leg = trip
+
+            # Otherwise the first bus after the connection on the cyclic clock, past midnight
+            if second_leg is None:
+                following = next(cycle.following(transfer_station, destination_id, day_start + second_leg_start), None)
+                if following is None or following[0] - day_start - second_leg_start > DAY_MINUTES:
+                    continue  # no second leg within a day of the connection
+                leaves, second_leg = following
+                second_offset = leaves - day_start - depart[second_leg]
+
+            best_second_leg = self.trip(second_leg)
+
+            # Calculate journey metrics
+            arrival = best_second_leg.arrival_min + second_offset
+            if max_arrival is not None and arrival >= max_arrival:
+                continue
+
+            departure = best_first_leg.depart_min + first_offset
+            total_duration = arrival - departure
+            waiting_time = best_second_leg.depart_min + second_offset - second_leg_start
+
+            journey = Journey(
+                best_first_leg.destination, self.trip_destinations_french[best_first_leg.trip_index],
+                best_first_leg, best_second_leg, total_duration, waiting_time,
+                origin_french, destination_french, departure
+            )
+
+            transfer_routes.append(journey)
+
+        # Sort by total duration
+        transfer_routes.sort(key=lambda journey: journey.total_duration)
+        search_notes['journeys'] = len(transfer_routes)
+        return transfer_routes
+
+    def recommend(self, origin_french: str, destination_french: str,
+                  preferred_time: Optional[str] = None,
+                  preferred_day: Optional[str] = None,
+                  preferred_season: Optional[str] = None,
+                  max_results: int = 5,
+                  scoring: str = 'standard',
+                  transfer_time_budget_ms: Optional[float] = None,
+                  max_transfer_expansions: Optional[int] = None,
+                  log: Optional[Callable[[str], None]] = None) -> List[Dict]:
+        """Route recommendations for a station pair under a scoring profile
+
+        With the 'standard' profile direct routes and one-transfer routes are scored
+        by the same model and ranked together, so a much faster connection can
+        outrank a slow direct bus. The 'enhanced' profile scores direct routes with
+        extra peak-time and efficiency features and searches transfers only when no
+        direct route exists. ``log`` receives progress messages.
+        """
+        if scoring not in SCORING_PROFILES:
+            raise ValueError(f"Unknown scoring profile '{scoring}' (use one of {', '.join(SCORING_PROFILES)})")
+        log = log or (lambda message: None)
+
+        # Normalize input station names (trim whitespace)
+        origin_french = origin_french.strip()
+        destination_french = destination_french.strip()
+
+        # Find matching stations with fuzzy matching for misspellings
+        with timed_stage('station_resolution'):
+            origin_match, destination_match = self.resolve_pair(origin_french, destination_french)
+
+        return self._recommend_resolved(
+            origin_match, destination_match, origin_french, destination_french,
+            preferred_time, preferred_day, preferred_season, max_results, scoring,
+            transfer_time_budget_ms, max_transfer_expansions, log
+        )
+
+    def _recommend_resolved(self, origin_match: str, destination_match: str,
+                            origin_french: str, destination_french: str,
+                            preferred_time: Optional[str], preferred_day: Optional[str],
+                            preferred_season: Optional[str], max_results: int, scoring: str,
+                            transfer_time_budget_ms: Optional[float], max_transfer_expansions: Optional[int],
+                            log: Callable[[str], None]) -> List[Dict]:
+        """``recommend`` between two already resolved stations (any spelling of each)"""
+        # Pairs without any direct or one-transfer connection are answered from the station graph
+        origin_id, destination_id = self.station_id(origin_match), self.station_id(destination_match)
+        if not self.reachable(origin_id, destination_id):
+            log("❌ No direct or transfer connection between these stations")
+            trace_note('connectivity', {
+                'reachable': False,
+                'same_component': self.same_component(origin_id, destination_id, preferred_day)
+            })
+            return []
+
+        preferred_min = parse_preferred_time(preferred_time)
+
+        # Find direct routes
+        with timed_stage('direct_filter'):
+            direct_routes = self._direct_positions(origin_match, destination_match)
+        filter_rows = {'direct_filter': {'rows_in': len(self.df), 'rows_out': len(direct_routes)}}
+
+        filtered_routes, filtered_depart = direct_routes, self._depart[direct_routes]
+        best_direct_arrival = None
+
+        if len(direct_routes):
+            log(f"✅ Found {len(direct_routes)} direct routes")
+
+            # Apply DAY and SEASON filtering if specified
+            with timed_stage('day_season_filter'):
+                rows_in = len(direct_routes)
+                direct_routes = self.filter_day_season(direct_routes, preferred_day, preferred_season, log)
+            filter_rows['day_season_filter'] = {'rows_in': rows_in, 'rows_out': len(direct_routes)}
+
+            # Apply smart time filtering
+            with timed_stage('time_filter'):
+                filtered_routes, filtered_depart = self.time_window(
+                    direct_routes, preferred_time, preferred_min, log,
+                    next_day=lambda: self.next_service_day(origin_id, destination_id,
+                                                           preferred_day, preferred_season)
+                )
+
+                # With a preferred time, transfers only need to be considered if they beat the
+                # best direct arrival after it; without one, both rank over the whole day
+                if preferred_min is not None:
+                    usable = filtered_depart >= preferred_min
+                    if usable.any():
+                        best_direct_arrival = (filtered_depart + self._duration[filtered_routes])[usable].min()
+            filter_rows['time_filter'] = {'rows_in': len(direct_routes), 'rows_out': len(filtered_routes)}
+        else:
+            log("❌ No direct routes found")
+        trace_note('filters', filter_rows)
+
+        if scoring == 'enhanced' and len(filtered_routes):
+            with timed_stage('scoring'):
+                return self._rank_enhanced(filtered_routes, filtered_depart, origin_french, destination_french,
+                                           preferred_time, preferred_min, max_results, log)
+
+        # Find transfer routes, pruned by the best direct arrival after the preferred time
+        if scoring == 'enhanced':
+            log("🔄 Searching for routes with transfers...")
+        with timed_stage('transfer_search'):
+            transfer_routes = self.search_transfers(
+                origin_match, destination_match, origin_french, destination_french,
+                preferred_time, max_arrival=best_direct_arrival,
+                time_budget_ms=transfer_time_budget_ms, max_expansions=max_transfer_expansions,
+                preferred_day=preferred_day, preferred_season=preferred_season
+            )
+
+        with timed_stage('scoring'):
+            if scoring == 'enhanced':
+                return self._transfer_recommendations(transfer_routes, origin_french, destination_french, max_results)
+            return self._rank_candidates(
+                filtered_routes, filtered_depart, transfer_routes, origin_french, destination_french,
+                preferred_time, preferred_min, max_results
+            )
+
+    @staticmethod
+    def _rendered_ranks(values) -> Tuple[np.ndarray, int]:
+        """Integer codes of the values numbered in the sort order of their ``str`` rendering
+
+        Route keys built from these codes sort like the '<depart>_<service>_...'
+        strings routes were once grouped by, so ties keep breaking the same way.
+        """
+        values = values.tolist() if isinstance(values, np.ndarray) else values
+        ranks = {value: rank for rank, value in enumerate(sorted(set(values), key=str))}
+        return np.fromiter((ranks[value] for value in values), dtype=np.int64, count=len(values)), len(ranks)
+
+    @staticmethod
+    def _route_keys(*ranked_columns: Tuple[np.ndarray, int]) -> np.ndarray:
+        """Single integer key per candidate from (codes, code count) columns, in column order"""
+        keys = np.zeros(len(ranked_columns[0][0]), dtype=np.int64)
+        for codes, count in ranked_columns:
+            keys = keys * count + codes
+        return keys
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, route_keys: np.ndarray, max_results: int) -> List[int]:
+        """Indices of the ``max_results`` highest scores; ties rank by route key, then index
+
+        Only the candidates at or above the k-th best score are sorted, so the cost is
+        a partition over all candidates plus a sort of the top k (and their ties).
+        """
+        if max_results <= 0 or not len(scores):
+            return []
+        if len(scores) > max_results:
+            threshold = scores[np.argpartition(-scores, max_results - 1)[max_results - 1]]
+            selected = np.flatnonzero(scores >= threshold)
+        else:
+            selected = np.arange(len(scores))
+        selected = selected[np.lexsort((route_keys[selected], -scores[selected]))]
+        return selected[:max_results].tolist()
+
+    def _rank_candidates(self, filtered_routes: np.ndarray, filtered_depart: np.ndarray,
+                         transfer_routes: List[Journey],
+                         origin_french: str, destination_french: str,
+                         preferred_time: Optional[str], preferred_min: Optional[int],
+                         max_results: int) -> List[Dict]:
+        """Score direct and transfer candidates with one model and return the best as dicts
+
+        Departures (``filtered_depart`` and each journey's ``departure_min``) are
+        minutes from midnight of the query's day, past 24:00 on the next service day.
+        """
+        # Build one candidate set for direct and transfer options as parallel arrays
+        trips = filtered_routes.tolist() + [t.first_leg.trip_index for t in transfer_routes]
+        if not trips:
+            return []
+
+        depart = np.concatenate([filtered_depart, [t.departure_min for t in transfer_routes]])
+        duration = np.concatenate([self._duration[filtered_routes],
+                                   [t.total_duration for t in transfer_routes]])
+        # Service quality score; mixed service scores as the average of both legs
+        service_scores = np.concatenate([self._service_scores[filtered_routes], [
+            (service_score(t.first_leg.service) + service_score(t.second_leg.service)) / 2
+            for t in transfer_routes
+        ]])
+        transfer_indices = [-1] * len(filtered_routes) + list(range(len(transfer_routes)))
+
+        # Duration efficiency score
+        duration_score = self._duration_score(duration)
+
+        # Time proximity score if preferred time specified
+        time_diff = None
+        if preferred_time:
+            if preferred_min is not None:
+                time_diff = depart - preferred_min
+                time_proximity_score = np.array([self._time_proximity(diff) for diff in time_diff.tolist()])
+
+                # Weighted scoring with time priority
+                quality_score = (
+                    0.7 * time_proximity_score +
+                    0.15 * service_scores +
+                    0.15 * duration_score
+                )
+            else:
+                quality_score = (service_scores + duration_score) / 2
+        else:
+            # No preferred time - general scoring
+            time_score = np.array([self._hour_score(hour) for hour in (depart % DAY_MINUTES // 60).tolist()])
+
+            quality_score = (
+                0.4 * service_scores +
+                0.3 * time_score +
+                0.3 * duration_score
+            )
+
+        # Candidates are unique (duplicate trips collapse at load); ties rank in route-key order
+        depart_ranks, depart_count = self._depart_ranks
+        service_ranks, service_count = self._service_ranks
+        route_keys = self._route_keys(
+            (depart_ranks[trips], depart_count),
+            (np.concatenate([service_ranks[filtered_routes],
+                             np.full(len(transfer_routes), self._mixed_service_rank)]), service_count),
+            self._rendered_ranks(duration),
+            self._rendered_ranks(transfer_indices)
+        )
+        best_routes = self._top_k(quality_score, route_keys, max_results)
+
+        # Response-ready dicts: plain JSON types with every RouteRecommendation field
+        # (plus total_duration), so the API can encode them without re-validation.
+        # Display fields come from the per-trip tables built at load.
+        departures, services = self.trip_departures, self.trip_services
+        direct_details = f"{origin_french} → {destination_french}"
+
+        recommendations = []
+        for position in best_routes:
+            trip, transfer_index = trips[position], transfer_indices[position]
+            duration_minutes = int(duration[position])
+            score = float(quality_score[position])
+
+            # Calculate time difference info
+            time_diff_info = None
+            if preferred_time and time_diff is not None:
+                time_diff_info = self.format_time_difference(int(time_diff[position]))
+
+            if transfer_index < 0:
+                recommendation = {
+                    'type': 'direct',
+                    'departure_time': departures[trip],
+                    'duration': duration_minutes,
+                    'service_type': services[trip],
+                    'quality_score': score,
+                    'route_details': direct_details,
+                    'total_duration': duration_minutes,
+                    'transfers': 0,
+                    'time_difference_info': time_diff_info,
+                    'transfer_details': None
+                }
+            else:
+                transfer = transfer_routes[transfer_index]
+
+                recommendation = {
+                    'type': 'transfer',
+                    'departure_time': transfer.first_leg.departure_time,
+                    'duration': duration_minutes,
+                    'service_type': 'Mixed',
+                    'quality_score': score,
+                    'route_details': f"{origin_french} → {transfer.transfer_station_french} → {destination_french}",
+                    'total_duration': duration_minutes,
+                    'transfers': 1,
+                    'time_difference_info': time_diff_info,
+                    'transfer_details': transfer.details()
+                }
+            recommendations.append(recommendation)
+
+        return recommendations
+
+    def _rank_enhanced(self, filtered_routes: np.ndarray, filtered_depart: np.ndarray,
+                       origin_french: str, destination_french: str,
+                       preferred_time: Optional[str], preferred_min: Optional[int],
+                       max_results: int, log: Callable[[str], None]) -> List[Dict]:
+        """Score direct routes with the ML-inspired peak-time and efficiency features"""
+        depart = filtered_depart
+        duration = self._duration[filtered_routes]
+
+        # Service quality (Luxe > Standard)
+        service_scores = self._service_scores[filtered_routes]
+
+        # Duration efficiency (shorter is better)
+        duration_score = self._duration_score(duration)
+
+        hour = depart % DAY_MINUTES // 60
+        time_diff = None
+
+        if preferred_time and preferred_min is None:
+            # Unreadable preferred time: equal weighting of the general factors
+            time_score = np.array([self._hour_score(h) for h in hour.tolist()])
+            quality_score = (service_scores + time_score + duration_score) / 3
+        else:
+            # Additional quality factors
+            is_peak_time = (((hour >= 7) & (hour <= 9)) | ((hour >= 17) & (hour <= 19))).astype(int)
+            is_business_hours = ((hour >= 8) & (hour <= 18)).astype(int)
+            is_short_trip = (duration <= 60).astype(int)
+
+            # Combination bonuses
+            luxury_peak_bonus = ((service_scores == 3) & (is_peak_time == 1)).astype(float) * 0.5
+            efficiency_bonus = ((is_short_trip == 1) & (is_business_hours == 1)).astype(float) * 0.3
+
+            if preferred_time:
+                # TIME PROXIMITY SCORE - MOST IMPORTANT when user specifies preferred time
+                time_diff = depart - preferred_min
+                time_proximity_score = np.array([self._time_proximity(diff) for diff in time_diff.tolist()])
+
+                # WEIGHTED SCORING: Time proximity gets 70% weight for LOGICAL time recommendations
+                quality_score = (
+                    0.7 * time_proximity_score +   # 70% - Time priority
+                    0.15 * service_scores +        # 15% - Service quality
+                    0.1 * duration_score +         # 10% - Duration
+                    0.03 * is_peak_time +          # 3% - Peak time bonus
+                    0.01 * luxury_peak_bonus +     # 1% - Luxury+Peak combo
+                    0.01 * efficiency_bonus        # 1% - Efficiency bonus
+                )
+
+                log(f"🕐 Prioritizing routes close to your preferred time: {preferred_time}")
+            else:
+                time_score = np.array([self._hour_score(h) for h in hour.tolist()])
+
+                # Enhanced weighting for better accuracy
+                quality_score = (
+                    0.35 * service_scores +        # 35% - Service quality
+                    0.25 * time_score +            # 25% - Time preference
+                    0.2 * duration_score +         # 20% - Duration
+                    0.1 * is_peak_time +           # 10% - Peak time bonus
+                    0.05 * luxury_peak_bonus +     # 5% - Luxury+Peak combo
+                    0.05 * efficiency_bonus        # 5% - Efficiency bonus
+                )
+
+        # Routes are unique trips already (same time + service + duration collapse at load)
+        log(f"🔍 Found {len(filtered_routes)} total route options")
+        trips = filtered_routes.tolist()
+        depart_ranks, depart_count = self._depart_ranks
+        service_ranks, service_count = self._service_ranks
+        route_keys = self._route_keys((depart_ranks[filtered_routes], depart_count),
+                                      (service_ranks[filtered_routes], service_count),
+                                      self._rendered_ranks(duration))
+
+        # Sort by quality score (which prioritizes time when specified)
+        best_routes = self._top_k(quality_score, route_keys, max_results)
+
+        departures, services = self.trip_departures, self.trip_services
+        route_details = f"{origin_french} → {destination_french}"
+
+        recommendations = []
+        for position in best_routes:
+            trip = trips[position]
+            duration_minutes = int(duration[position])
+
+            # Calculate time difference if preferred time was specified
+            time_diff_info = ""
+            if preferred_time and time_diff is not None:
+                time_diff_info = f" ({self.format_time_difference(int(time_diff[position]))})"
+
+            recommendations.append({
+                'type': 'direct',
+                'departure_time': departures[trip],
+                'duration': duration_minutes,
+                'service_type': services[trip],
+                'quality_score': float(quality_score[position]),
+                'route_details': route_details,
+                'total_duration': duration_minutes,
+                'transfers': 0,
+                'time_diff_info': time_diff_info
+            })
+
+        return recommendations
+
+    @staticmethod
+    def _transfer_recommendations(transfer_routes: List[Journey], origin_french: str,
+                                  destination_french: str, max_results: int) -> List[Dict]:
+        """Transfer journeys, shortest first, with a fixed score (enhanced profile)"""
+        recommendations = []
+        for transfer in transfer_routes[:max_results]:
+            recommendations.append({
+                'type': 'transfer',
+                'departure_time': transfer.first_leg.departure_time,
+                'duration': int(transfer.total_duration),
+                'service_type': "Mixed",
+                'quality_score': 2.0,
+                'route_details': f"{origin_french} → {transfer.transfer_station_french} → {destination_french}",
+                'total_duration': int(transfer.total_duration),
+                'transfers': 1,
+                'transfer_details': transfer
+            })
+        return recommendations
+
+    @staticmethod
+    def _duration_score(durations: np.ndarray):
+        """Duration efficiency from 3 (shortest) down to 1 (longest)"""
+        min_duration = durations.min()
+        max_duration = durations.max()
+        if max_duration > min_duration:
+            return 3 - 2 * (durations - min_duration) / (max_duration - min_duration)
+        return 3
+
+    _time_proximity = staticmethod(time_proximity)
+    _hour_score = staticmethod(hour_score)
+    format_time_difference = staticmethod(format_time_difference)
+
+    def route_profile(self, origin_french: str, destination_french: str,
+                      preferred_day: Optional[str] = None,
+                      preferred_season: Optional[str] = None) -> List[Dict]:
+        """Get the Pareto profile of departure vs arrival time over the whole service day
+
+        Every entry is a journey (direct or with one transfer) for which no other
+        journey leaves later and arrives earlier or at the same time. The profile is
+        built in a single scan of the relevant trips by decreasing departure time.
+        """
+        origin_french = origin_french.strip()
+        destination_french = destination_french.strip()
+        origin_match, destination_match = self.resolve_pair(origin_french, destination_french)
+
+        origin_id, destination_id = self.station_id(origin_match), self.station_id(destination_match)
+        return [self._journey_entry(origin_french, destination_french, first_leg, second_leg)
+                for _, _, first_leg, second_leg in self._profile_journeys(origin_id, destination_id,
+                                                                          preferred_day, preferred_season)]
+
+    def _profile_journeys(self, origin_id: int, destination_id: int,
+                          preferred_day: Optional[str] = None,
+                          preferred_season: Optional[str] = None) -> List[Tuple[float, float, int, Optional[int]]]:
+        """The daily Pareto profile between two station IDs as (departure, arrival, first leg,
+        second leg or None) by increasing departure (see ``route_profile``)"""
+        if not self.reachable(origin_id, destination_id):
+            return []
+
+        # Only trips leaving the origin or reaching the destination can be part of a journey
+        relevant = np.union1d(self._by_origin.get(origin_id, NO_TRIPS),
+                              self._by_destination.get(destination_id, NO_TRIPS))
+        relevant = self.filter_day_season(relevant, preferred_day, preferred_season)
+        relevant = relevant[np.argsort(-self._depart[relevant], kind='stable')].tolist()
+
+        # Per transfer station: second legs as (depart, arrival, trip), departures decreasing
+        # and arrivals strictly decreasing, plus the negated departures for bisection
+        station_profiles = {}
+        station_keys = {}
+        profile = []
+
+        for trip in relevant:
+            trip_origin, trip_destination = self.trip_origin_ids[trip], self.trip_destination_ids[trip]
+            depart = self.trip_depart_min[trip]
+            arrival = depart + self.trip_duration_min[trip]
+
+            if trip_origin == origin_id and trip_destination == destination_id:
+                candidate = (depart, arrival, trip, None)
+            elif trip_destination == destination_id:
+                legs = station_profiles.setdefault(trip_origin, [])
+                if not legs or arrival < legs[-1][1]:
+                    legs.append((depart, arrival, trip))
+                    station_keys.setdefault(trip_origin, []).append(-depart)
+                continue
+            elif trip_origin == origin_id and trip_destination in station_profiles:
+                legs = station_profiles[trip_destination]
+                # Latest list position still departing after the connection, i.e. earliest arrival
+                position = bisect_right(station_keys[trip_destination], -self.trip_connection_min[trip]) - 1
+                if position < 0:
+                    continue
+                second_leg = legs[position]
+                candidate = (depart, second_leg[1], trip, second_leg[2])
+            else:
+                continue
+
+            # Keep the candidate only if it beats every later departure
+            if profile and candidate[1] >= profile[-1][1]:
+                continue
+            if profile and profile[-1][0] == candidate[0]:
+                profile.pop()
+            profile.append(candidate)
+
+        return profile[::-1]
+
+    def alternatives(self, origin_french: str, destination_french: str,
+                     preferred_time: Optional[str] = None,
+                     preferred_day: Optional[str] = None,
+                     preferred_season: Optional[str] = None,
+                     k: int = DEFAULT_ALTERNATIVES,
+                     time_budget_ms: Optional[float] = None,
+                     max_expansions: Optional[int] = None) -> List[Dict]:
+        """Up to ``k`` meaningfully different journeys on the query's service day
+
+        Candidates are the direct trips leaving at or after the preferred time and,
+        per transfer station, every such first leg with the earliest arriving second
+        leg it connects to. A candidate is dominated by one on the same route (direct
+        or via the same station) with the same service type that departs no earlier
+        and arrives no later. The rest are taken by earliest arrival (shortest duration
+        without a preferred time), keeping one journey per route, departure band and
+        service type. Transfer stations are expanded in order of earliest connection
+        until ``time_budget_ms`` or ``max_expansions`` is spent.
+        """
+        search_started = time.perf_counter()
+        origin_french = origin_french.strip()
+        destination_french = destination_french.strip()
+        origin_match, destination_match = self.resolve_pair(origin_french, destination_french)
+
+        origin_id, destination_id = self.station_id(origin_match), self.station_id(destination_match)
+        if k <= 0 or not self.reachable(origin_id, destination_id):
+            return []
+        partition = self.service_partition(preferred_day, preferred_season)
+        origins, destinations = self.trip_origin_ids, self.trip_destination_ids
+        depart, duration, connection = self.trip_depart_min, self.trip_duration_min, self.trip_connection_min
+
+        origin_trips = partition.by_origin.get(origin_id, NO_TRIPS)
+        preferred_min = parse_preferred_time(preferred_time)
+        if preferred_min is not None:
+            origin_trips = origin_trips[self._depart[origin_trips] >= preferred_min]
+        origin_trips = origin_trips.tolist()
+
+        # Candidates as (departure, arrival, route, first leg, second leg); direct trips have no route station
+        candidates = [(depart[trip], depart[trip] + duration[trip], None, trip, None)
+                      for trip in origin_trips if destinations[trip] == destination_id]
+
+        transfer_stations = self._transfer_stations.get((origin_id, destination_id), frozenset())
+        second_legs, first_legs = {}, {}
+        for trip in partition.by_destination.get(destination_id, NO_TRIPS).tolist():
+            if origins[trip] in transfer_stations:
+                second_legs.setdefault(origins[trip], []).append(trip)
+        for trip in origin_trips:
+            if destinations[trip] in second_legs:
+                first_legs.setdefault(destinations[trip], []).append(trip)
+
+        expansion_order = sorted(first_legs, key=lambda station: (min(connection[trip] for trip in first_legs[station]),
+                                                                  self._station_sort_keys[station]))
+        for expansions, station in enumerate(expansion_order):
+            if max_expansions is not None and expansions >= max_expansions:
+                break
+            if time_budget_ms is not None and (time.perf_counter() - search_started) * 1000 > time_budget_ms:
+                break
+
+            # Second legs by departure; best[i] arrives earliest among those from position i on
+            # (the latest departing on ties, so the wait is shortest)
+            legs = sorted(second_legs[station], key=lambda trip: (depart[trip], trip))
+            departures = [depart[trip] for trip in legs]
+            best = legs[:]
+            for position in range(len(legs) - 2, -1, -1):
+                later = best[position + 1]
+                if depart[later] + duration[later] <= depart[legs[position]] + duration[legs[position]]:
+                    best[position] = later
+
+            for first_leg in first_legs[station]:
+                position = bisect_left(departures, connection[first_leg])
+                if position < len(legs):
+                    second_leg = best[position]
+                    candidates.append((depart[first_leg], depart[second_leg] + duration[second_leg],
+                                       station, first_leg, second_leg))
+
+        # Dominance within a route and service type: scan by decreasing departure, keeping
+        # only journeys arriving strictly earlier than every later departure
+        def service_type(candidate):
+            return 'Mixed' if candidate[4] is not None else self.trip_services[candidate[3]]
+
+        def route_key(candidate):
+            return '' if candidate[2] is None else self._station_sort_keys[candidate[2]]
+
+        undominated, earliest = [], {}
+        for candidate in sorted(candidates, key=lambda c: (-c[0], c[1], route_key(c), c[3])):
+            group = (candidate[2], service_type(candidate))
+            if group in earliest and earliest[group] <= candidate[1]:
+                continue
+            earliest[group] = candidate[1]
+            undominated.append(candidate)
+
+        def order(candidate):
+            # Earliest arrival after a preferred time, else shortest duration
+            first = candidate[1] if preferred_min is not None else candidate[1] - candidate[0]
+            second = -candidate[0] if preferred_min is not None else candidate[0]
+            return first, second, candidate[4] is not None, route_key(candidate), candidate[3]
+
+        alternatives, seen = [], set()
+        for candidate in sorted(undominated, key=order):
+            band = self.departure_band(candidate[0])
+            signature = (candidate[2], band, service_type(candidate))
+            if signature in seen:
+                continue
+            seen.add(signature)
+            entry = self._journey_entry(origin_french, destination_french, candidate[3], candidate[4])
+            entry['departure_band'] = band
+            alternatives.append(entry)
+            if len(alternatives) == k:
+                break
+        return alternatives
+
+    @staticmethod
+    def departure_band(minutes: float) -> str:
+        """Label of the departure band a time (minutes from midnight) falls in"""
+        return DEPARTURE_BANDS[bisect_right(DEPARTURE_BAND_HOURS, minutes % DAY_MINUTES // 60) - 1][1]
+
+    def round_trip(self, origin_french: str, destination_french: str,
+                   preferred_time: Optional[str] = None,
+                   preferred_day: Optional[str] = None,
+                   preferred_season: Optional[str] = None,
+                   min_stay_minutes: int = 0,
+                   return_time: Optional[str] = None,
+                   return_by: Optional[str] = None,
+                   max_results: int = 5,
+                   transfer_time_budget_ms: Optional[float] = None,
+                   max_transfer_expansions: Optional[int] = None) -> List[Dict]:
+        """Outbound recommendations paired with a return journey on the same service day
+
+        Both stations are resolved once; the return direction reuses them swapped.
+        Outbound options are ranked like ``recommend`` (standard profile) and each is
+        paired with the journey of the reverse daily profile that arrives earliest
+        among those leaving at least ``min_stay_minutes`` after the outbound arrival
+        and not before ``return_time``. Options whose return would arrive after
+        ``return_by``, or that leave on the next service day, are dropped. Returns up
+        to ``max_results`` itineraries as dicts with ``outbound`` (a recommendation),
+        ``return_journey`` (a profile entry), ``stay_minutes`` and ``total_duration``.
+        """
+        origin_french = origin_french.strip()
+        destination_french = destination_french.strip()
+        with timed_stage('station_resolution'):
+            origin_match, destination_match = self.resolve_pair(origin_french, destination_french)
+
+        outbound = self._recommend_resolved(
+            origin_match, destination_match, origin_french, destination_french,
+            preferred_time, preferred_day, preferred_season, ROUND_TRIP_OUTBOUND_POOL, 'standard',
+            transfer_time_budget_ms, max_transfer_expansions, lambda message: None
+        )
+        if not outbound:
+            return []
+
+        with timed_stage('return_profile'):
+            returns = self._profile_journeys(self.station_id(destination_match), self.station_id(origin_match),
+                                             preferred_day, preferred_season)
+        return_departures = [journey[0] for journey in returns]
+        preferred_min = parse_preferred_time(preferred_time)
+        return_min, return_by_min = parse_preferred_time(return_time), parse_preferred_time(return_by)
+
+        itineraries = []
+        for option in outbound:
+            depart = parse_preferred_time(option['departure_time'])
+            if preferred_min is not None and depart < preferred_min:
+                continue  # leaves on the next service day (or before the preferred time)
+            arrival = depart + option['total_duration']
+
+            # Profile arrivals grow with departures: the first return leaving late enough arrives earliest
+            earliest_return = max(arrival + min_stay_minutes, return_min or 0)
+            position = bisect_left(return_departures, earliest_return)
+            if position == len(returns):
+                continue
+            return_depart, return_arrival, first_leg, second_leg = returns[position]
+            if return_by_min is not None and return_arrival > return_by_min:
+                continue
+
+            itineraries.append({
+                'outbound': option,
+                'return_journey': self._journey_entry(destination_french, origin_french, first_leg, second_leg),
+                'stay_minutes': int(return_depart - arrival),
+                'total_duration': int(option['total_duration'] + return_arrival - return_depart)
+            })
+            if len(itineraries) == max_results:
+                break
+        return itineraries
+
+    def _journey_entry(self, origin_french: str, destination_french: str,
+                       first_leg: int, second_leg: Optional[int] = None) -> Dict:
+        """Profile-style dict of a direct trip or a one-transfer journey given by trip indices"""
+        depart = self.trip_depart_min[first_leg]
+        last_leg = first_leg if second_leg is None else second_leg
+        arrival = self.trip_depart_min[last_leg] + self.trip_duration_min[last_leg]
+        entry = {
+            'departure_time': self.trip_departures[first_leg],
+            'arrival_time': self.trip_arrivals[last_leg],
+            'duration': int(arrival - depart),
+            'transfers': 0 if second_leg is None else 1,
+            'transfer_details': None
+        }
+        first_service = self.trip_services[first_leg]
+
+        if second_leg is None:
+            entry['service_type'] = first_service
+            entry['route_details'] = f"{origin_french} → {destination_french}"
+        else:
+            transfer_french = self.trip_destinations_french[first_leg]
+            entry['service_type'] = 'Mixed'
+            entry['route_details'] = f"{origin_french} → {transfer_french} → {destination_french}"
+            entry['transfer_details'] = {
+                'transfer_station': transfer_french,
+                'first_leg_departure': self.trip_departures[first_leg],
+                'first_leg_duration': int(self.trip_duration_min[first_leg]),
+                'first_leg_service': first_service,
+                'waiting_time': int(self.trip_depart_min[second_leg] - self.trip_connection_min[first_leg]),
+                'second_leg_departure': self.trip_departures[second_leg],
+                'second_leg_duration': int(self.trip_duration_min[second_leg]),
+                'second_leg_service': self.trip_services[second_leg]
+            }
+        return entry
+
+    format_minutes = staticmethod(format_minutes)